@@ -4,9 +4,18 @@ set -euo pipefail
 ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
 export PYTHONPATH="$ROOT_DIR/src${PYTHONPATH:+:$PYTHONPATH}"
 
-if [[ "${1:-}" == "--reload" ]]; then
-  export A2A_MCP_RELOAD=true
-fi
+for arg in "$@"; do
+  case "$arg" in
+    --reload)
+      export A2A_MCP_RELOAD=true
+      ;;
+    --uds)
+      # Same-host tool calls over a Unix domain socket instead of TCP.
+      export A2A_MCP_TOOL_UDS="${A2A_MCP_TOOL_UDS:-${TMPDIR:-/tmp}/a2a-mcp-tools.sock}"
+      export A2A_MCP_MCP_BASE_URL="unix://$A2A_MCP_TOOL_UDS"
+      ;;
+  esac
+done
 
 python -m tool_server.server &
 TOOL_PID=$!
@@ -0,0 +1,238 @@
+"""Adaptive admission control for `/v1/ask`.
+
+A concurrency limit sits in front of the agent. Requests beyond the limit wait
+in a bounded queue; when the queue is full, or a request has waited longer
+than `queue_timeout_s`, it is rejected at once with a `Retry-After` hint rather
+than piling up until everything times out.
+
+The limit adapts AIMD-style to observed request latency, measured against the
+service's own baseline rather than a fixed number (asks routinely take tens of
+seconds): a slow-moving average of past latencies is the baseline, a fast one
+the current latency. While the current latency stays within
+`latency_tolerance` times the baseline, every finished request grows the limit
+by `1 / limit` (about +1 per limit's worth of requests); when it rises above
+that, or a request fails, the limit shrinks by `backoff`. Overload therefore
+lowers concurrency until latency recovers. `latency_ceiling_s` is an absolute
+bound on top, for when the baseline itself has drifted up. Requests whose
+caller went away (disconnect, cancellation) do not count either way.
+
+Slots are handed out by a `FairScheduler`, so the queue is split into priority
+lanes with per-tenant caps (see `scheduling.py`).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections.abc import AsyncIterator, Mapping
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+from common.disconnect import ClientDisconnected
+
+from .scheduling import DEFAULT_TENANT, INTERACTIVE, FairScheduler, QueueFull
+from .settings import AgentSettings
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, reason: str, retry_after_s: int) -> None:
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+@dataclass
+class Admission:
+    queue_wait_ms: int
+    limit: int
+    inflight: int
+    lane: str = INTERACTIVE
+    tenant: str = DEFAULT_TENANT
+
+    def as_trace(self) -> dict[str, Any]:
+        return {
+            "queue_wait_ms": self.queue_wait_ms,
+            "limit": self.limit,
+            "inflight": self.inflight,
+            "lane": self.lane,
+            "tenant": self.tenant,
+        }
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        *,
+        initial_limit: int = 32,
+        min_limit: int = 2,
+        max_limit: int = 128,
+        max_queue: int = 64,
+        queue_timeout_s: float = 5.0,
+        latency_tolerance: float = 2.0,
+        latency_ceiling_s: float = 120.0,
+        backoff: float = 0.9,
+        lane_weights: Mapping[str, int] | None = None,
+        tenant_max_share: float = 1.0,
+        reserved_interactive_share: float = 0.0,
+    ) -> None:
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.latency_tolerance = latency_tolerance
+        self.latency_ceiling_s = latency_ceiling_s
+        self.backoff = backoff
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._scheduler = FairScheduler(
+            capacity=self.limit,
+            weights=lane_weights or {INTERACTIVE: 1},
+            tenant_max_share=tenant_max_share,
+            reserved_interactive_share=reserved_interactive_share,
+            max_queue=max_queue,
+        )
+        self._latency_ewma_s: float | None = None
+        self._latency_baseline_s: float | None = None
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    @property
+    def limit(self) -> int:
+        return max(int(self._limit), self.min_limit)
+
+    @asynccontextmanager
+    async def acquire(
+        self, lane: str = INTERACTIVE, tenant: str = DEFAULT_TENANT, *, wait: bool = False
+    ) -> AsyncIterator[Admission]:
+        """Hold one slot for the duration of the block; raises AdmissionRejected.
+
+        With `wait`, for work that was already accepted (tasks, batch items),
+        the caller waits its turn in its lane instead: no queue bound or
+        timeout applies and it is never rejected.
+        """
+        try:
+            wait_ms = await self._scheduler.acquire(
+                lane, tenant, None if wait else self.queue_timeout_s, bounded=not wait
+            )
+        except QueueFull:
+            self.rejected_queue_full += 1
+            raise AdmissionRejected(429, "admission_queue_full", self._retry_after()) from None
+        except TimeoutError:
+            self.rejected_timeout += 1
+            raise AdmissionRejected(503, "admission_queue_timeout", self._retry_after()) from None
+        self.admitted += 1
+
+        admission = Admission(
+            queue_wait_ms=wait_ms,
+            limit=self.limit,
+            inflight=self._scheduler.inflight,
+            lane=lane,
+            tenant=tenant,
+        )
+        run_started = time.perf_counter()
+        ok: bool | None = False
+        try:
+            yield admission
+            ok = True
+        except (ClientDisconnected, asyncio.CancelledError):
+            # The caller gave up; that says nothing about how the service copes.
+            ok = None
+            raise
+        finally:
+            if ok is not None:
+                self._on_done(time.perf_counter() - run_started, ok)
+            self._scheduler.release(lane, tenant)
+
+    def stats(self) -> dict[str, Any]:
+        scheduler = self._scheduler.stats()
+        return {
+            "limit": self.limit,
+            "inflight": scheduler["inflight"],
+            "queued": scheduler["queued"],
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "latency_ewma_ms": _ms(self._latency_ewma_s),
+            "latency_baseline_ms": _ms(self._latency_baseline_s),
+            "lanes": scheduler["lanes"],
+        }
+
+    def _on_done(self, latency_s: float, ok: bool) -> None:
+        if self._latency_ewma_s is None:
+            self._latency_ewma_s = latency_s
+        else:
+            self._latency_ewma_s = 0.8 * self._latency_ewma_s + 0.2 * latency_s
+        if ok:
+            if self._latency_baseline_s is None:
+                self._latency_baseline_s = latency_s
+            else:
+                self._latency_baseline_s = 0.98 * self._latency_baseline_s + 0.02 * latency_s
+        baseline = self._latency_baseline_s or self._latency_ewma_s
+        fast = (
+            self._latency_ewma_s <= baseline * self.latency_tolerance
+            and latency_s <= self.latency_ceiling_s
+        )
+        if ok and fast:
+            self._limit = min(self._limit + 1 / self._limit, float(self.max_limit))
+        else:
+            self._limit = max(self._limit * self.backoff, float(self.min_limit))
+        self._scheduler.set_capacity(self.limit)
+
+    def _retry_after(self) -> int:
+        # Rough time for the current backlog to drain at the current limit.
+        latency = self._latency_ewma_s or 1.0
+        backlog = (self._scheduler.queued + self._scheduler.inflight) / max(self.limit, 1)
+        return max(1, math.ceil(latency * backlog))
+
+
+def _ms(seconds: float | None) -> int | None:
+    return int(seconds * 1000) if seconds is not None else None
+
+
+@lru_cache(maxsize=4)
+def _shared_limiter(
+    initial_limit: int,
+    min_limit: int,
+    max_limit: int,
+    max_queue: int,
+    queue_timeout_ms: int,
+    latency_tolerance: float,
+    latency_ceiling_ms: int,
+    lane_weights: tuple[tuple[str, int], ...],
+    tenant_max_share: float,
+    reserved_interactive_share: float,
+) -> AdaptiveLimiter:
+    return AdaptiveLimiter(
+        initial_limit=initial_limit,
+        min_limit=min_limit,
+        max_limit=max_limit,
+        max_queue=max_queue,
+        queue_timeout_s=queue_timeout_ms / 1000,
+        latency_tolerance=latency_tolerance,
+        latency_ceiling_s=latency_ceiling_ms / 1000,
+        lane_weights=dict(lane_weights),
+        tenant_max_share=tenant_max_share,
+        reserved_interactive_share=reserved_interactive_share,
+    )
+
+
+def get_admission_limiter(settings: AgentSettings) -> AdaptiveLimiter | None:
+    if not settings.admission_enabled:
+        return None
+    return _shared_limiter(
+        settings.admission_initial_limit,
+        settings.admission_min_limit,
+        settings.admission_max_limit,
+        settings.admission_max_queue,
+        settings.admission_queue_timeout_ms,
+        settings.admission_latency_tolerance,
+        settings.admission_latency_ceiling_ms,
+        tuple(settings.scheduler_lane_weights.items()),
+        settings.scheduler_tenant_max_share,
+        settings.scheduler_reserved_interactive_share,
+    )
@@ -7,75 +7,143 @@ Design goals:
 
 from __future__ import annotations
 
+import asyncio
+import inspect
 import json
 import re
+import time
+from collections.abc import Callable
 from typing import Any
 
-from openai import OpenAI
+from openai import AsyncOpenAI
 
-from tool_server.tools import list_tool_specs
+from common.tool_contract import tool_data
+from .llm_cache import (
+    completion_cache_key,
+    deserialize_completion,
+    get_completion_cache,
+    has_time_sensitive_output,
+    serialize_completion,
+)
 from .logging import get_logger
+from .projection import encode_tool_message
 from .prompts import PLANNER_SYSTEM, RESPONDER_SYSTEM
+from .repair import repair_tool_args
+from .router import IntentDecision, classify_intent, extract_city, render_answer
+from .scheduling import get_llm_pool
 from .settings import AgentSettings
 from .state import AgentState, ToolCallRecord, TraceRecord
-from .trace import record_llm_call
+from .speculation import SpeculativeCalls
+from .tool_catalog import get_tool_catalog, refresh_tool_catalog
+from .trace import (
+    record_llm_call,
+    record_repair,
+    record_route,
+    record_speculation,
+    record_tool_call,
+)
 from .tool_broker import ToolBroker
 
 logger = get_logger("agent")
 
 
 def build_openai_tools() -> list[dict[str, Any]]:
-    """Translate internal tool specs into OpenAI tool schema."""
-    tools: list[dict[str, Any]] = []
-    for spec in list_tool_specs():
-        tools.append(
-            {
-                "type": "function",
-                "function": {
-                    "name": spec.name,
-                    "description": spec.description,
-                    "parameters": spec.input_model.model_json_schema(),
-                },
-            }
-        )
-    return tools
+    """OpenAI tool definitions of the current tool catalog (read-only)."""
+    return get_tool_catalog().openai_tools
 
 
 class Agent:
     def __init__(self, settings: AgentSettings) -> None:
         self._settings = settings
         self._broker = ToolBroker(settings)
+        self._cache = get_completion_cache(settings)
+        self._llm_pool = get_llm_pool(settings)
+        self._tools_version = "none"
         self._client = None
         if settings.openai_api_key:
             client_kwargs: dict[str, Any] = {"api_key": settings.openai_api_key}
             if settings.openai_base_url:
                 client_kwargs["base_url"] = settings.openai_base_url
-            self._client = OpenAI(**client_kwargs)
-
-    async def run(self, query: str, trace_id: str, trace: TraceRecord) -> AgentState:
-        """Run a single request through the tool-use loop."""
+            self._client = AsyncOpenAI(**client_kwargs)
+
+    async def run(
+        self,
+        query: str,
+        trace_id: str,
+        trace: TraceRecord,
+        history: list[dict[str, Any]] | None = None,
+    ) -> AgentState:
+        """Run a single request through the tool-use loop.
+
+        `history` holds earlier turns of the same conversation; it is placed
+        between the system prompt and the new user message.
+        """
         state = AgentState(query=query, trace_id=trace_id, trace=trace)
+        # A no-op while the catalog is fresh; otherwise a conditional GET /tools.
+        await refresh_tool_catalog(self._settings)
         if self._settings.mock_llm or not self._client:
             return await self._run_mock(state)
 
-        tools = build_openai_tools()
+        decision: IntentDecision | None = None
+        if self._settings.fast_path_enabled or self._settings.speculative_tools_enabled:
+            decision = classify_intent(query)
+
+        if self._settings.fast_path_enabled and decision is not None:
+            taken = (
+                decision.tool_name is not None
+                and decision.confidence >= self._settings.fast_path_min_confidence
+            )
+            record_route(trace, decision.as_trace(), taken=taken)
+            if taken and await self._run_fast_path(state, decision):
+                return state
+
+        speculation: SpeculativeCalls | None = None
+        if (
+            self._settings.speculative_tools_enabled
+            and decision is not None
+            and decision.tool_name is not None
+            and decision.confidence >= self._settings.speculative_min_confidence
+        ):
+            # Overlap the predicted tool call with the first planner LLM call.
+            speculation = SpeculativeCalls(self._broker, trace_id)
+            speculation.launch(decision.tool_name, decision.arguments)
+        try:
+            return await self._run_planner(state, speculation, history or [])
+        finally:
+            if speculation is not None:
+                record_speculation(trace, speculation.finish())
+
+    async def _run_planner(
+        self,
+        state: AgentState,
+        speculation: SpeculativeCalls | None,
+        history: list[dict[str, Any]],
+    ) -> AgentState:
+        """Planner tool-use loop followed by one responder call."""
+        query, trace_id, trace = state.query, state.trace_id, state.trace
+        catalog = get_tool_catalog()
+        # Without a catalog (tool server never reached) the planner answers without tools.
+        tools = catalog.openai_tools or None
+        self._tools_version = catalog.version
         messages: list[dict[str, Any]] = [
             {"role": "system", "content": PLANNER_SYSTEM},
+            *history,
             {"role": "user", "content": query},
         ]
-        remaining = self._settings.max_tool_calls
+        turn_start = len(messages) - 1
+        # A failed fast-path call already used part of the budget.
+        remaining = self._settings.max_tool_calls - len(state.tool_calls)
         retry_budget = self._settings.tool_arg_retry_limit
         forced_tool_name: str | None = None
 
         while True:
             try:
-                response = self._client.chat.completions.create(
-                    model=self._settings.openai_model,
-                    messages=messages,
+                started = time.perf_counter()
+                response, cache_status = await self._create_completion(
+                    "planner",
+                    messages,
                     tools=tools,
                     tool_choice=_tool_choice(forced_tool_name),
-                    temperature=self._settings.temperature,
-                    timeout=self._settings.openai_timeout_s,
                 )
                 message = response.choices[0].message
                 forced_tool_name = None
@@ -86,6 +154,9 @@ class Agent:
                     tool_calls=_summarize_tool_calls(message),
                     messages_summary=_summarize_messages(messages),
                     finish_reason=response.choices[0].finish_reason,
+                    kind="planner",
+                    latency_ms=_elapsed_ms(started),
+                    cache=cache_status,
                 )
             except Exception as exc:  # noqa: BLE001
                 logger.info(
@@ -93,13 +164,15 @@ class Agent:
                     extra={"extra": {"trace_id": trace_id, "error": str(exc)}},
                 )
                 state.final_answer = "LLM 调用失败，请检查配置。"
+                _record_turn(state, messages[turn_start:])
                 return state
 
             if not message.tool_calls:
                 break
 
             # Add the assistant tool-call message so the tool responses are valid.
-            messages.append(_assistant_tool_call_message(message))
+            assistant_message = _assistant_tool_call_message(message)
+            messages.append(assistant_message)
 
             # Execute tool calls sequentially (kept simple for clarity).
             retry_requested = False
@@ -108,23 +181,35 @@ class Agent:
                     break
                 tool_name = call.function.name
                 args = json.loads(call.function.arguments or "{}")
-                result = await self._broker.call_tool(tool_name, args, trace_id, trace)
+                result = await self._call_tool(tool_name, args, state, speculation)
                 state.tool_calls.append(
                     ToolCallRecord(
                         name=tool_name,
                         arguments=args,
                         ok=result.ok,
-                        output=result.data if result.ok else None,
+                        output=tool_data(result) if result.ok else None,
                         error=result.error.model_dump() if result.error else None,
                     )
                 )
-                tool_payload = result.data if result.ok else {"error": result.error.model_dump()}
+                if (
+                    _should_retry_tool_call(result)
+                    and self._settings.tool_arg_repair_enabled
+                    # The repaired call is a tool call of its own and needs budget left.
+                    and remaining > 1
+                ):
+                    repaired = await self._repair_tool_call(tool_name, args, state)
+                    if repaired is not None:
+                        remaining -= 1
+                        repaired_args, repaired_result = repaired
+                        if not _should_retry_tool_call(repaired_result):
+                            args, result = repaired_args, repaired_result
+                            _rewrite_tool_call_arguments(assistant_message, call.id, args)
                 messages.append(
                     {
                         "role": "tool",
                         "tool_call_id": call.id,
                         "name": tool_name,
-                        "content": json.dumps(tool_payload, ensure_ascii=False),
+                        "content": self._tool_message_content(tool_name, result),
                     }
                 )
                 remaining -= 1
@@ -160,12 +245,8 @@ class Agent:
         # Final response uses tool observations as context.
         final_messages = [{"role": "system", "content": RESPONDER_SYSTEM}] + messages[1:]
         try:
-            final = self._client.chat.completions.create(
-                model=self._settings.openai_model,
-                messages=final_messages,
-                temperature=self._settings.temperature,
-                timeout=self._settings.openai_timeout_s,
-            )
+            started = time.perf_counter()
+            final, cache_status = await self._create_completion("responder", final_messages)
             record_llm_call(
                 trace,
                 model=self._settings.openai_model,
@@ -173,6 +254,9 @@ class Agent:
                 tool_calls=[],
                 messages_summary=_summarize_messages(final_messages),
                 finish_reason=final.choices[0].finish_reason,
+                kind="responder",
+                latency_ms=_elapsed_ms(started),
+                cache=cache_status,
             )
             state.final_answer = final.choices[0].message.content or ""
         except Exception as exc:  # noqa: BLE001
@@ -182,8 +266,210 @@ class Agent:
             )
             state.final_answer = "LLM 调用失败，请检查配置。"
 
+        _record_turn(state, messages[turn_start:])
         return state
 
+    async def _run_fast_path(self, state: AgentState, decision: IntentDecision) -> bool:
+        """Answer with one direct tool call; False means fall back to the planner."""
+        assert decision.tool_name is not None
+        trace = state.trace
+        traced = len(trace.tools)
+        result = await self._broker.call_tool(
+            decision.tool_name, decision.arguments, state.trace_id, trace
+        )
+        state.tool_calls.append(
+            ToolCallRecord(
+                name=decision.tool_name,
+                arguments=decision.arguments,
+                ok=result.ok,
+                output=tool_data(result) if result.ok else None,
+                error=result.error.model_dump() if result.error else None,
+                fast_path_fallback=not result.ok,
+            )
+        )
+        if not result.ok:
+            trace.router["fallback"] = "tool_error"
+            for entry in trace.tools[traced:]:
+                entry["fast_path_fallback"] = True
+            return False
+
+        call_id = f"fastpath_{state.trace_id}"
+        turn: list[dict[str, Any]] = [
+            {"role": "user", "content": state.query},
+            {
+                "role": "assistant",
+                "content": "",
+                "tool_calls": [
+                    {
+                        "id": call_id,
+                        "type": "function",
+                        "function": {
+                            "name": decision.tool_name,
+                            "arguments": json.dumps(decision.arguments, ensure_ascii=False),
+                        },
+                    }
+                ],
+            },
+            {
+                "role": "tool",
+                "tool_call_id": call_id,
+                "name": decision.tool_name,
+                "content": self._tool_message_content(decision.tool_name, result),
+            },
+        ]
+        if self._settings.fast_path_answer_mode == "responder":
+            messages = [{"role": "system", "content": RESPONDER_SYSTEM}, *turn]
+            try:
+                started = time.perf_counter()
+                final, cache_status = await self._create_completion("responder", messages)
+                record_llm_call(
+                    trace,
+                    model=self._settings.openai_model,
+                    temperature=self._settings.temperature,
+                    tool_calls=[],
+                    messages_summary=_summarize_messages(messages),
+                    finish_reason=final.choices[0].finish_reason,
+                    kind="responder",
+                    latency_ms=_elapsed_ms(started),
+                    cache=cache_status,
+                )
+                state.final_answer = final.choices[0].message.content or ""
+                trace.router["answer"] = "responder"
+                _record_turn(state, turn)
+                return True
+            except Exception as exc:  # noqa: BLE001
+                # The tool result is good; a template answer beats an error message.
+                logger.info(
+                    "llm_error",
+                    extra={"extra": {"trace_id": state.trace_id, "error": str(exc)}},
+                )
+
+        state.final_answer = render_answer(decision.tool_name, tool_data(result) or {})
+        trace.router["answer"] = "template"
+        _record_turn(state, turn)
+        return True
+
+    async def _repair_tool_call(
+        self, name: str, args: dict[str, Any], state: AgentState
+    ) -> tuple[dict[str, Any], Any] | None:
+        """Fix invalid arguments locally and call again; None means no call was made."""
+        repair = repair_tool_args(name, args, state.query)
+        if repair.arguments is None:
+            record_repair(state.trace, tool_name=name, original=args, repair=repair, ok=None)
+            return None
+
+        result = await self._broker.call_tool(name, repair.arguments, state.trace_id, state.trace)
+        state.tool_calls.append(
+            ToolCallRecord(
+                name=name,
+                arguments=repair.arguments,
+                ok=result.ok,
+                output=tool_data(result) if result.ok else None,
+                error=result.error.model_dump() if result.error else None,
+            )
+        )
+        record_repair(state.trace, tool_name=name, original=args, repair=repair, ok=result.ok)
+        logger.info(
+            "tool_args_repaired",
+            extra={
+                "extra": {
+                    "trace_id": state.trace_id,
+                    "tool": name,
+                    "fixes": repair.fixes,
+                    "ok": result.ok,
+                }
+            },
+        )
+        return repair.arguments, result
+
+    async def _call_tool(
+        self,
+        name: str,
+        args: dict[str, Any],
+        state: AgentState,
+        speculation: SpeculativeCalls | None,
+    ) -> Any:
+        if speculation is not None:
+            result = await speculation.claim(name, args)
+            if result is not None:
+                record_tool_call(
+                    state.trace,
+                    tool_name=name,
+                    args=args,
+                    ok=result.ok,
+                    latency_ms=result.meta.latency_ms,
+                    result=tool_data(result) if result.ok else None,
+                    error=result.error.model_dump() if result.error else None,
+                    speculative=True,
+                )
+                return result
+        return await self._broker.call_tool(name, args, state.trace_id, state.trace)
+
+    def _tool_message_content(self, name: str, result: Any) -> str:
+        """What the LLM sees of a tool result; the trace keeps the full output."""
+        if not result.ok:
+            return json.dumps({"error": result.error.model_dump()}, ensure_ascii=False)
+        if not self._settings.tool_projection_enabled:
+            return json.dumps(tool_data(result), ensure_ascii=False)
+        return encode_tool_message(name, tool_data(result), self._settings.tool_message_max_tokens)
+
+    async def _create_completion(
+        self,
+        kind: str,
+        messages: list[dict[str, Any]],
+        *,
+        tools: list[dict[str, Any]] | None = None,
+        tool_choice: Any = None,
+    ) -> tuple[Any, str | None]:
+        """Call the LLM through the completion cache; returns (response, cache status)."""
+        request: dict[str, Any] = {
+            "model": self._settings.openai_model,
+            "messages": messages,
+            "temperature": self._settings.temperature,
+            "timeout": self._settings.openai_timeout_s,
+        }
+        if tools is not None:
+            request["tools"] = tools
+            request["tool_choice"] = tool_choice
+
+        ttl_s = self._cache_ttl(kind)
+        key: str | None = None
+        cache_status: str | None = None
+        if self._cache is not None and ttl_s > 0:
+            if has_time_sensitive_output(messages, self._settings.llm_cache_time_sensitive_tools):
+                cache_status = "bypass"
+            else:
+                key = completion_cache_key(
+                    model=self._settings.openai_model,
+                    temperature=self._settings.temperature,
+                    tools_version=self._tools_version if tools is not None else "none",
+                    tool_choice=tool_choice,
+                    messages=messages,
+                )
+                cached = self._cache.get(key)
+                if cached is not None:
+                    return deserialize_completion(cached), "hit"
+                cache_status = "miss"
+
+        if self._client is None:
+            # run() answers with the mock LLM before ever getting here without a client.
+            raise RuntimeError("LLM client is not configured")
+        create: Callable[..., Any] = self._client.chat.completions.create
+        async with self._llm_pool.slot():
+            if inspect.iscoroutinefunction(inspect.unwrap(create)):
+                response = await create(**request)
+            else:
+                # Synchronous clients must not block the event loop.
+                response = await asyncio.to_thread(create, **request)
+        if key is not None and self._cache is not None:
+            self._cache.put(key, serialize_completion(response), ttl_s)
+        return response, cache_status
+
+    def _cache_ttl(self, kind: str) -> float:
+        if kind == "planner":
+            return self._settings.llm_cache_planner_ttl_s
+        return self._settings.llm_cache_responder_ttl_s
+
     async def _run_mock(self, state: AgentState) -> AgentState:
         """Heuristic mock mode: enables E2E flow without external LLM."""
         query = state.query
@@ -192,14 +478,15 @@ class Agent:
         if re.search(r"时间|time", query, re.IGNORECASE):
             tools_to_call.append(("time", {}))
         elif re.search(r"天气|weather", query, re.IGNORECASE):
-            city = _extract_city(query) or "Beijing"
+            city = extract_city(query) or "Beijing"
             tools_to_call.append(("weather", {"city": city}))
         elif re.search(r"附近|poi|景点|餐厅", query, re.IGNORECASE):
-            city = _extract_city(query) or "Beijing"
+            city = extract_city(query) or "Beijing"
             tools_to_call.append(("poi", {"city": city, "keyword": "景点"}))
 
         if not tools_to_call:
             state.final_answer = "我可以帮你查时间、天气或附近 POI。请告诉我具体需求。"
+            _record_turn(state, [{"role": "user", "content": query}])
             return state
 
         for name, args in tools_to_call[: self._settings.max_tool_calls]:
@@ -209,41 +496,47 @@ class Agent:
                     name=name,
                     arguments=args,
                     ok=result.ok,
-                    output=result.data if result.ok else None,
+                    output=tool_data(result) if result.ok else None,
                     error=result.error.model_dump() if result.error else None,
                 )
             )
 
         if state.tool_calls and state.tool_calls[0].ok:
             payload = state.tool_calls[0].output or {}
-            if tools_to_call[0][0] == "time":
-                state.final_answer = f"当前时间：{payload.get('iso')} ({payload.get('timezone')})"
-            elif tools_to_call[0][0] == "weather":
-                city_name = payload.get("city") or "目标城市"
-                state.final_answer = (
-                    f"{city_name}天气：{payload.get('description')}，温度 {payload.get('temperature_c')}°C"
-                )
-            else:
-                items = payload.get("items", [])
-                top = items[0]["name"] if items else "暂无结果"
-                state.final_answer = f"附近推荐：{top}"
+            state.final_answer = render_answer(tools_to_call[0][0], payload)
         else:
             state.final_answer = "工具调用失败，请检查工具服务或 API Key。"
 
+        _record_turn(state, [{"role": "user", "content": query}])
         return state
 
 
-def _extract_city(text: str) -> str | None:
-    match = re.search(r"(北京|上海|广州|深圳|杭州|成都)", text)
-    return match.group(1) if match else None
+def _record_turn(state: AgentState, messages: list[dict[str, Any]]) -> None:
+    """Keep this turn's messages, closed by the final answer, for the session.
+
+    Only the user query, tool calls that got an answer and those answers are
+    kept. A call cut off by the tool-call budget or by an argument retry (and
+    the retry prompt itself) would make every later request of the
+    conversation invalid: the LLM API rejects unanswered `tool_call_id`s.
+    """
+    answered = {message.get("tool_call_id") for message in messages if message["role"] == "tool"}
+    kept: list[dict[str, Any]] = []
+    for index, message in enumerate(messages):
+        if message["role"] == "assistant" and message.get("tool_calls"):
+            calls = [call for call in message["tool_calls"] if call["id"] in answered]
+            if calls:
+                kept.append({**message, "tool_calls": calls})
+        elif message["role"] != "user" or index == 0:
+            kept.append(message)
+    state.messages = [*kept, {"role": "assistant", "content": state.final_answer or ""}]
+
+
+def _elapsed_ms(started: float) -> int:
+    return int((time.perf_counter() - started) * 1000)
 
 
 def _should_retry_tool_call(result: Any) -> bool:
-    return bool(
-        not result.ok
-        and result.error
-        and result.error.code == "INVALID_ARGUMENT"
-    )
+    return bool(not result.ok and result.error and result.error.code == "INVALID_ARGUMENT")
 
 
 def _tool_choice(forced_tool_name: str | None) -> Any:
@@ -277,6 +570,15 @@ def _summarize_messages(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
     ]
 
 
+def _rewrite_tool_call_arguments(
+    assistant_message: dict[str, Any], call_id: str, args: dict[str, Any]
+) -> None:
+    # Keep the history consistent with the arguments that actually ran.
+    for call in assistant_message["tool_calls"]:
+        if call["id"] == call_id:
+            call["function"]["arguments"] = json.dumps(args, ensure_ascii=False)
+
+
 def _assistant_tool_call_message(message: Any) -> dict[str, Any]:
     tool_calls_payload = []
     for call in message.tool_calls:
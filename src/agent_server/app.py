@@ -2,24 +2,44 @@
 
 from __future__ import annotations
 
+import json
 import uuid
+from collections.abc import AsyncIterator
+from typing import Any
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 
+from common.admin import AdminAccessDenied, check_admin_token, has_admin_token
+from common.disconnect import CLIENT_CLOSED_STATUS, ClientDisconnected, cancel_on_disconnect
+from common.loop_monitor import LoopLagMonitor, bind_trace_id
+from common.profiling import PROFILE_HEADER, should_profile
+
+from .admission import AdmissionRejected, get_admission_limiter
+from .batch import BatchAskRequest, run_batch
+from .coalesce import get_coalescer
 from .executor import AskRequest, handle_ask
-from .logging import get_logger
+from .llm_cache import get_completion_cache
+from .logging import configure_from_settings, get_logger, logging_stats, set_log_level
+from .scheduling import classify_request, get_llm_pool, get_tool_pool, request_class
+from .session import get_session_store
 from .settings import get_settings
+from .tasks import TaskQueueFull, TaskRecord, get_task_manager
+from .tool_catalog import get_tool_catalog, refresh_tool_catalog
+from .tool_client import close_tool_clients
 
 app = FastAPI(
     title=get_settings().service_title,
     version=get_settings().agent_version,
 )
 logger = get_logger("agent_server")
+loop_monitor: LoopLagMonitor | None = None
 
 
 @app.on_event("startup")
 def log_startup_config() -> None:
     settings = get_settings()
+    configure_from_settings(settings)
     logger.info(
         "agent_server_config",
         extra={
@@ -31,6 +51,12 @@ def log_startup_config() -> None:
                 "temperature": settings.temperature,
                 "max_tool_calls": settings.max_tool_calls,
                 "tool_arg_retry_limit": settings.tool_arg_retry_limit,
+                "tool_arg_repair_enabled": settings.tool_arg_repair_enabled,
+                "fast_path_enabled": settings.fast_path_enabled,
+                "speculative_tools_enabled": settings.speculative_tools_enabled,
+                "llm_cache_enabled": settings.llm_cache_enabled,
+                "coalesce_enabled": settings.coalesce_enabled,
+                "admission_enabled": settings.admission_enabled,
                 "mock_llm": settings.mock_llm,
                 "host": settings.host,
                 "port": settings.port,
@@ -39,16 +65,88 @@ def log_startup_config() -> None:
                 "request_timeout_s": settings.request_timeout_s,
                 "trace_enabled": settings.trace_enabled,
                 "trace_dir": settings.trace_dir,
+                "profile_sample_rate": settings.profile_sample_rate,
+                "log_level": settings.log_level,
+                "log_sample_rates": settings.log_sample_rates,
             }
         },
     )
 
 
+@app.on_event("startup")
+async def start_loop_monitor() -> None:
+    global loop_monitor
+    settings = get_settings()
+    if not settings.loop_monitor_enabled:
+        return
+    loop_monitor = LoopLagMonitor(
+        interval_s=settings.loop_monitor_interval_ms / 1000,
+        stall_threshold_s=settings.loop_stall_threshold_ms / 1000,
+        logger=logger,
+    )
+    loop_monitor.start()
+
+
+@app.on_event("startup")
+async def load_tool_catalog() -> None:
+    # Discover tools before the first request; falls back to the on-disk snapshot.
+    await refresh_tool_catalog(get_settings(), force=True)
+
+
+@app.on_event("shutdown")
+async def stop_loop_monitor() -> None:
+    if loop_monitor is not None:
+        await loop_monitor.stop()
+
+
+@app.on_event("shutdown")
+async def close_tool_connections() -> None:
+    await close_tool_clients()
+
+
 @app.get("/health")
 def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+def metrics() -> dict[str, Any]:
+    settings = get_settings()
+    llm_cache = get_completion_cache(settings)
+    sessions = get_session_store(settings)
+    coalescer = get_coalescer(settings)
+    limiter = get_admission_limiter(settings)
+    return {
+        "logging": logging_stats(),
+        "event_loop": loop_monitor.stats() if loop_monitor else {"enabled": False},
+        "llm_cache": llm_cache.stats() if llm_cache else {"enabled": False},
+        "sessions": sessions.stats() if sessions else {"enabled": False},
+        "coalesce": coalescer.stats() if coalescer else {"enabled": False},
+        "admission": limiter.stats() if limiter else {"enabled": False},
+        "llm_pool": get_llm_pool(settings).stats(),
+        "tool_pool": get_tool_pool(settings).stats(),
+        "tool_catalog": get_tool_catalog().stats(),
+        "tasks": get_task_manager(settings).stats(),
+    }
+
+
+@app.put("/admin/log-level")
+def update_log_level(
+    request: Request,
+    level: str,
+    logger_name: str | None = Query(default=None, alias="logger"),
+) -> dict[str, Any]:
+    try:
+        check_admin_token(get_settings().admin_token, request.headers.get("authorization"))
+    except AdminAccessDenied as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail) from exc
+    try:
+        set_log_level(level, logger_name)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return logging_stats()
+
+
 @app.get("/agent-card")
 def agent_card() -> dict[str, object]:
     settings = get_settings()
@@ -56,7 +154,14 @@ def agent_card() -> dict[str, object]:
         "name": settings.agent_name,
         "version": settings.agent_version,
         "description": settings.agent_description,
-        "endpoints": {"ask": "/v1/ask"},
+        "endpoints": {
+            "ask": "/v1/ask",
+            "ask_batch": "/v1/ask:batch",
+            "tasks": "/v1/tasks",
+            "task": "/v1/tasks/{task_id}",
+            "task_events": "/v1/tasks/{task_id}/events",
+            "task_cancel": "/v1/tasks/{task_id}/cancel",
+        },
         "mcp_base_url": settings.mcp_base_url,
     }
 
@@ -65,5 +170,114 @@ def agent_card() -> dict[str, object]:
 async def ask(payload: AskRequest, request: Request):
     # Preserve incoming trace_id if provided, else generate one.
     trace_id = request.headers.get("x-trace-id") or str(uuid.uuid4())
-    response = await handle_ask(payload, trace_id)
-    return response
+    bind_trace_id(trace_id)
+    settings = get_settings()
+    profile = should_profile(
+        request.headers.get(PROFILE_HEADER),
+        settings.profile_sample_rate,
+        admin=has_admin_token(settings.admin_token, request.headers.get("authorization")),
+    )
+    lane, tenant = classify_request(payload.priority, payload.tenant, request.headers, settings)
+    limiter = get_admission_limiter(settings)
+    poll_interval_s = settings.disconnect_poll_interval_ms / 1000
+    try:
+        with request_class(lane, tenant):
+            if limiter is None:
+                return await cancel_on_disconnect(
+                    request, handle_ask(payload, trace_id, profile=profile), poll_interval_s
+                )
+            async with limiter.acquire(lane, tenant) as admission:
+                return await cancel_on_disconnect(
+                    request,
+                    handle_ask(payload, trace_id, profile=profile, admission=admission.as_trace()),
+                    poll_interval_s,
+                )
+    except ClientDisconnected:
+        logger.info("ask_client_disconnected", extra={"extra": {"trace_id": trace_id}})
+        raise HTTPException(
+            status_code=CLIENT_CLOSED_STATUS, detail="client disconnected"
+        ) from None
+    except AdmissionRejected as exc:
+        logger.info(
+            "ask_rejected",
+            extra={
+                "extra": {
+                    "trace_id": trace_id,
+                    "lane": lane,
+                    "tenant": tenant,
+                    "reason": exc.reason,
+                    "status_code": exc.status_code,
+                    "retry_after_s": exc.retry_after_s,
+                }
+            },
+        )
+        raise HTTPException(
+            status_code=exc.status_code,
+            detail=exc.reason,
+            headers={"Retry-After": str(exc.retry_after_s)},
+        ) from exc
+
+
+@app.post("/v1/ask:batch")
+async def ask_batch(payload: BatchAskRequest, request: Request) -> StreamingResponse:
+    settings = get_settings()
+    if len(payload.items) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=413, detail=f"at most {settings.batch_max_items} items per batch"
+        )
+    batch_id = request.headers.get("x-trace-id") or str(uuid.uuid4())
+    bind_trace_id(batch_id)
+
+    async def stream() -> AsyncIterator[str]:
+        # One JSON line per item, in completion order.
+        async for result in run_batch(payload, batch_id, settings, headers=request.headers):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(
+        stream(), media_type="application/x-ndjson", headers={"x-trace-id": batch_id}
+    )
+
+
+@app.post("/v1/tasks", status_code=202)
+async def submit_task(payload: AskRequest, request: Request) -> dict[str, Any]:
+    trace_id = request.headers.get("x-trace-id") or str(uuid.uuid4())
+    settings = get_settings()
+    lane, tenant = classify_request(payload.priority, payload.tenant, request.headers, settings)
+    try:
+        record = get_task_manager(settings).submit(payload, trace_id, lane=lane, tenant=tenant)
+    except TaskQueueFull as exc:
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": "1"}) from exc
+    return record.snapshot()
+
+
+@app.get("/v1/tasks/{task_id}")
+def get_task(task_id: str) -> dict[str, Any]:
+    return _get_task_record(task_id).snapshot()
+
+
+@app.post("/v1/tasks/{task_id}/cancel")
+def cancel_task(task_id: str) -> dict[str, Any]:
+    record = get_task_manager(get_settings()).cancel(task_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="task not found")
+    return record.snapshot()
+
+
+@app.get("/v1/tasks/{task_id}/events")
+def task_events(task_id: str) -> StreamingResponse:
+    record = _get_task_record(task_id)
+    manager = get_task_manager(get_settings())
+
+    async def stream() -> AsyncIterator[str]:
+        async for event in manager.events(record):
+            payload = json.dumps(event, ensure_ascii=False)
+            yield f"id: {event['seq']}\nevent: {event['event']}\ndata: {payload}\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+def _get_task_record(task_id: str) -> TaskRecord:
+    record = get_task_manager(get_settings()).get(task_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="task not found")
+    return record
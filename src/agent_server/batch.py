@@ -0,0 +1,125 @@
+"""Bulk asks for evaluation workloads (`POST /v1/ask:batch`).
+
+A batch runs its items on `concurrency` workers and yields one result per item
+as soon as it finishes (completion order, tagged with the item's index and
+id). Items default to the `batch` lane, so they pass admission and the LLM and
+tool pools behind interactive traffic; they wait for an admission slot rather
+than being rejected like an interactive request would be. Identical tool calls across the batch
+run once (`ToolMemo`); time-sensitive tools are excluded.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator, Mapping
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+from .admission import get_admission_limiter
+from .executor import AskRequest, handle_ask
+from .logging import get_logger
+from .scheduling import BATCH, classify_request, request_class
+from .settings import AgentSettings
+from .tool_broker import ToolMemo, tool_memo_var
+
+logger = get_logger("batch")
+
+
+class BatchItem(AskRequest):
+    # Caller's id for the item, echoed in its result (e.g. a JSONL row id).
+    id: str | None = None
+
+
+class BatchAskRequest(BaseModel):
+    items: list[BatchItem] = Field(..., min_length=1)
+    concurrency: int | None = Field(default=None, ge=1)
+
+
+async def run_batch(
+    request: BatchAskRequest,
+    batch_id: str,
+    settings: AgentSettings,
+    *,
+    headers: Mapping[str, str] | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """Run every item; yield each result as it completes."""
+    concurrency = min(request.concurrency or settings.batch_concurrency, settings.batch_concurrency)
+    memo = (
+        ToolMemo(settings.llm_cache_time_sensitive_tools)
+        if settings.batch_tool_memo_enabled
+        else None
+    )
+    pending = iter(enumerate(request.items))
+    results: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+
+    async def worker() -> None:
+        for index, item in pending:
+            results.put_nowait(
+                await _run_item(index, item, f"{batch_id}-{index}", settings, headers or {})
+            )
+
+    started = time.perf_counter()
+    # Workers copy the context at creation, so every ask in the batch sees the memo.
+    token = tool_memo_var.set(memo)
+    try:
+        workers = [
+            asyncio.create_task(worker()) for _ in range(min(concurrency, len(request.items)))
+        ]
+    finally:
+        tool_memo_var.reset(token)
+
+    ok = 0
+    try:
+        for _ in request.items:
+            result = await results.get()
+            ok += result["ok"]
+            yield result
+    finally:
+        # Also reached when the client stops reading: stop the remaining work.
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if memo is not None:
+            memo.close()
+        logger.info(
+            "ask_batch_done",
+            extra={
+                "extra": {
+                    "trace_id": batch_id,
+                    "items": len(request.items),
+                    "ok": ok,
+                    "concurrency": concurrency,
+                    "wall_ms": int((time.perf_counter() - started) * 1000),
+                    "tool_memo": memo.stats() if memo is not None else None,
+                }
+            },
+        )
+
+
+async def _run_item(
+    index: int,
+    item: BatchItem,
+    trace_id: str,
+    settings: AgentSettings,
+    headers: Mapping[str, str],
+) -> dict[str, Any]:
+    result: dict[str, Any] = {"index": index, "id": item.id, "trace_id": trace_id}
+    lane, tenant = classify_request(item.priority or BATCH, item.tenant, headers, settings)
+    limiter = get_admission_limiter(settings)
+    started = time.perf_counter()
+    try:
+        with request_class(lane, tenant):
+            if limiter is None:
+                response = await handle_ask(item, trace_id)
+            else:
+                # Already accepted as part of the batch: queue behind interactive traffic.
+                async with limiter.acquire(lane, tenant, wait=True) as admission:
+                    response = await handle_ask(item, trace_id, admission=admission.as_trace())
+    except Exception as exc:  # noqa: BLE001
+        result.update(ok=False, error=str(exc))
+    else:
+        result.update(ok=True, answer=response.answer, tool_calls=response.tool_calls)
+    result["latency_ms"] = int((time.perf_counter() - started) * 1000)
+    return result
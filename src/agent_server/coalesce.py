@@ -0,0 +1,136 @@
+"""Singleflight coalescing of identical concurrent `/v1/ask` queries.
+
+Requests without conversation context whose normalized query matches one that
+is already running for the same lane and tenant attach to that run (the
+leader) instead of starting their own. For a short window after the leader
+finishes, new identical requests reuse its answer as well, unless it used a
+tool whose output goes stale quickly. Followers keep their own trace_id; their trace links
+to the leader's. The shared run is cancelled only once every caller waiting
+for it has gone away.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+from .settings import AgentSettings
+
+_SPACE_RE = re.compile(r"\s+")
+_TRAILING_PUNCT = " ?？!！。.,，~～"
+
+
+def coalesce_key(query: str, *, lane: str = "", tenant: str = "") -> str:
+    """Key of a query; runs are shared only within one lane and tenant."""
+    normalized = _SPACE_RE.sub(" ", query.strip().lower()).rstrip(_TRAILING_PUNCT)
+    return f"{lane}\x1f{tenant}\x1f{normalized}"
+
+
+@dataclass
+class Shared:
+    value: Any
+    leader_trace_id: str
+    # "leader" for the request that ran, else "inflight" or "window".
+    source: str
+
+
+class Coalescer:
+    def __init__(self, *, window_s: float = 2.0, max_entries: int = 1024) -> None:
+        self.window_s = window_s
+        self.max_entries = max_entries
+        self._inflight: dict[str, tuple[str, asyncio.Task[Any]]] = {}
+        self._recent: OrderedDict[str, tuple[float, str, Any]] = OrderedDict()
+        self._waiters: dict[asyncio.Task[Any], int] = {}
+        self.leaders = 0
+        self.followers_inflight = 0
+        self.followers_window = 0
+
+    async def run(
+        self,
+        key: str,
+        trace_id: str,
+        fn: Callable[[], Awaitable[Any]],
+        *,
+        shareable: Callable[[Any], bool] = lambda _value: True,
+    ) -> Shared:
+        """Run `fn` once per key; concurrent callers with the same key share it.
+
+        `shareable` decides whether a finished result may be reused during
+        the post-completion window (e.g. not after tool errors).
+        """
+        recent = self._recent.get(key)
+        if recent is not None:
+            expires_at, leader_trace_id, value = recent
+            if expires_at > time.monotonic():
+                self.followers_window += 1
+                return Shared(value, leader_trace_id, "window")
+            del self._recent[key]
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            leader_trace_id, task = inflight
+            self.followers_inflight += 1
+            return Shared(await self._wait(task), leader_trace_id, "inflight")
+
+        self.leaders += 1
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = (trace_id, task)
+        task.add_done_callback(lambda done: self._settle(key, trace_id, done, shareable))
+        return Shared(await self._wait(task), trace_id, "leader")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "inflight": len(self._inflight),
+            "window_entries": len(self._recent),
+            "leaders": self.leaders,
+            "followers_inflight": self.followers_inflight,
+            "followers_window": self.followers_window,
+        }
+
+    async def _wait(self, task: asyncio.Task[Any]) -> Any:
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            # Shielded: one caller going away must not cancel the shared run.
+            return await asyncio.shield(task)
+        finally:
+            remaining = self._waiters.pop(task) - 1
+            if remaining:
+                self._waiters[task] = remaining
+            elif not task.done():
+                # Nobody is waiting for this run any more.
+                task.cancel()
+
+    def _settle(
+        self,
+        key: str,
+        trace_id: str,
+        task: asyncio.Task[Any],
+        shareable: Callable[[Any], bool],
+    ) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None or self.window_s <= 0:
+            return
+        value = task.result()
+        if not shareable(value):
+            return
+        self._recent[key] = (time.monotonic() + self.window_s, trace_id, value)
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.max_entries:
+            self._recent.popitem(last=False)
+
+
+@lru_cache(maxsize=4)
+def _shared_coalescer(window_ms: int) -> Coalescer:
+    return Coalescer(window_s=window_ms / 1000)
+
+
+def get_coalescer(settings: AgentSettings) -> Coalescer | None:
+    if not settings.coalesce_enabled:
+        return None
+    return _shared_coalescer(settings.coalesce_window_ms)
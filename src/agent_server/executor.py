@@ -5,18 +5,42 @@ Keep this layer thin so protocol changes do not affect core agent logic.
 
 from __future__ import annotations
 
+import asyncio
 import time
+from contextlib import AsyncExitStack
+from typing import Any
 
 from pydantic import BaseModel, Field
 
+from common.profiling import RequestProfiler
+
 from .agent import Agent
-from .settings import get_settings
-from .trace import build_trace, finalize_trace, record_final, write_trace
+from .coalesce import Shared, coalesce_key, get_coalescer
+from .logging import get_logger
+from .scheduling import request_class_var
+from .session import get_session_store
+from .settings import AgentSettings, get_settings
+from .tokens import estimate_messages_tokens
+from .trace import (
+    build_trace,
+    finalize_trace,
+    record_admission,
+    record_coalesced,
+    record_final,
+    record_profile,
+    write_profile,
+    write_trace,
+)
+
+logger = get_logger("executor")
 
 
 class AskRequest(BaseModel):
     query: str = Field(..., min_length=1)
     conversation_id: str | None = None
+    # Scheduling class; the x-tenant-id / x-priority headers are used when unset.
+    tenant: str | None = None
+    priority: str | None = None
 
 
 class AskResponse(BaseModel):
@@ -25,13 +49,124 @@ class AskResponse(BaseModel):
     tool_calls: list[dict] | None = None
 
 
-async def handle_ask(payload: AskRequest, trace_id: str) -> AskResponse:
-    # Construct agent per request for simplicity; can be cached later.
+async def handle_ask(
+    payload: AskRequest,
+    trace_id: str,
+    *,
+    profile: bool = False,
+    admission: dict[str, Any] | None = None,
+) -> AskResponse:
     settings = get_settings()
+    coalescer = get_coalescer(settings)
+    # Conversation turns depend on history and profiled runs must be real.
+    if coalescer is None or payload.conversation_id or profile:
+        return await _run_ask(payload, trace_id, settings, profile=profile, admission=admission)
+
+    lane, tenant = request_class_var.get()
+    shared = await coalescer.run(
+        coalesce_key(payload.query, lane=lane, tenant=tenant),
+        trace_id,
+        lambda: _run_ask(payload, trace_id, settings, admission=admission),
+        shareable=lambda response: _shareable(response, settings),
+    )
+    if shared.source == "leader":
+        return shared.value
+    return _follower_response(payload, trace_id, shared, settings, admission)
+
+
+def _shareable(response: AskResponse, settings: AgentSettings) -> bool:
+    """Whether later identical requests may reuse this answer after it finished."""
+    calls = response.tool_calls or []
+    # Same rule as the LLM cache: answers built on e.g. the current time go stale.
+    sensitive = set(settings.llm_cache_time_sensitive_tools)
+    return all(call.get("ok") and call.get("name") not in sensitive for call in calls)
+
+
+def _follower_response(
+    payload: AskRequest,
+    trace_id: str,
+    shared: Shared,
+    settings: AgentSettings,
+    admission: dict[str, Any] | None,
+) -> AskResponse:
+    leader: AskResponse = shared.value
+    started_at_ts = time.time()
+    trace = build_trace(trace_id, payload.query)
+    record_admission(trace, admission)
+    record_coalesced(trace, leader_trace_id=shared.leader_trace_id, source=shared.source)
+    record_final(trace, answer_text=leader.answer)
+    finalize_trace(trace, started_at_ts)
+    if settings.trace_enabled:
+        write_trace(trace, settings.trace_dir)
+    return AskResponse(answer=leader.answer, trace_id=trace_id, tool_calls=leader.tool_calls)
+
+
+async def _run_ask(
+    payload: AskRequest,
+    trace_id: str,
+    settings: AgentSettings,
+    *,
+    profile: bool = False,
+    admission: dict[str, Any] | None = None,
+) -> AskResponse:
+    # Construct agent per request for simplicity; can be cached later.
     agent = Agent(settings)
     started_at_ts = time.time()
     trace = build_trace(trace_id, payload.query)
-    state = await agent.run(payload.query, trace_id, trace)
+    record_admission(trace, admission)
+
+    profiler: RequestProfiler | None = None
+    if profile:
+        profiler = RequestProfiler(
+            top_n=settings.profile_top_n,
+            max_duration_s=settings.profile_max_duration_s,
+        )
+        if profiler.start():
+            # Marks the trace so the broker asks the tool server to profile too.
+            trace.profile = {"requested": True}
+    sessions = get_session_store(settings) if payload.conversation_id else None
+    try:
+        async with AsyncExitStack() as stack:
+            history = None
+            session = None
+            if sessions is not None and payload.conversation_id:
+                # Held for the whole turn: requests of one conversation run in order.
+                session = await stack.enter_async_context(sessions.open(payload.conversation_id))
+                history = session.history()
+                trace.request["conversation"] = {
+                    "conversation_id": payload.conversation_id,
+                    "history_messages": len(history),
+                    "history_tokens": estimate_messages_tokens(history),
+                }
+            state = await agent.run(payload.query, trace_id, trace, history=history)
+            if session is not None and sessions is not None:
+                sessions.record_turn(
+                    session,
+                    query=payload.query,
+                    answer=state.final_answer or "",
+                    messages=state.messages,
+                )
+    except asyncio.CancelledError:
+        # The caller went away: keep the work done so far in the trace, then stop.
+        trace.status = "cancelled"
+        finalize_trace(trace, started_at_ts)
+        if settings.trace_enabled:
+            write_trace(trace, settings.trace_dir)
+        logger.info(
+            "ask_cancelled",
+            extra={
+                "extra": {
+                    "trace_id": trace_id,
+                    "latency_ms": trace.latency_ms,
+                    "llm_calls": len(trace.llm),
+                    "tool_calls": len(trace.tools),
+                }
+            },
+        )
+        raise
+    finally:
+        if profiler is not None:
+            record_profile(trace, profiler.stop())
 
     tool_calls = [
         {
@@ -49,5 +184,7 @@ async def handle_ask(payload: AskRequest, trace_id: str) -> AskResponse:
     finalize_trace(trace, started_at_ts)
     if settings.trace_enabled:
         write_trace(trace, settings.trace_dir)
+        if profiler is not None and profiler.captured and settings.profile_write_file:
+            write_profile(profiler, trace, settings.trace_dir)
 
     return AskResponse(answer=answer, trace_id=trace_id, tool_calls=tool_calls)
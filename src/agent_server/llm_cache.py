@@ -0,0 +1,220 @@
+"""Exact-match cache for chat completion calls.
+
+The key is a stable hash of everything that determines the completion: model,
+temperature, tool catalog version (`tool_catalog.py`), tool_choice and the
+normalized message list (whitespace trimmed, tool-call ids renumbered,
+arguments re-encoded with sorted keys). Entries expire after a per-call-kind
+TTL and are evicted LRU once `max_entries` is reached; an optional directory
+acts as a second, persistent tier shared across restarts.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+from .logging import get_logger
+from .settings import AgentSettings
+
+logger = get_logger("llm_cache")
+
+
+class CompletionCache:
+    def __init__(self, *, max_entries: int = 1024, disk_dir: str | None = None) -> None:
+        self.max_entries = max_entries
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return payload
+                del self._entries[key]
+
+        entry = self._read_disk(key, now)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, entry)
+        return entry[1]
+
+    def put(self, key: str, payload: dict[str, Any], ttl_s: float) -> None:
+        entry = (time.time() + ttl_s, payload)
+        with self._lock:
+            self._store(key, entry)
+        self._write_disk(key, entry)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "disk_dir": str(self.disk_dir) if self.disk_dir else None,
+        }
+
+    def _store(self, key: str, entry: tuple[float, dict[str, Any]]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _read_disk(self, key: str, now: float) -> tuple[float, dict[str, Any]] | None:
+        if self.disk_dir is None:
+            return None
+        path = self.disk_dir / f"{key}.json"
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if raw.get("expires_at", 0) <= now:
+            path.unlink(missing_ok=True)
+            return None
+        return raw["expires_at"], raw["payload"]
+
+    def _write_disk(self, key: str, entry: tuple[float, dict[str, Any]]) -> None:
+        if self.disk_dir is None:
+            return
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            tmp = self.disk_dir / f"{key}.json.tmp"
+            tmp.write_text(
+                json.dumps({"expires_at": entry[0], "payload": entry[1]}, ensure_ascii=False),
+                encoding="utf-8",
+            )
+            tmp.replace(self.disk_dir / f"{key}.json")
+        except OSError as exc:
+            logger.info("llm_cache_disk_error", extra={"extra": {"error": str(exc)}})
+
+
+@lru_cache(maxsize=4)
+def _shared_cache(max_entries: int, disk_dir: str | None) -> CompletionCache:
+    return CompletionCache(max_entries=max_entries, disk_dir=disk_dir)
+
+
+def get_completion_cache(settings: AgentSettings) -> CompletionCache | None:
+    """Process-wide cache instance (agents are built per request)."""
+    if not settings.llm_cache_enabled:
+        return None
+    return _shared_cache(settings.llm_cache_max_entries, settings.llm_cache_dir)
+
+
+def completion_cache_key(
+    *,
+    model: str,
+    temperature: float,
+    tools_version: str,
+    tool_choice: Any,
+    messages: list[dict[str, Any]],
+) -> str:
+    material = {
+        "model": model,
+        "temperature": temperature,
+        "tools_version": tools_version,
+        "tool_choice": tool_choice,
+        "messages": normalize_messages(messages),
+    }
+    encoded = json.dumps(material, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def normalize_messages(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Drop per-request noise (random tool-call ids, whitespace, key order)."""
+    call_ids: dict[str, str] = {}
+    normalized: list[dict[str, Any]] = []
+    for msg in messages:
+        item: dict[str, Any] = {"role": msg.get("role")}
+        content = msg.get("content")
+        item["content"] = content.strip() if isinstance(content, str) else content
+        if msg.get("name"):
+            item["name"] = msg["name"]
+        if msg.get("tool_calls"):
+            calls = []
+            for call in msg["tool_calls"]:
+                call_ids.setdefault(call.get("id", ""), f"call_{len(call_ids) + 1}")
+                function = call.get("function", {})
+                calls.append(
+                    {
+                        "id": call_ids[call.get("id", "")],
+                        "name": function.get("name"),
+                        "arguments": _canonical_arguments(function.get("arguments")),
+                    }
+                )
+            item["tool_calls"] = calls
+        if msg.get("tool_call_id"):
+            item["tool_call_id"] = call_ids.get(msg["tool_call_id"], msg["tool_call_id"])
+        normalized.append(item)
+    return normalized
+
+
+def has_time_sensitive_output(messages: list[dict[str, Any]], tool_names: list[str]) -> bool:
+    """True when a tool whose output goes stale quickly fed into the prompt."""
+    sensitive = set(tool_names)
+    return any(msg.get("role") == "tool" and msg.get("name") in sensitive for msg in messages)
+
+
+def serialize_completion(response: Any) -> dict[str, Any]:
+    choice = response.choices[0]
+    message = choice.message
+    return {
+        "content": message.content,
+        "finish_reason": choice.finish_reason,
+        "tool_calls": [
+            {
+                "id": call.id,
+                "name": call.function.name,
+                "arguments": call.function.arguments,
+            }
+            for call in (message.tool_calls or [])
+        ],
+    }
+
+
+def deserialize_completion(payload: dict[str, Any]) -> Any:
+    """Rebuild the attribute shape the agent reads from an OpenAI response."""
+    tool_calls = [
+        SimpleNamespace(
+            id=call["id"],
+            type="function",
+            function=SimpleNamespace(name=call["name"], arguments=call["arguments"]),
+        )
+        for call in payload.get("tool_calls", [])
+    ]
+    message = SimpleNamespace(content=payload.get("content"), tool_calls=tool_calls or None)
+    choice = SimpleNamespace(message=message, finish_reason=payload.get("finish_reason"))
+    return SimpleNamespace(choices=[choice])
+
+
+def _canonical_arguments(arguments: Any) -> Any:
+    if not isinstance(arguments, str):
+        return arguments
+    try:
+        return json.dumps(json.loads(arguments or "{}"), sort_keys=True, ensure_ascii=False)
+    except ValueError:
+        return arguments
@@ -1,33 +1,27 @@
-"""Structured logging helpers for agent server."""
-
-from __future__ import annotations
-
-import json
-import logging
-import sys
-from typing import Any
+"""Structured logging helpers for agent server.
 
+The implementation is shared with the tool server (see `common.logging`); this
+module keeps the service-local import path stable.
+"""
 
-class JsonFormatter(logging.Formatter):
-    def format(self, record: logging.LogRecord) -> str:
-        payload: dict[str, Any] = {
-            "level": record.levelname,
-            "name": record.name,
-            "message": record.getMessage(),
-        }
-        if hasattr(record, "extra") and isinstance(record.extra, dict):
-            payload.update(record.extra)
-        return json.dumps(payload, ensure_ascii=False)
-
+from __future__ import annotations
 
-def get_logger(name: str) -> logging.Logger:
-    logger = logging.getLogger(name)
-    if logger.handlers:
-        return logger
+from common.logging import (
+    JsonFormatter,
+    configure_from_settings,
+    configure_logging,
+    flush_logs,
+    get_logger,
+    logging_stats,
+    set_log_level,
+)
 
-    logger.setLevel(logging.INFO)
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setFormatter(JsonFormatter())
-    logger.addHandler(handler)
-    logger.propagate = False
-    return logger
+__all__ = [
+    "JsonFormatter",
+    "configure_from_settings",
+    "configure_logging",
+    "flush_logs",
+    "get_logger",
+    "logging_stats",
+    "set_log_level",
+]
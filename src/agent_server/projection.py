@@ -0,0 +1,93 @@
+"""Compact "LLM view" of tool outputs.
+
+Tool messages are re-sent on every later planner turn and on the responder
+call, so their size multiplies. Before a result enters the prompt it is
+projected through the tool's `LlmView` (field whitelist, top-k list items,
+rounded coordinates), encoded as compact JSON and, if still too large, shrunk
+to fit a per-message token budget. The full output stays in the trace and in
+`ToolCallRecord`.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from common.tool_contract import LlmView
+
+from .tokens import estimate_tokens
+from .tool_catalog import get_tool_catalog
+
+_COORD_KEYS = frozenset({"lat", "lon", "latitude", "longitude"})
+
+
+def project_tool_output(tool_name: str, data: Any) -> Any:
+    tool = get_tool_catalog().get(tool_name)
+    if tool is None or tool.llm_view is None or not isinstance(data, dict):
+        return data
+    return _apply_view(tool.llm_view, data)
+
+
+def encode_tool_message(tool_name: str, payload: Any, max_tokens: int | None = None) -> str:
+    """Projected, compact JSON for a tool message, kept within `max_tokens`."""
+    projected = project_tool_output(tool_name, payload)
+    text = _dumps(projected)
+    if not max_tokens or estimate_tokens(text) <= max_tokens:
+        return text
+
+    tool = get_tool_catalog().get(tool_name)
+    list_field = tool.llm_view.list_field if tool and tool.llm_view else None
+    if list_field and isinstance(projected, dict) and isinstance(projected.get(list_field), list):
+        items = projected[list_field]
+        total = _total_items(payload, list_field, len(items))
+        keep = len(items)
+        while keep > 1:
+            keep //= 2
+            shrunk = {**projected, list_field: items[:keep], "truncated": {list_field: total}}
+            text = _dumps(shrunk)
+            if estimate_tokens(text) <= max_tokens:
+                return text
+
+    # Still too big: keep a valid JSON object with a bounded preview.
+    return _dumps({"truncated": True, "preview": text[: max_tokens * 2]})
+
+
+def _apply_view(view: LlmView, data: dict[str, Any]) -> dict[str, Any]:
+    keys = view.fields if view.fields is not None else tuple(data)
+    projected: dict[str, Any] = {}
+    for key in keys:
+        value = data.get(key)
+        if value is None:
+            continue
+        if key == view.list_field and isinstance(value, list):
+            items = value[: view.top_k] if view.top_k else value
+            value = [_project_item(view, item) for item in items]
+        projected[key] = _round_coord(view, key, value)
+    if view.list_field and isinstance(data.get(view.list_field), list):
+        total = len(data[view.list_field])
+        if view.top_k and total > view.top_k:
+            projected["total"] = total
+    return projected
+
+
+def _project_item(view: LlmView, item: Any) -> Any:
+    if not isinstance(item, dict):
+        return item
+    keys = view.item_fields if view.item_fields is not None else tuple(item)
+    return {key: _round_coord(view, key, item[key]) for key in keys if item.get(key) is not None}
+
+
+def _round_coord(view: LlmView, key: str, value: Any) -> Any:
+    if view.coord_decimals is not None and key in _COORD_KEYS and isinstance(value, float):
+        return round(value, view.coord_decimals)
+    return value
+
+
+def _total_items(payload: Any, list_field: str, default: int) -> int:
+    if isinstance(payload, dict) and isinstance(payload.get(list_field), list):
+        return len(payload[list_field])
+    return default
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
@@ -14,7 +14,9 @@ PLANNER_SYSTEM = (
     "When calling `poi`, include a useful keyword (e.g. 景点/博物馆/餐厅). "
     "4) If location is unclear, ask a short clarification instead of guessing. "
     "5) You may call multiple tools in sequence; after tool results, "
-    "decide if more tools are needed."
+    "decide if more tools are needed. "
+    "6) In a follow-up question, reuse tool results already present in the conversation "
+    "instead of calling the same tool again, unless the data may have changed (e.g. time)."
 )
 
 RESPONDER_SYSTEM = (
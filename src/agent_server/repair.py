@@ -0,0 +1,96 @@
+"""Deterministic repair of tool arguments that failed validation.
+
+Most INVALID_ARGUMENT failures are mechanical: the planner forgot the location
+(`city` or `lat`/`lon`) that is plainly in the user query, or picked a number
+outside the allowed range. Fixing those locally and re-validating against the
+tool's input model is much cheaper than another planner LLM round trip.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from pydantic import ValidationError
+
+from .router import extract_city
+from .tool_catalog import get_tool_catalog
+
+_MAX_ROUNDS = 3
+
+
+@dataclass
+class RepairResult:
+    arguments: dict[str, Any] | None
+    reason: str
+    fixes: list[str]
+
+
+def repair_tool_args(tool_name: str, args: dict[str, Any], query: str) -> RepairResult:
+    tool = get_tool_catalog().get(tool_name)
+    if tool is None:
+        return RepairResult(None, "unknown_tool", [])
+
+    fields = tool.input_model.model_fields
+    candidate = dict(args)
+    fixes: list[str] = []
+    for _ in range(_MAX_ROUNDS):
+        try:
+            tool.input_model.model_validate(candidate)
+        except ValidationError as exc:
+            changed = _apply_fixes(candidate, exc, fields, query, fixes)
+            if not changed:
+                return RepairResult(None, "unrepairable", fixes)
+            continue
+        if not fixes:
+            # Valid as given: the failure was not about argument shape.
+            return RepairResult(None, "already_valid", fixes)
+        return RepairResult(candidate, "repaired", fixes)
+    return RepairResult(None, "unrepairable", fixes)
+
+
+def _apply_fixes(
+    candidate: dict[str, Any],
+    exc: ValidationError,
+    fields: dict[str, Any],
+    query: str,
+    fixes: list[str],
+) -> bool:
+    changed = False
+    for error in exc.errors():
+        loc = error.get("loc") or ()
+        ctx = error.get("ctx") or {}
+        if loc and loc[0] in candidate:
+            name = loc[0]
+            if error["type"] in {"less_than_equal", "less_than"} and "le" in ctx:
+                candidate[name] = ctx["le"]
+            elif error["type"] == "less_than" and "lt" in ctx:
+                candidate[name] = ctx["lt"] - 1
+            elif error["type"] in {"greater_than_equal", "greater_than"} and "ge" in ctx:
+                candidate[name] = ctx["ge"]
+            elif error["type"] == "greater_than" and "gt" in ctx:
+                candidate[name] = ctx["gt"] + 1
+            elif name in fields and not fields[name].is_required():
+                # Optional field with a bad value: fall back to its default.
+                del candidate[name]
+            else:
+                continue
+            fixes.append(f"{error['type']}:{name}")
+            changed = True
+        elif not loc and "city" in fields and _missing_location(candidate):
+            city = extract_city(query)
+            if not city:
+                continue
+            # A half-specified coordinate pair is worse than none.
+            candidate.pop("lat", None)
+            candidate.pop("lon", None)
+            candidate["city"] = city
+            fixes.append("city_from_query")
+            changed = True
+    return changed
+
+
+def _missing_location(candidate: dict[str, Any]) -> bool:
+    has_city = bool(str(candidate.get("city") or "").strip())
+    has_coords = candidate.get("lat") is not None and candidate.get("lon") is not None
+    return not (has_city or has_coords)
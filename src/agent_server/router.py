@@ -0,0 +1,172 @@
+"""Deterministic intent router for simple queries.
+
+Scores a query against a few regex intents (time / weather / POI) and extracts
+the city, so unambiguous requests can call one tool directly instead of paying
+for a planner LLM round trip. Anything that looks compound, relative in time or
+under-specified gets a low confidence and goes through the normal planner loop.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+CITY_NAMES = (
+    "北京",
+    "上海",
+    "广州",
+    "深圳",
+    "杭州",
+    "成都",
+    "西安",
+    "重庆",
+    "南京",
+    "武汉",
+    "天津",
+    "苏州",
+    "长沙",
+    "厦门",
+    "青岛",
+)
+CITY_NAMES_EN = (
+    "Beijing",
+    "Shanghai",
+    "Guangzhou",
+    "Shenzhen",
+    "Hangzhou",
+    "Chengdu",
+    "Chongqing",
+    "Nanjing",
+    "Wuhan",
+)
+
+_CITY_RE = re.compile("|".join(CITY_NAMES))
+_CITY_EN_RE = re.compile(r"\b(" + "|".join(CITY_NAMES_EN) + r")\b", re.IGNORECASE)
+
+_INTENT_PATTERNS: dict[str, re.Pattern[str]] = {
+    "time": re.compile(r"几点|时间|日期|几号|星期几|\btime\b|\bdate\b", re.IGNORECASE),
+    "weather": re.compile(r"天气|气温|温度|下雨|下雪|weather|temperature", re.IGNORECASE),
+    "poi": re.compile(
+        r"附近|周边|景点|餐厅|好吃|美食|博物馆|咖啡|\bpoi\b|nearby|restaurant",
+        re.IGNORECASE,
+    ),
+}
+# Requests the single-tool templates cannot answer well.
+_COMPLEX_RE = re.compile(
+    r"行程|安排|计划|规划|攻略|比较|还是|明天|后天|周末|下周|未来|预报|为什么|"
+    r"itinerary|plan|tomorrow|forecast|compare",
+    re.IGNORECASE,
+)
+_TIMEZONE_HINT_RE = re.compile(
+    r"时区|timezone|utc|gmt|纽约|伦敦|东京|巴黎|洛杉矶|悉尼", re.IGNORECASE
+)
+_POI_KEYWORDS = (
+    ("博物馆", "博物馆"),
+    ("咖啡", "咖啡"),
+    ("好吃", "餐厅"),
+    ("美食", "餐厅"),
+    ("餐厅", "餐厅"),
+    ("酒店", "酒店"),
+    ("公园", "公园"),
+    ("景点", "景点"),
+)
+_LONG_QUERY_CHARS = 40
+
+
+@dataclass
+class IntentDecision:
+    intent: str | None
+    confidence: float
+    tool_name: str | None = None
+    arguments: dict[str, Any] = field(default_factory=dict)
+    city: str | None = None
+    reasons: list[str] = field(default_factory=list)
+
+    def as_trace(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def extract_city(text: str) -> str | None:
+    match = _CITY_RE.search(text)
+    if match:
+        return match.group(0)
+    match = _CITY_EN_RE.search(text)
+    return match.group(1).title() if match else None
+
+
+def classify_intent(query: str) -> IntentDecision:
+    matched = [name for name, pattern in _INTENT_PATTERNS.items() if pattern.search(query)]
+    city = extract_city(query)
+    if not matched:
+        return IntentDecision(intent=None, confidence=0.0, city=city, reasons=["no_intent"])
+
+    intent = matched[0]
+    confidence = 1.0
+    reasons: list[str] = []
+    if len(matched) > 1:
+        confidence -= 0.6
+        reasons.append("multiple_intents")
+    if _COMPLEX_RE.search(query):
+        confidence -= 0.5
+        reasons.append("complex_request")
+    if len(query) > _LONG_QUERY_CHARS:
+        confidence -= 0.2
+        reasons.append("long_query")
+
+    arguments: dict[str, Any] = {}
+    if intent == "time":
+        if _TIMEZONE_HINT_RE.search(query):
+            # The time tool needs an IANA zone we cannot infer reliably here.
+            confidence -= 0.5
+            reasons.append("timezone_hint")
+    else:
+        if city:
+            arguments["city"] = city
+        else:
+            confidence -= 0.8
+            reasons.append("missing_city")
+        if intent == "poi":
+            keyword = _poi_keyword(query)
+            if keyword is None:
+                keyword = "景点"
+                confidence -= 0.2
+                reasons.append("default_keyword")
+            arguments["keyword"] = keyword
+
+    return IntentDecision(
+        intent=intent,
+        confidence=round(max(confidence, 0.0), 2),
+        tool_name=intent,
+        arguments=arguments,
+        city=city,
+        reasons=reasons,
+    )
+
+
+def render_answer(tool_name: str, payload: dict[str, Any]) -> str:
+    """Template answer for a single successful tool call."""
+    if tool_name == "time":
+        return f"当前时间：{payload.get('iso')} ({payload.get('timezone')})"
+    if tool_name == "weather":
+        city_name = payload.get("city") or "目标城市"
+        answer = (
+            f"{city_name}天气：{payload.get('description')}，温度 {payload.get('temperature_c')}°C"
+        )
+        if payload.get("feels_like_c") is not None:
+            answer += f"，体感 {payload['feels_like_c']}°C"
+        if payload.get("humidity") is not None:
+            answer += f"，湿度 {payload['humidity']}%"
+        return answer
+    items = payload.get("items", [])
+    if not items:
+        return "附近推荐：暂无结果"
+    names = "、".join(item["name"] for item in items[:3])
+    return f"附近推荐：{names}"
+
+
+def _poi_keyword(query: str) -> str | None:
+    for marker, keyword in _POI_KEYWORDS:
+        if marker in query:
+            return keyword
+    return None
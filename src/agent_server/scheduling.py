@@ -0,0 +1,303 @@
+"""Priority lanes and weighted fair scheduling of shared capacity.
+
+Every request is classified into a lane (`interactive`, `batch`, ...) and a
+tenant. A `FairScheduler` hands out a fixed number of slots:
+
+- waiters queue per lane; when a slot frees up, the lane with the lowest
+  virtual pass value goes next and its pass grows by `1 / weight` (stride
+  scheduling), so lanes share capacity in proportion to their weights;
+- a tenant never holds more than `tenant_max_share` of the capacity;
+- a share of the capacity is reserved for the interactive lane, so batch
+  floods cannot take every slot.
+
+One scheduler guards `/v1/ask` admission (through `AdaptiveLimiter`), and two
+more bound LLM and tool concurrency inside `Agent.run`. The request's lane and
+tenant travel in a context variable, so speculative tasks inherit them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Iterator, Mapping
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+from .settings import AgentSettings
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+TENANT_HEADER = "x-tenant-id"
+PRIORITY_HEADER = "x-priority"
+DEFAULT_TENANT = "default"
+
+_WAIT_WINDOW = 512
+
+request_class_var: ContextVar[tuple[str, str]] = ContextVar(
+    "request_class", default=(INTERACTIVE, DEFAULT_TENANT)
+)
+
+
+class QueueFull(Exception):
+    pass
+
+
+def classify_request(
+    priority: str | None,
+    tenant: str | None,
+    headers: Mapping[str, str],
+    settings: AgentSettings,
+) -> tuple[str, str]:
+    """(lane, tenant) for a request; explicit fields win over headers."""
+    lane = priority or headers.get(PRIORITY_HEADER) or settings.scheduler_default_lane
+    if lane not in settings.scheduler_lane_weights:
+        lane = settings.scheduler_default_lane
+    return lane, tenant or headers.get(TENANT_HEADER) or DEFAULT_TENANT
+
+
+@contextmanager
+def request_class(lane: str, tenant: str) -> Iterator[None]:
+    token = request_class_var.set((lane, tenant))
+    try:
+        yield
+    finally:
+        request_class_var.reset(token)
+
+
+@dataclass
+class _Waiter:
+    tenant: str
+    future: asyncio.Future[None]
+    enqueued_at: float
+    wait_ms: int = 0
+
+
+@dataclass
+class _Lane:
+    weight: int
+    waiters: deque[_Waiter] = field(default_factory=deque)
+    pass_value: float = 0.0
+    inflight: int = 0
+    granted: int = 0
+    rejected: int = 0
+    waits_ms: deque[int] = field(default_factory=lambda: deque(maxlen=_WAIT_WINDOW))
+
+
+class FairScheduler:
+    def __init__(
+        self,
+        *,
+        capacity: int,
+        weights: Mapping[str, int],
+        tenant_max_share: float = 1.0,
+        reserved_interactive_share: float = 0.0,
+        max_queue: int | None = None,
+    ) -> None:
+        self.capacity = capacity
+        self.tenant_max_share = tenant_max_share
+        self.reserved_interactive_share = reserved_interactive_share
+        self.max_queue = max_queue
+        self._lanes: dict[str, _Lane] = {
+            name: _Lane(weight=max(weight, 1)) for name, weight in weights.items()
+        }
+        self._tenants: dict[str, int] = {}
+        self._inflight = 0
+        self._vtime = 0.0
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    @property
+    def queued(self) -> int:
+        return sum(len(lane.waiters) for lane in self._lanes.values())
+
+    def set_capacity(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._dispatch()
+
+    async def acquire(
+        self, lane: str, tenant: str, timeout: float | None = None, *, bounded: bool = True
+    ) -> int:
+        """Wait for a slot; returns the queue wait in ms.
+
+        Raises QueueFull when the queue is at `max_queue` (unless not
+        `bounded`) and asyncio.TimeoutError when no slot frees up within
+        `timeout`.
+        """
+        state = self._lane(lane)
+        if not self.queued and self._eligible(lane, tenant):
+            self._grant(lane, state, tenant, 0)
+            return 0
+        if bounded and self.max_queue is not None and self.queued >= self.max_queue:
+            state.rejected += 1
+            raise QueueFull(lane)
+
+        if not state.waiters:
+            # An idle lane does not get to catch up on the time it was idle.
+            state.pass_value = max(state.pass_value, self._vtime)
+        waiter = _Waiter(tenant, asyncio.get_running_loop().create_future(), time.perf_counter())
+        state.waiters.append(waiter)
+        self._dispatch()
+        try:
+            await asyncio.wait_for(waiter.future, timeout)
+        except BaseException:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # The slot was handed over just as we gave up: pass it on.
+                self.release(lane, tenant)
+            else:
+                waiter.future.cancel()
+                _discard(state.waiters, waiter)
+            raise
+        return waiter.wait_ms
+
+    def release(self, lane: str, tenant: str) -> None:
+        state = self._lane(lane)
+        state.inflight -= 1
+        self._inflight -= 1
+        remaining = self._tenants.get(tenant, 1) - 1
+        if remaining > 0:
+            self._tenants[tenant] = remaining
+        else:
+            self._tenants.pop(tenant, None)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, lane: str | None = None, tenant: str | None = None) -> AsyncIterator[int]:
+        """Hold one slot; lane and tenant default to the current request's."""
+        current_lane, current_tenant = request_class_var.get()
+        lane = lane or current_lane
+        tenant = tenant or current_tenant
+        wait_ms = await self.acquire(lane, tenant)
+        try:
+            yield wait_ms
+        finally:
+            self.release(lane, tenant)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "inflight": self._inflight,
+            "queued": self.queued,
+            "lanes": {
+                name: {
+                    "weight": lane.weight,
+                    "queued": len(lane.waiters),
+                    "inflight": lane.inflight,
+                    "granted": lane.granted,
+                    "rejected": lane.rejected,
+                    "wait_ms_p50": _percentile(sorted(lane.waits_ms), 0.5),
+                    "wait_ms_p99": _percentile(sorted(lane.waits_ms), 0.99),
+                }
+                for name, lane in self._lanes.items()
+            },
+        }
+
+    def _lane(self, name: str) -> _Lane:
+        lane = self._lanes.get(name)
+        if lane is None:
+            lane = self._lanes[name] = _Lane(weight=1)
+        return lane
+
+    def _tenant_cap(self) -> int:
+        return max(1, math.ceil(self.capacity * self.tenant_max_share))
+
+    def _eligible(self, lane: str, tenant: str) -> bool:
+        if self._inflight >= self.capacity:
+            return False
+        if self._tenants.get(tenant, 0) >= self._tenant_cap():
+            return False
+        if lane != INTERACTIVE:
+            reserved = math.floor(self.capacity * self.reserved_interactive_share)
+            return self._inflight < self.capacity - reserved
+        return True
+
+    def _dispatch(self) -> None:
+        while self._inflight < self.capacity:
+            best: tuple[str, _Lane, _Waiter] | None = None
+            for name, lane in self._lanes.items():
+                waiter = self._next_waiter(name, lane)
+                if waiter is None:
+                    continue
+                if best is None or lane.pass_value < best[1].pass_value:
+                    best = (name, lane, waiter)
+            if best is None:
+                return
+            name, lane, waiter = best
+            lane.waiters.remove(waiter)
+            waiter.wait_ms = int((time.perf_counter() - waiter.enqueued_at) * 1000)
+            self._grant(name, lane, waiter.tenant, waiter.wait_ms)
+            waiter.future.set_result(None)
+
+    def _next_waiter(self, name: str, lane: _Lane) -> _Waiter | None:
+        for waiter in list(lane.waiters):
+            if waiter.future.done():
+                lane.waiters.remove(waiter)
+                continue
+            # Skip tenants at their cap so they do not block others in the lane.
+            if self._eligible(name, waiter.tenant):
+                return waiter
+        return None
+
+    def _grant(self, name: str, lane: _Lane, tenant: str, wait_ms: int) -> None:
+        self._vtime = lane.pass_value
+        lane.pass_value += 1 / lane.weight
+        lane.inflight += 1
+        lane.granted += 1
+        lane.waits_ms.append(wait_ms)
+        self._inflight += 1
+        self._tenants[tenant] = self._tenants.get(tenant, 0) + 1
+
+
+def _discard(waiters: deque[_Waiter], waiter: _Waiter) -> None:
+    try:
+        waiters.remove(waiter)
+    except ValueError:
+        pass
+
+
+def _percentile(values: list[int], q: float) -> int | None:
+    if not values:
+        return None
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+@lru_cache(maxsize=8)
+def _shared_pool(
+    capacity: int,
+    weights: tuple[tuple[str, int], ...],
+    tenant_max_share: float,
+    reserved_interactive_share: float,
+    kind: str,
+) -> FairScheduler:
+    return FairScheduler(
+        capacity=capacity,
+        weights=dict(weights),
+        tenant_max_share=tenant_max_share,
+        reserved_interactive_share=reserved_interactive_share,
+    )
+
+
+def get_llm_pool(settings: AgentSettings) -> FairScheduler:
+    return _shared_pool(
+        settings.llm_max_concurrency,
+        tuple(settings.scheduler_lane_weights.items()),
+        settings.scheduler_tenant_max_share,
+        settings.scheduler_reserved_interactive_share,
+        "llm",
+    )
+
+
+def get_tool_pool(settings: AgentSettings) -> FairScheduler:
+    return _shared_pool(
+        settings.tool_max_concurrency,
+        tuple(settings.scheduler_lane_weights.items()),
+        settings.scheduler_tenant_max_share,
+        settings.scheduler_reserved_interactive_share,
+        "tools",
+    )
@@ -0,0 +1,286 @@
+"""Conversation sessions keyed by `conversation_id`.
+
+A session keeps the message history of earlier turns (user query, tool calls,
+tool observations, final answer) so follow-up questions can reuse what was
+already fetched instead of re-planning and re-calling tools. History is kept
+within a token budget: large tool payloads of older turns are replaced by
+short stubs first, then the oldest turns are folded into a one-line summary.
+
+Sessions live in memory with an idle TTL and an LRU bound, optionally backed
+by one JSON file per conversation. Requests for the same conversation are
+serialized by a per-session lock so turns never interleave.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from .logging import get_logger
+from .settings import AgentSettings
+from .tokens import estimate_message_tokens, estimate_tokens
+
+logger = get_logger("session")
+
+_SUMMARY_LINE_CHARS = 80
+_MAX_SUMMARY_LINES = 10
+
+
+@dataclass
+class Turn:
+    query: str
+    answer: str
+    messages: list[dict[str, Any]]
+
+
+@dataclass
+class Session:
+    conversation_id: str
+    turns: list[Turn] = field(default_factory=list)
+    summary: list[str] = field(default_factory=list)
+    updated_at: float = field(default_factory=time.time)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    def history(self) -> list[dict[str, Any]]:
+        """Messages to place between the system prompt and the new user query."""
+        messages: list[dict[str, Any]] = []
+        if self.summary:
+            messages.append(
+                {
+                    "role": "system",
+                    "content": "Earlier in this conversation: " + " | ".join(self.summary),
+                }
+            )
+        for turn in self.turns:
+            messages.extend(turn.messages)
+        return messages
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "conversation_id": self.conversation_id,
+            "turns": [
+                {"query": t.query, "answer": t.answer, "messages": t.messages} for t in self.turns
+            ],
+            "summary": self.summary,
+            "updated_at": self.updated_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Session:
+        return cls(
+            conversation_id=data["conversation_id"],
+            turns=[Turn(**turn) for turn in data.get("turns", [])],
+            summary=list(data.get("summary", [])),
+            updated_at=data.get("updated_at", time.time()),
+        )
+
+
+class SessionStore:
+    def __init__(
+        self,
+        *,
+        ttl_s: float = 1800.0,
+        max_sessions: int = 1000,
+        max_turns: int = 20,
+        token_budget: int = 2000,
+        tool_payload_max_tokens: int = 256,
+        disk_dir: str | None = None,
+    ) -> None:
+        self.ttl_s = ttl_s
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.tool_payload_max_tokens = tool_payload_max_tokens
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self.compactions = 0
+        self.expired = 0
+
+    @asynccontextmanager
+    async def open(self, conversation_id: str) -> AsyncIterator[Session]:
+        """Hold the conversation exclusively for one request."""
+        self._purge_expired()
+        session = self._sessions.get(conversation_id)
+        fresh = session is None
+        if session is None:
+            # Register before any await so concurrent requests share one lock.
+            session = Session(conversation_id)
+            self._sessions[conversation_id] = session
+            self._evict_overflow()
+        self._sessions.move_to_end(conversation_id)
+
+        async with session.lock:
+            if fresh:
+                await self._restore(session)
+            try:
+                yield session
+            finally:
+                session.updated_at = time.time()
+                await self._save(session)
+
+    def record_turn(
+        self,
+        session: Session,
+        *,
+        query: str,
+        answer: str,
+        messages: list[dict[str, Any]],
+    ) -> None:
+        session.turns.append(Turn(query=query, answer=answer, messages=messages))
+        self.compact(session)
+
+    def compact(self, session: Session) -> None:
+        compacted = False
+        # 1) Older turns keep only stubs of large tool payloads.
+        for turn in session.turns[:-1]:
+            for message in turn.messages:
+                if message.get("role") == "tool" and self._is_large(message):
+                    message["content"] = _stub_tool_payload(message)
+                    compacted = True
+
+        # 2) Fold the oldest turns into the summary until within budget.
+        while len(session.turns) > 1 and (
+            len(session.turns) > self.max_turns or self._tokens(session) > self.token_budget
+        ):
+            oldest = session.turns.pop(0)
+            session.summary.append(_summary_line(oldest))
+            compacted = True
+        del session.summary[:-_MAX_SUMMARY_LINES]
+        if compacted:
+            self.compactions += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "compactions": self.compactions,
+            "expired": self.expired,
+            "disk_dir": str(self.disk_dir) if self.disk_dir else None,
+        }
+
+    def _tokens(self, session: Session) -> int:
+        return sum(estimate_message_tokens(message) for message in session.history())
+
+    def _is_large(self, message: dict[str, Any]) -> bool:
+        return estimate_tokens(str(message.get("content") or "")) > self.tool_payload_max_tokens
+
+    def _purge_expired(self) -> None:
+        deadline = time.time() - self.ttl_s
+        for conversation_id, session in list(self._sessions.items()):
+            if session.updated_at < deadline and not session.lock.locked():
+                del self._sessions[conversation_id]
+                self._delete_file(conversation_id)
+                self.expired += 1
+
+    def _evict_overflow(self) -> None:
+        # Evicted sessions stay on disk (if enabled) and reload on next use.
+        for conversation_id in list(self._sessions):
+            if len(self._sessions) <= self.max_sessions:
+                break
+            if not self._sessions[conversation_id].lock.locked():
+                del self._sessions[conversation_id]
+
+    def _path(self, conversation_id: str) -> Path | None:
+        if self.disk_dir is None:
+            return None
+        digest = hashlib.sha256(conversation_id.encode("utf-8")).hexdigest()[:32]
+        return self.disk_dir / f"{digest}.json"
+
+    async def _restore(self, session: Session) -> None:
+        path = self._path(session.conversation_id)
+        if path is None:
+            return
+        try:
+            raw = await asyncio.to_thread(path.read_text, encoding="utf-8")
+            stored = Session.from_dict(json.loads(raw))
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        if stored.updated_at < time.time() - self.ttl_s:
+            self._delete_file(session.conversation_id)
+            return
+        session.turns = stored.turns
+        session.summary = stored.summary
+
+    async def _save(self, session: Session) -> None:
+        path = self._path(session.conversation_id)
+        if path is None:
+            return
+        payload = json.dumps(session.to_dict(), ensure_ascii=False)
+        try:
+            await asyncio.to_thread(_write_atomic, path, payload)
+        except OSError as exc:
+            logger.info(
+                "session_save_failed",
+                extra={"extra": {"conversation_id": session.conversation_id, "error": str(exc)}},
+            )
+
+    def _delete_file(self, conversation_id: str) -> None:
+        path = self._path(conversation_id)
+        if path is not None:
+            path.unlink(missing_ok=True)
+
+
+@lru_cache(maxsize=4)
+def _shared_store(
+    ttl_s: float,
+    max_sessions: int,
+    max_turns: int,
+    token_budget: int,
+    tool_payload_max_tokens: int,
+    disk_dir: str | None,
+) -> SessionStore:
+    return SessionStore(
+        ttl_s=ttl_s,
+        max_sessions=max_sessions,
+        max_turns=max_turns,
+        token_budget=token_budget,
+        tool_payload_max_tokens=tool_payload_max_tokens,
+        disk_dir=disk_dir,
+    )
+
+
+def get_session_store(settings: AgentSettings) -> SessionStore | None:
+    if not settings.session_enabled:
+        return None
+    return _shared_store(
+        settings.session_ttl_s,
+        settings.session_max_sessions,
+        settings.session_max_turns,
+        settings.session_token_budget,
+        settings.session_tool_payload_max_tokens,
+        settings.session_dir,
+    )
+
+
+def _stub_tool_payload(message: dict[str, Any]) -> str:
+    content = str(message.get("content") or "")
+    return json.dumps(
+        {
+            "stub": True,
+            "tool": message.get("name"),
+            "note": "Large output from an earlier turn was dropped; call the tool again if needed.",
+            "preview": content[:_SUMMARY_LINE_CHARS],
+        },
+        ensure_ascii=False,
+    )
+
+
+def _summary_line(turn: Turn) -> str:
+    return f"Q: {turn.query[:_SUMMARY_LINE_CHARS]} A: {turn.answer[:_SUMMARY_LINE_CHARS]}"
+
+
+def _write_atomic(path: Path, payload: str) -> None:
+    os.makedirs(path.parent, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(payload, encoding="utf-8")
+    tmp.replace(path)
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from functools import lru_cache
 from pathlib import Path
+from typing import Literal
 
 from pydantic import AliasChoices, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -12,7 +13,12 @@ ENV_FILE = Path(__file__).resolve().parents[2] / ".env"
 
 
 class AgentSettings(BaseSettings):
-    model_config = SettingsConfigDict(env_file=str(ENV_FILE), extra="ignore")
+    model_config = SettingsConfigDict(
+        env_file=str(ENV_FILE),
+        extra="ignore",
+        # Allow tests and embedders to pass field names as well as env aliases.
+        populate_by_name=True,
+    )
 
     host: str = Field(default="0.0.0.0", validation_alias=AliasChoices("A2A_MCP_AGENT_HOST"))
     port: int = Field(default=7002, validation_alias=AliasChoices("A2A_MCP_AGENT_PORT"))
@@ -58,15 +64,219 @@ class AgentSettings(BaseSettings):
         default=1,
         validation_alias=AliasChoices("A2A_MCP_TOOL_ARG_RETRY_LIMIT"),
     )
+    tool_arg_repair_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("A2A_MCP_TOOL_ARG_REPAIR_ENABLED"),
+    )
+    tool_projection_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("A2A_MCP_TOOL_PROJECTION_ENABLED"),
+    )
+    tool_message_max_tokens: int = Field(
+        default=512,
+        validation_alias=AliasChoices("A2A_MCP_TOOL_MESSAGE_MAX_TOKENS"),
+    )
     openai_timeout_s: float = Field(
         default=20.0,
         validation_alias=AliasChoices("A2A_MCP_OPENAI_TIMEOUT_S"),
     )
 
+    fast_path_enabled: bool = Field(
+        default=False,
+        validation_alias=AliasChoices("A2A_MCP_FAST_PATH_ENABLED"),
+    )
+    fast_path_min_confidence: float = Field(
+        default=0.8,
+        validation_alias=AliasChoices("A2A_MCP_FAST_PATH_MIN_CONFIDENCE"),
+    )
+    fast_path_answer_mode: Literal["template", "responder"] = Field(
+        default="template",
+        validation_alias=AliasChoices("A2A_MCP_FAST_PATH_ANSWER_MODE"),
+    )
+
+    speculative_tools_enabled: bool = Field(
+        default=False,
+        validation_alias=AliasChoices("A2A_MCP_SPECULATIVE_TOOLS_ENABLED"),
+    )
+    speculative_min_confidence: float = Field(
+        default=0.5,
+        validation_alias=AliasChoices("A2A_MCP_SPECULATIVE_MIN_CONFIDENCE"),
+    )
+
+    llm_cache_enabled: bool = Field(
+        default=False,
+        validation_alias=AliasChoices("A2A_MCP_LLM_CACHE_ENABLED"),
+    )
+    llm_cache_max_entries: int = Field(
+        default=1024,
+        validation_alias=AliasChoices("A2A_MCP_LLM_CACHE_MAX_ENTRIES"),
+    )
+    llm_cache_dir: str | None = Field(
+        default=None,
+        validation_alias=AliasChoices("A2A_MCP_LLM_CACHE_DIR"),
+    )
+    llm_cache_planner_ttl_s: float = Field(
+        default=300.0,
+        validation_alias=AliasChoices("A2A_MCP_LLM_CACHE_PLANNER_TTL_S"),
+    )
+    llm_cache_responder_ttl_s: float = Field(
+        default=60.0,
+        validation_alias=AliasChoices("A2A_MCP_LLM_CACHE_RESPONDER_TTL_S"),
+    )
+    llm_cache_time_sensitive_tools: list[str] = Field(
+        default_factory=lambda: ["time"],
+        validation_alias=AliasChoices("A2A_MCP_LLM_CACHE_TIME_SENSITIVE_TOOLS"),
+    )
+
+    admission_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("A2A_MCP_ADMISSION_ENABLED"),
+    )
+    admission_initial_limit: int = Field(
+        default=32,
+        validation_alias=AliasChoices("A2A_MCP_ADMISSION_INITIAL_LIMIT"),
+    )
+    admission_min_limit: int = Field(
+        default=2,
+        validation_alias=AliasChoices("A2A_MCP_ADMISSION_MIN_LIMIT"),
+    )
+    admission_max_limit: int = Field(
+        default=128,
+        validation_alias=AliasChoices("A2A_MCP_ADMISSION_MAX_LIMIT"),
+    )
+    admission_max_queue: int = Field(
+        default=64,
+        validation_alias=AliasChoices("A2A_MCP_ADMISSION_MAX_QUEUE"),
+    )
+    admission_queue_timeout_ms: int = Field(
+        default=5000,
+        validation_alias=AliasChoices("A2A_MCP_ADMISSION_QUEUE_TIMEOUT_MS"),
+    )
+    admission_latency_tolerance: float = Field(
+        default=2.0,
+        validation_alias=AliasChoices("A2A_MCP_ADMISSION_LATENCY_TOLERANCE"),
+    )
+    admission_latency_ceiling_ms: int = Field(
+        default=120000,
+        validation_alias=AliasChoices("A2A_MCP_ADMISSION_LATENCY_CEILING_MS"),
+    )
+
+    scheduler_lane_weights: dict[str, int] = Field(
+        default_factory=lambda: {"interactive": 4, "batch": 1},
+        validation_alias=AliasChoices("A2A_MCP_SCHEDULER_LANE_WEIGHTS"),
+    )
+    scheduler_default_lane: str = Field(
+        default="interactive",
+        validation_alias=AliasChoices("A2A_MCP_SCHEDULER_DEFAULT_LANE"),
+    )
+    scheduler_tenant_max_share: float = Field(
+        default=1.0,
+        validation_alias=AliasChoices("A2A_MCP_SCHEDULER_TENANT_MAX_SHARE"),
+    )
+    scheduler_reserved_interactive_share: float = Field(
+        default=0.25,
+        validation_alias=AliasChoices("A2A_MCP_SCHEDULER_RESERVED_INTERACTIVE_SHARE"),
+    )
+    llm_max_concurrency: int = Field(
+        default=16,
+        validation_alias=AliasChoices("A2A_MCP_LLM_MAX_CONCURRENCY"),
+    )
+    tool_max_concurrency: int = Field(
+        default=32,
+        validation_alias=AliasChoices("A2A_MCP_TOOL_MAX_CONCURRENCY"),
+    )
+
+    task_workers: int = Field(
+        default=8,
+        validation_alias=AliasChoices("A2A_MCP_TASK_WORKERS"),
+    )
+    task_max_pending: int = Field(
+        default=256,
+        validation_alias=AliasChoices("A2A_MCP_TASK_MAX_PENDING"),
+    )
+    task_retention_s: float = Field(
+        default=600.0,
+        validation_alias=AliasChoices("A2A_MCP_TASK_RETENTION_S"),
+    )
+
+    # Bulk asks (`POST /v1/ask:batch`).
+    batch_max_items: int = Field(
+        default=1000,
+        validation_alias=AliasChoices("A2A_MCP_BATCH_MAX_ITEMS"),
+    )
+    batch_concurrency: int = Field(
+        default=8,
+        validation_alias=AliasChoices("A2A_MCP_BATCH_CONCURRENCY"),
+    )
+    batch_tool_memo_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("A2A_MCP_BATCH_TOOL_MEMO_ENABLED"),
+    )
+
+    coalesce_enabled: bool = Field(
+        default=False,
+        validation_alias=AliasChoices("A2A_MCP_COALESCE_ENABLED"),
+    )
+    coalesce_window_ms: int = Field(
+        default=2000,
+        validation_alias=AliasChoices("A2A_MCP_COALESCE_WINDOW_MS"),
+    )
+
+    session_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("A2A_MCP_SESSION_ENABLED"),
+    )
+    session_ttl_s: float = Field(
+        default=1800.0,
+        validation_alias=AliasChoices("A2A_MCP_SESSION_TTL_S"),
+    )
+    session_max_sessions: int = Field(
+        default=1000,
+        validation_alias=AliasChoices("A2A_MCP_SESSION_MAX_SESSIONS"),
+    )
+    session_max_turns: int = Field(
+        default=20,
+        validation_alias=AliasChoices("A2A_MCP_SESSION_MAX_TURNS"),
+    )
+    session_token_budget: int = Field(
+        default=2000,
+        validation_alias=AliasChoices("A2A_MCP_SESSION_TOKEN_BUDGET"),
+    )
+    session_tool_payload_max_tokens: int = Field(
+        default=256,
+        validation_alias=AliasChoices("A2A_MCP_SESSION_TOOL_PAYLOAD_MAX_TOKENS"),
+    )
+    session_dir: str | None = Field(
+        default=None,
+        validation_alias=AliasChoices("A2A_MCP_SESSION_DIR"),
+    )
+
     mcp_base_url: str = Field(
         default="http://localhost:7001",
         validation_alias=AliasChoices("A2A_MCP_MCP_BASE_URL"),
     )
+    # trusted: check only the response envelope (the tool server validated its output);
+    # strict: also re-validate `data` against the tool's output model.
+    tool_response_mode: Literal["trusted", "strict"] = Field(
+        default="trusted",
+        validation_alias=AliasChoices("A2A_MCP_TOOL_RESPONSE_MODE"),
+    )
+    # msgpack needs the optional `msgpack` package on both sides; otherwise JSON is used.
+    tool_wire_format: Literal["json", "msgpack"] = Field(
+        default="json",
+        validation_alias=AliasChoices("A2A_MCP_TOOL_WIRE_FORMAT"),
+    )
+    # Tools are discovered from the tool server's `GET /tools`; re-checked (ETag) this often.
+    tool_catalog_refresh_s: float = Field(
+        default=300.0,
+        validation_alias=AliasChoices("A2A_MCP_TOOL_CATALOG_REFRESH_S"),
+    )
+    # Last catalog fetched, used when the tool server is unreachable at startup; empty disables.
+    # Only used for the same `mcp_base_url` it was fetched from.
+    tool_catalog_snapshot: str | None = Field(
+        default=str(ENV_FILE.parent / ".cache" / "tool_catalog.json"),
+        validation_alias=AliasChoices("A2A_MCP_TOOL_CATALOG_SNAPSHOT"),
+    )
     request_timeout_s: float = Field(
         default=10.0,
         validation_alias=AliasChoices(
@@ -82,6 +292,69 @@ class AgentSettings(BaseSettings):
     )
     trace_dir: str = Field(default="traces", validation_alias=AliasChoices("A2A_MCP_TRACE_DIR"))
 
+    profile_sample_rate: float = Field(
+        default=0.0,
+        validation_alias=AliasChoices(
+            "A2A_MCP_AGENT_PROFILE_SAMPLE_RATE",
+            "A2A_MCP_PROFILE_SAMPLE_RATE",
+        ),
+    )
+    profile_top_n: int = Field(default=20, validation_alias=AliasChoices("A2A_MCP_PROFILE_TOP_N"))
+    profile_max_duration_s: float = Field(
+        default=10.0,
+        validation_alias=AliasChoices("A2A_MCP_PROFILE_MAX_DURATION_S"),
+    )
+    profile_write_file: bool = Field(
+        default=False,
+        validation_alias=AliasChoices("A2A_MCP_PROFILE_WRITE_FILE"),
+    )
+
+    loop_monitor_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("A2A_MCP_LOOP_MONITOR_ENABLED"),
+    )
+    loop_monitor_interval_ms: int = Field(
+        default=100,
+        validation_alias=AliasChoices("A2A_MCP_LOOP_MONITOR_INTERVAL_MS"),
+    )
+    loop_stall_threshold_ms: int = Field(
+        default=200,
+        validation_alias=AliasChoices("A2A_MCP_LOOP_STALL_THRESHOLD_MS"),
+    )
+
+    # How often a running request checks whether its client has disconnected.
+    disconnect_poll_interval_ms: int = Field(
+        default=250,
+        validation_alias=AliasChoices("A2A_MCP_DISCONNECT_POLL_INTERVAL_MS"),
+    )
+
+    # Bearer token for the /admin/* endpoints; unset keeps them disabled (404).
+    admin_token: str | None = Field(
+        default=None,
+        validation_alias=AliasChoices("A2A_MCP_AGENT_ADMIN_TOKEN", "A2A_MCP_ADMIN_TOKEN"),
+    )
+
+    log_level: str = Field(
+        default="INFO",
+        validation_alias=AliasChoices("A2A_MCP_AGENT_LOG_LEVEL", "A2A_MCP_LOG_LEVEL"),
+    )
+    log_queue_size: int = Field(
+        default=10000,
+        validation_alias=AliasChoices("A2A_MCP_LOG_QUEUE_SIZE"),
+    )
+    log_batch_size: int = Field(
+        default=256,
+        validation_alias=AliasChoices("A2A_MCP_LOG_BATCH_SIZE"),
+    )
+    log_flush_interval_ms: int = Field(
+        default=200,
+        validation_alias=AliasChoices("A2A_MCP_LOG_FLUSH_INTERVAL_MS"),
+    )
+    log_sample_rates: dict[str, float] = Field(
+        default_factory=dict,
+        validation_alias=AliasChoices("A2A_MCP_AGENT_LOG_SAMPLE_RATES", "A2A_MCP_LOG_SAMPLE_RATES"),
+    )
+
 
 @lru_cache(maxsize=1)
 def get_settings() -> AgentSettings:
@@ -0,0 +1,88 @@
+"""Speculative tool prefetch.
+
+While the first planner LLM call is in flight, the agent starts the tool call
+the router predicts for the query. If the planner then asks for the same tool
+with the same canonical arguments, the in-flight (or finished) result is reused
+instead of issuing a second call. Unclaimed speculations are cancelled when the
+request finishes and counted as wasted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any
+
+from .logging import get_logger
+from .tool_catalog import get_tool_catalog
+
+logger = get_logger("speculation")
+
+
+def canonical_call_key(name: str, args: dict[str, Any]) -> str:
+    """Key that treats omitted defaults and explicit defaults as the same call."""
+    tool = get_tool_catalog().get(name)
+    normalized: Any = args
+    if tool is not None:
+        try:
+            normalized = tool.input_model.model_validate(args).model_dump(mode="json")
+        except Exception:  # noqa: BLE001
+            normalized = args
+    return f"{name}:{json.dumps(normalized, sort_keys=True, ensure_ascii=False)}"
+
+
+class SpeculativeCalls:
+    def __init__(self, broker: Any, trace_id: str) -> None:
+        self._broker = broker
+        self._trace_id = trace_id
+        self._pending: dict[str, tuple[str, dict[str, Any], asyncio.Task[Any]]] = {}
+        self.launched: list[dict[str, Any]] = []
+        self.hits = 0
+
+    def launch(self, name: str, args: dict[str, Any]) -> None:
+        key = canonical_call_key(name, args)
+        if key in self._pending:
+            return
+        # No trace: only calls the planner actually asks for are recorded.
+        task = asyncio.create_task(self._broker.call_tool(name, args, self._trace_id, None))
+        self._pending[key] = (name, args, task)
+        self.launched.append({"name": name, "args": args})
+
+    async def claim(self, name: str, args: dict[str, Any]) -> Any | None:
+        """Return the speculated result for this call, or None on a mispredict."""
+        entry = self._pending.pop(canonical_call_key(name, args), None)
+        if entry is None:
+            return None
+        try:
+            result = await entry[2]
+        except Exception:  # noqa: BLE001
+            return None
+        self.hits += 1
+        return result
+
+    def finish(self) -> dict[str, Any]:
+        cancelled = 0
+        for _name, _args, task in self._pending.values():
+            if not task.done():
+                task.cancel()
+                cancelled += 1
+        summary = {
+            "launched": self.launched,
+            "hits": self.hits,
+            "wasted": len(self._pending),
+            "cancelled": cancelled,
+        }
+        self._pending.clear()
+        if self.launched:
+            logger.info(
+                "tool_speculation",
+                extra={
+                    "extra": {
+                        "trace_id": self._trace_id,
+                        "launched": len(self.launched),
+                        "hits": summary["hits"],
+                        "wasted": summary["wasted"],
+                    }
+                },
+            )
+        return summary
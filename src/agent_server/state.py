@@ -14,10 +14,16 @@ class TraceRecord:
     started_at: str
     finished_at: str | None = None
     latency_ms: int | None = None
+    status: str = "ok"
     request: dict[str, Any] = field(default_factory=dict)
     llm: list[dict[str, Any]] = field(default_factory=list)
     tools: list[dict[str, Any]] = field(default_factory=list)
     final: dict[str, Any] = field(default_factory=dict)
+    router: dict[str, Any] = field(default_factory=dict)
+    speculation: dict[str, Any] = field(default_factory=dict)
+    repairs: list[dict[str, Any]] = field(default_factory=list)
+    profile: dict[str, Any] = field(default_factory=dict)
+    coalesced: dict[str, Any] = field(default_factory=dict)
 
 
 @dataclass
@@ -27,6 +33,8 @@ class ToolCallRecord:
     ok: bool
     output: dict[str, Any] | None = None
     error: dict[str, Any] | None = None
+    # Failed direct call of the fast path, after which the planner took over.
+    fast_path_fallback: bool = False
 
 
 @dataclass
@@ -37,3 +45,5 @@ class AgentState:
     tool_calls: list[ToolCallRecord] = field(default_factory=list)
     observations: list[dict[str, Any]] = field(default_factory=list)
     final_answer: str | None = None
+    # This turn's user/assistant/tool messages, kept as session history.
+    messages: list[dict[str, Any]] = field(default_factory=list)
@@ -0,0 +1,244 @@
+"""Asynchronous task API for long-running asks.
+
+`POST /v1/tasks` registers the ask and returns at once; the run happens on a
+bounded worker pool (a `FairScheduler`, so lanes and tenant caps apply here
+too), and each run then waits for an admission slot in its lane, so tasks
+share the service's concurrency limit with `/v1/ask`. Clients poll
+`GET /v1/tasks/{id}` or subscribe to its event stream, which replays earlier
+events and then follows progress (LLM and tool steps) until the task reaches
+a terminal state. Finished tasks are kept for `retention_s` and can be
+cancelled while they are queued or running.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from collections.abc import AsyncIterator, Mapping
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+from common.loop_monitor import bind_trace_id
+
+from .admission import AdaptiveLimiter, get_admission_limiter
+from .executor import AskRequest, handle_ask
+from .logging import get_logger
+from .scheduling import DEFAULT_TENANT, INTERACTIVE, FairScheduler, request_class
+from .settings import AgentSettings
+from .trace import progress_listener_var
+
+logger = get_logger("tasks")
+
+TERMINAL_STATES = frozenset({"completed", "failed", "canceled"})
+
+
+class TaskQueueFull(Exception):
+    pass
+
+
+@dataclass
+class TaskRecord:
+    task_id: str
+    trace_id: str
+    payload: AskRequest
+    lane: str = INTERACTIVE
+    tenant: str = DEFAULT_TENANT
+    state: str = "submitted"
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    events: list[dict[str, Any]] = field(default_factory=list)
+    subscribers: list[asyncio.Queue[dict[str, Any]]] = field(default_factory=list, repr=False)
+    runner: asyncio.Task[None] | None = field(default=None, repr=False)
+
+    @property
+    def terminal(self) -> bool:
+        return self.state in TERMINAL_STATES
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "task_id": self.task_id,
+            "trace_id": self.trace_id,
+            "state": self.state,
+            "lane": self.lane,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "events": len(self.events),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class TaskManager:
+    def __init__(
+        self,
+        *,
+        workers: int = 8,
+        max_pending: int = 256,
+        retention_s: float = 600.0,
+        lane_weights: Mapping[str, int] | None = None,
+        admission: AdaptiveLimiter | None = None,
+    ) -> None:
+        self.max_pending = max_pending
+        self.retention_s = retention_s
+        self._admission = admission
+        self._pool = FairScheduler(capacity=workers, weights=lane_weights or {INTERACTIVE: 1})
+        self._tasks: dict[str, TaskRecord] = {}
+        self.submitted = 0
+        self.rejected = 0
+
+    def submit(
+        self,
+        payload: AskRequest,
+        trace_id: str,
+        *,
+        lane: str = INTERACTIVE,
+        tenant: str = DEFAULT_TENANT,
+    ) -> TaskRecord:
+        self._purge()
+        if self._pending() >= self.max_pending:
+            self.rejected += 1
+            raise TaskQueueFull(f"{self.max_pending} tasks pending")
+
+        record = TaskRecord(
+            task_id=str(uuid.uuid4()), trace_id=trace_id, payload=payload, lane=lane, tenant=tenant
+        )
+        self._tasks[record.task_id] = record
+        self.submitted += 1
+        self._emit(record, "submitted", {"trace_id": trace_id})
+        record.runner = asyncio.create_task(self._run(record))
+        return record
+
+    def get(self, task_id: str) -> TaskRecord | None:
+        self._purge()
+        return self._tasks.get(task_id)
+
+    def cancel(self, task_id: str) -> TaskRecord | None:
+        record = self.get(task_id)
+        if record is None or record.terminal:
+            return record
+        if record.runner is not None:
+            record.runner.cancel()
+        # The runner records "canceled" when the cancellation lands.
+        return record
+
+    async def events(self, record: TaskRecord) -> AsyncIterator[dict[str, Any]]:
+        """Past events, then live ones until the task is finished."""
+        # Snapshot and subscribe without an await in between: no event is lost.
+        queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        backlog = list(record.events)
+        finished = record.terminal
+        if not finished:
+            record.subscribers.append(queue)
+        try:
+            for event in backlog:
+                yield event
+            while not finished:
+                event = await queue.get()
+                yield event
+                finished = event["event"] in TERMINAL_STATES
+        finally:
+            if queue in record.subscribers:
+                record.subscribers.remove(queue)
+
+    def stats(self) -> dict[str, Any]:
+        states: dict[str, int] = {}
+        for record in self._tasks.values():
+            states[record.state] = states.get(record.state, 0) + 1
+        return {
+            "tasks": len(self._tasks),
+            "states": states,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "workers": self._pool.stats(),
+        }
+
+    async def _run(self, record: TaskRecord) -> None:
+        bind_trace_id(record.trace_id)
+        token = progress_listener_var.set(lambda event, data: self._emit(record, event, data))
+        try:
+            with request_class(record.lane, record.tenant):
+                async with AsyncExitStack() as stack:
+                    await stack.enter_async_context(self._pool.slot(record.lane, record.tenant))
+                    admission = None
+                    if self._admission is not None:
+                        slot = await stack.enter_async_context(
+                            self._admission.acquire(record.lane, record.tenant, wait=True)
+                        )
+                        admission = slot.as_trace()
+                    self._set_state(record, "working")
+                    response = await handle_ask(
+                        record.payload, record.trace_id, admission=admission
+                    )
+            record.result = response.model_dump()
+            self._set_state(record, "completed", {"result": record.result})
+        except asyncio.CancelledError:
+            self._set_state(record, "canceled")
+        except Exception as exc:  # noqa: BLE001
+            record.error = str(exc)
+            logger.info(
+                "task_failed",
+                extra={
+                    "extra": {
+                        "task_id": record.task_id,
+                        "trace_id": record.trace_id,
+                        "error": str(exc),
+                    }
+                },
+            )
+            self._set_state(record, "failed", {"error": str(exc)})
+        finally:
+            progress_listener_var.reset(token)
+
+    def _set_state(
+        self, record: TaskRecord, state: str, data: dict[str, Any] | None = None
+    ) -> None:
+        record.state = state
+        self._emit(record, state, data or {})
+
+    def _emit(self, record: TaskRecord, event: str, data: dict[str, Any]) -> None:
+        record.updated_at = time.time()
+        entry = {"seq": len(record.events), "event": event, "ts": record.updated_at, "data": data}
+        record.events.append(entry)
+        for queue in record.subscribers:
+            queue.put_nowait(entry)
+
+    def _pending(self) -> int:
+        return sum(1 for record in self._tasks.values() if not record.terminal)
+
+    def _purge(self) -> None:
+        deadline = time.time() - self.retention_s
+        for task_id, record in list(self._tasks.items()):
+            if record.terminal and record.updated_at < deadline:
+                del self._tasks[task_id]
+
+
+@lru_cache(maxsize=4)
+def _shared_manager(
+    workers: int,
+    max_pending: int,
+    retention_s: float,
+    lane_weights: tuple[tuple[str, int], ...],
+    admission: AdaptiveLimiter | None,
+) -> TaskManager:
+    return TaskManager(
+        workers=workers,
+        max_pending=max_pending,
+        retention_s=retention_s,
+        lane_weights=dict(lane_weights),
+        admission=admission,
+    )
+
+
+def get_task_manager(settings: AgentSettings) -> TaskManager:
+    return _shared_manager(
+        settings.task_workers,
+        settings.task_max_pending,
+        settings.task_retention_s,
+        tuple(settings.scheduler_lane_weights.items()),
+        get_admission_limiter(settings),
+    )
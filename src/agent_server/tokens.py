@@ -0,0 +1,29 @@
+"""Cheap token estimates for prompt budgeting.
+
+Exact counts would need the model's tokenizer; for budgets a stable
+over-estimate is enough: roughly one token per CJK character and one per four
+characters of everything else.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+_MESSAGE_OVERHEAD = 4
+
+
+def estimate_tokens(text: str) -> int:
+    wide = sum(1 for ch in text if ord(ch) >= 0x2E80)
+    return wide + (len(text) - wide + 3) // 4
+
+
+def estimate_message_tokens(message: dict[str, Any]) -> int:
+    tokens = _MESSAGE_OVERHEAD + estimate_tokens(str(message.get("content") or ""))
+    if message.get("tool_calls"):
+        tokens += estimate_tokens(json.dumps(message["tool_calls"], ensure_ascii=False))
+    return tokens
+
+
+def estimate_messages_tokens(messages: list[dict[str, Any]]) -> int:
+    return sum(estimate_message_tokens(message) for message in messages)
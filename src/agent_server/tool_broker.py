@@ -6,110 +6,182 @@ from the agent reasoning logic.
 
 from __future__ import annotations
 
+import asyncio
+import json
 import time
+from collections.abc import Awaitable, Callable, Iterable
+from contextvars import ContextVar
+from functools import lru_cache
 from typing import Any
 
 import httpx
+from pydantic import ValidationError
+from pydantic_core import from_json
+
+from common.admin import admin_authorization
+from common.profiling import PROFILE_HEADER
+from common.tool_contract import ToolError, ToolMeta, ToolResponse, tool_data
+from common.wire import accept_header, is_msgpack, msgpack_available, unpack
 
-from tool_server.schemas import ToolError, ToolMeta, ToolResponse
-from tool_server.tools import get_tool_handler, get_tool_spec
 from .logging import get_logger
+from .scheduling import get_tool_pool
 from .settings import AgentSettings
+from .state import TraceRecord
+from .tool_catalog import get_tool_catalog
+from .tool_client import get_tool_client
 from .trace import record_tool_call
 
 logger = get_logger("tool_broker")
 
 
+class ToolMemo:
+    """Tool results shared by every ask of one batch.
+
+    Identical calls (same tool, same arguments) run once; concurrent and later
+    callers reuse the response. Failed responses are dropped so a later call
+    retries, and `skip_tools` (time-sensitive tools) always run.
+    """
+
+    def __init__(self, skip_tools: Iterable[str] = ()) -> None:
+        self.skip_tools = frozenset(skip_tools)
+        self._calls: dict[str, asyncio.Task[ToolResponse]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def call(
+        self,
+        name: str,
+        args: dict[str, Any],
+        fn: Callable[[], Awaitable[ToolResponse]],
+        trace: TraceRecord | None = None,
+    ) -> ToolResponse:
+        key = json.dumps([name, args], sort_keys=True, ensure_ascii=False, default=str)
+        task = self._calls.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._settle(key, done))
+            return await asyncio.shield(task)
+
+        self.hits += 1
+        response = await asyncio.shield(task)
+        if trace is not None:
+            record_tool_call(
+                trace,
+                tool_name=name,
+                args=args,
+                ok=response.ok,
+                latency_ms=0,
+                result=tool_data(response) if response.ok else None,
+                error=response.error.model_dump() if response.error else None,
+                memoized=True,
+            )
+        return response
+
+    def close(self) -> None:
+        for task in self._calls.values():
+            if not task.done():
+                task.cancel()
+        self._calls.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"entries": len(self._calls), "hits": self.hits, "misses": self.misses}
+
+    def _settle(self, key: str, task: asyncio.Task[ToolResponse]) -> None:
+        failed = task.cancelled() or task.exception() is not None or not task.result().ok
+        # Drop failures so a later call retries, unless a newer call replaced the entry.
+        if failed and self._calls.get(key) is task:
+            del self._calls[key]
+
+
+# Set for the asks of a batch; contextvar so every task spawned by an ask sees it.
+tool_memo_var: ContextVar[ToolMemo | None] = ContextVar("tool_memo", default=None)
+
+
 class ToolBroker:
     def __init__(self, settings: AgentSettings) -> None:
         self._settings = settings
+        self._pool = get_tool_pool(settings)
+        self._accept = _accept_header(settings.tool_wire_format)
 
     async def call_tool(
         self,
         name: str,
         args: dict[str, Any],
         trace_id: str,
-        trace: object | None = None,
+        trace: TraceRecord | None = None,
     ) -> ToolResponse:
-        # Allow in-process calls for tests or local debugging.
-        if self._settings.mcp_base_url == "inproc":
-            return self._call_tool_inproc(name, args, trace_id, trace)
-        return await self._call_tool_http(name, args, trace_id, trace)
+        memo = tool_memo_var.get()
+        if memo is not None and name not in memo.skip_tools:
+            return await memo.call(
+                name, args, lambda: self._call_tool(name, args, trace_id, trace), trace
+            )
+        return await self._call_tool(name, args, trace_id, trace)
 
-    def _call_tool_inproc(
+    async def _call_tool(
         self,
         name: str,
         args: dict[str, Any],
         trace_id: str,
-        trace: object | None = None,
+        trace: TraceRecord | None = None,
     ) -> ToolResponse:
-        # Local in-process handler avoids HTTP overhead.
-        start = time.time()
-        spec = get_tool_spec(name)
-        handler = get_tool_handler(name)
-        if not spec or not handler:
+        async with self._pool.slot():
+            # Allow in-process calls for tests or local debugging.
+            if self._settings.mcp_base_url == "inproc":
+                return await self._call_tool_inproc(name, args, trace_id, trace)
+            return await self._call_tool_http(name, args, trace_id, trace)
+
+    async def _call_tool_inproc(
+        self,
+        name: str,
+        args: dict[str, Any],
+        trace_id: str,
+        trace: TraceRecord | None = None,
+    ) -> ToolResponse:
+        # Embedded mode: the tool server's dispatcher, in this process, with no HTTP or JSON.
+        # Imported here so only embedded mode loads the tool server's code.
+        from tool_server.dispatcher import UnknownToolError, get_dispatcher
+
+        try:
+            response = await get_dispatcher().dispatch(name, args, trace_id)
+        except UnknownToolError:
             return ToolResponse(
                 ok=False,
                 data=None,
                 error=ToolError(code="NOT_FOUND", message=f"Unknown tool: {name}"),
                 meta=ToolMeta(tool_name=name, trace_id=trace_id),
             )
-        try:
-            input_obj = spec.input_model.model_validate(args)
-            result = handler(input_obj, _inproc_settings(), trace_id)
-            latency_ms = int((time.time() - start) * 1000)
-            response = ToolResponse(
-                ok=True,
-                data=result.model_dump(),
-                error=None,
-                meta=ToolMeta(tool_name=name, trace_id=trace_id, latency_ms=latency_ms),
-            )
-            if trace is not None:
-                record_tool_call(
-                    trace,
-                    tool_name=name,
-                    args=args,
-                    ok=True,
-                    latency_ms=latency_ms,
-                    result=response.data,
-                    error=None,
-                )
-            return response
-        except Exception as exc:  # noqa: BLE001
-            latency_ms = int((time.time() - start) * 1000)
-            response = ToolResponse(
-                ok=False,
-                data=None,
-                error=ToolError(code="TOOL_ERROR", message=str(exc)),
-                meta=ToolMeta(tool_name=name, trace_id=trace_id, latency_ms=latency_ms),
+        if trace is not None:
+            record_tool_call(
+                trace,
+                tool_name=name,
+                args=args,
+                ok=response.ok,
+                latency_ms=response.meta.latency_ms,
+                result=tool_data(response) if response.ok else None,
+                error=response.error.model_dump() if response.error else None,
             )
-            if trace is not None:
-                record_tool_call(
-                    trace,
-                    tool_name=name,
-                    args=args,
-                    ok=False,
-                    latency_ms=latency_ms,
-                    result=None,
-                    error=response.error.model_dump() if response.error else None,
-                )
-            return response
+        return response
 
     async def _call_tool_http(
         self,
         name: str,
         args: dict[str, Any],
         trace_id: str,
-        trace: object | None = None,
+        trace: TraceRecord | None = None,
     ) -> ToolResponse:
         # Standard path: HTTP request to tool server.
-        url = f"{self._settings.mcp_base_url}/tools/{name}"
+        client = get_tool_client(self._settings.mcp_base_url, self._settings.request_timeout_s)
+        headers = {"x-trace-id": trace_id, "accept": self._accept}
+        if trace is not None and trace.profile.get("requested"):
+            # Profile the tool server side of a profiled request as well; the
+            # tool server honours the header only with its admin token.
+            headers[PROFILE_HEADER] = "1"
+            headers.update(admin_authorization(self._settings.admin_token))
         start = time.time()
         try:
-            async with httpx.AsyncClient(
-                timeout=self._settings.request_timeout_s, trust_env=False
-            ) as client:
-                resp = await client.post(url, json=args, headers={"x-trace-id": trace_id})
+            resp = await client.post(f"/tools/{name}", json=args, headers=headers)
         except httpx.RequestError as exc:
             latency_ms = int((time.time() - start) * 1000)
             logger.info(
@@ -164,7 +236,11 @@ class ToolBroker:
             return response
 
         try:
-            data = resp.json()
+            if is_msgpack(resp.headers.get("content-type")):
+                data = unpack(resp.content)
+            else:
+                # pydantic-core's parser is markedly faster than json.loads on large outputs.
+                data = from_json(resp.content)
         except ValueError as exc:
             response = ToolResponse(
                 ok=False,
@@ -197,6 +273,8 @@ class ToolBroker:
         )
 
         response = ToolResponse.model_validate(data)
+        if self._settings.tool_response_mode == "strict":
+            response = _check_output(name, response)
         if trace is not None:
             record_tool_call(
                 trace,
@@ -210,7 +288,28 @@ class ToolBroker:
         return response
 
 
-def _inproc_settings():
-    from tool_server.settings import get_settings
+@lru_cache(maxsize=4)
+def _accept_header(wire_format: str) -> str:
+    # Cached so the fallback warning is logged once, not for every Agent instance.
+    if wire_format == "msgpack" and not msgpack_available():
+        logger.warning(
+            "tool_wire_format_unavailable",
+            extra={"extra": {"wire_format": wire_format, "fallback": "json"}},
+        )
+    return accept_header(wire_format)
+
 
-    return get_settings()
+def _check_output(name: str, response: ToolResponse) -> ToolResponse:
+    tool = get_tool_catalog().get(name)
+    if not response.ok or tool is None:
+        return response
+    try:
+        tool.output_model.model_validate(response.data)
+    except ValidationError as exc:
+        return ToolResponse(
+            ok=False,
+            data=None,
+            error=ToolError(code="TOOL_BAD_RESPONSE", message=str(exc)),
+            meta=response.meta,
+        )
+    return response
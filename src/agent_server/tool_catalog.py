@@ -0,0 +1,337 @@
+"""Tool catalog discovered from the tool server.
+
+The agent learns its tools from the tool server's `GET /tools` instead of
+importing `tool_server`: names and descriptions, the input / output JSON
+Schemas, the cross-field `required_any_of` rule and the `LlmView` used to
+project outputs for the LLM. From those documents the catalog compiles
+pydantic validators once (argument repair, speculation keys, strict-mode
+output checks) and builds the OpenAI tool definitions for the planner.
+
+`refresh_tool_catalog` runs at startup and from `Agent.run` once the catalog
+is older than `tool_catalog_refresh_s`; it sends the current schema version as
+`If-None-Match`, so an unchanged tool server answers `304` with no body. Every
+catalog fetched is written to `tool_catalog_snapshot`, which serves cold starts
+while the tool server is unreachable. In embedded mode (`inproc`) the catalog
+comes straight from the in-process tool server's schema registry.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import operator
+import os
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from functools import lru_cache, reduce
+from pathlib import Path
+from typing import Annotated, Any, Literal, cast
+
+import httpx
+from pydantic import BaseModel, Field, create_model, model_validator
+from pydantic_core import from_json
+
+from common.tool_contract import LlmView, openai_tool, satisfies_any_of, schema_version
+
+from .logging import get_logger
+from .settings import AgentSettings
+from .tool_client import get_tool_client
+
+logger = get_logger("tool_catalog")
+
+_JSON_TYPES: dict[str, Any] = {
+    "string": str,
+    "integer": int,
+    "number": float,
+    "boolean": bool,
+    "null": None,
+}
+# JSON Schema keyword -> pydantic constraint.
+_CONSTRAINTS = {
+    "minimum": "ge",
+    "maximum": "le",
+    "exclusiveMinimum": "gt",
+    "exclusiveMaximum": "lt",
+    "minLength": "min_length",
+    "maxLength": "max_length",
+    "minItems": "min_length",
+    "maxItems": "max_length",
+    "pattern": "pattern",
+}
+
+
+@dataclass(frozen=True)
+class CatalogTool:
+    name: str
+    description: str
+    input_model: type[BaseModel]
+    output_model: type[BaseModel]
+    llm_view: LlmView | None = None
+
+
+@dataclass(frozen=True)
+class ToolCatalog:
+    version: str
+    source: str  # remote | snapshot | local | empty
+    documents: list[dict[str, Any]] = field(default_factory=list)
+    tools: dict[str, CatalogTool] = field(default_factory=dict)
+    openai_tools: list[dict[str, Any]] = field(default_factory=list)
+
+    @classmethod
+    def from_documents(
+        cls, documents: list[dict[str, Any]], *, source: str, version: str | None = None
+    ) -> ToolCatalog:
+        tools = {}
+        for document in documents:
+            name = document["name"]
+            view = document.get("llm_view")
+            tools[name] = CatalogTool(
+                name=name,
+                description=document["description"],
+                input_model=compile_model(
+                    f"{name}_input",
+                    document["input_schema"],
+                    required_any_of=document.get("required_any_of") or (),
+                ),
+                output_model=compile_model(f"{name}_output", document["output_schema"]),
+                llm_view=LlmView.from_document(view) if view else None,
+            )
+        return cls(
+            version=version or schema_version(documents),
+            source=source,
+            documents=documents,
+            tools=tools,
+            openai_tools=[openai_tool(document) for document in documents],
+        )
+
+    def get(self, name: str) -> CatalogTool | None:
+        return self.tools.get(name)
+
+    def stats(self) -> dict[str, Any]:
+        return {"version": self.version, "source": self.source, "tools": sorted(self.tools)}
+
+
+EMPTY_CATALOG = ToolCatalog(version="none", source="empty")
+
+# Retry interval while no catalog is loaded (tool server down, no snapshot).
+_EMPTY_RETRY_S = 5.0
+
+_catalog: ToolCatalog = EMPTY_CATALOG
+_checked_at = float("-inf")
+_refreshing: asyncio.Task[ToolCatalog] | None = None
+
+
+def get_tool_catalog() -> ToolCatalog:
+    """The catalog in use (empty until the first successful refresh)."""
+    return _catalog
+
+
+def set_tool_catalog(catalog: ToolCatalog) -> None:
+    global _catalog, _checked_at
+    _catalog = catalog
+    _checked_at = time.monotonic()
+
+
+@lru_cache(maxsize=1)
+def local_tool_catalog() -> ToolCatalog:
+    """Catalog of the tool server in this process (embedded mode, tests, benchmarks)."""
+    from tool_server.registry import get_schema_registry
+
+    registry = get_schema_registry()
+    return ToolCatalog.from_documents(registry.tools, source="local", version=registry.version)
+
+
+async def refresh_tool_catalog(settings: AgentSettings, *, force: bool = False) -> ToolCatalog:
+    """Re-check the tool server if the catalog is stale; never raises.
+
+    Concurrent callers share one in-flight refresh, and while no catalog could
+    be loaded at all the tool server is retried at most every few seconds
+    rather than on every request.
+    """
+    global _refreshing
+    if not force and time.monotonic() - _checked_at < _recheck_interval(settings):
+        return _catalog
+    task = _refreshing
+    if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+        task = _refreshing = asyncio.ensure_future(_refresh(settings))
+    # Shielded: one caller giving up must not cancel the refresh the others await.
+    return await asyncio.shield(task)
+
+
+def _recheck_interval(settings: AgentSettings) -> float:
+    if _catalog.tools:
+        return settings.tool_catalog_refresh_s
+    return min(settings.tool_catalog_refresh_s, _EMPTY_RETRY_S)
+
+
+async def _refresh(settings: AgentSettings) -> ToolCatalog:
+    global _checked_at
+    _checked_at = time.monotonic()
+    if settings.mcp_base_url == "inproc":
+        set_tool_catalog(local_tool_catalog())
+        return _catalog
+    if not _catalog.tools and settings.tool_catalog_snapshot:
+        snapshot = _read_snapshot(Path(settings.tool_catalog_snapshot), settings.mcp_base_url)
+        if snapshot is not None:
+            set_tool_catalog(snapshot)
+
+    client = get_tool_client(settings.mcp_base_url, settings.request_timeout_s)
+    headers = {"if-none-match": f'"{_catalog.version}"'} if _catalog.tools else {}
+    try:
+        resp = await client.get("/tools", headers=headers)
+        if resp.status_code == 304:
+            return _catalog
+        resp.raise_for_status()
+        documents = from_json(resp.content)
+        catalog = ToolCatalog.from_documents(
+            documents, source="remote", version=_etag_version(resp.headers.get("etag"))
+        )
+    except (httpx.HTTPError, ValueError, KeyError, TypeError) as exc:
+        logger.warning(
+            "tool_catalog_unavailable",
+            extra={
+                "extra": {
+                    "base_url": settings.mcp_base_url,
+                    "error": str(exc) or type(exc).__name__,
+                    "using": _catalog.source,
+                    "version": _catalog.version,
+                }
+            },
+        )
+        return _catalog
+
+    logger.info(
+        "tool_catalog_loaded",
+        extra={
+            "extra": {
+                "version": catalog.version,
+                "previous_version": _catalog.version,
+                "tools": sorted(catalog.tools),
+            }
+        },
+    )
+    set_tool_catalog(catalog)
+    if settings.tool_catalog_snapshot:
+        _write_snapshot(Path(settings.tool_catalog_snapshot), catalog, settings.mcp_base_url)
+    return catalog
+
+
+def compile_model(
+    name: str,
+    schema: dict[str, Any],
+    *,
+    required_any_of: Any = (),
+    defs: dict[str, Any] | None = None,
+) -> type[BaseModel]:
+    """Pydantic model equivalent to an object JSON Schema (as pydantic itself emits them)."""
+    defs = {**(defs or {}), **schema.get("$defs", {})}
+    required = set(schema.get("required", ()))
+    fields: dict[str, Any] = {}
+    for prop, prop_schema in schema.get("properties", {}).items():
+        default = ... if prop in required else prop_schema.get("default")
+        fields[prop] = (
+            _annotation(prop_schema, defs, name),
+            Field(default, description=prop_schema.get("description")),
+        )
+    validators = {}
+    if required_any_of:
+        validators["check_required_any_of"] = _any_of_validator(required_any_of)
+    return create_model(
+        schema.get("title") or name,
+        __doc__=schema.get("description"),
+        __validators__=validators,
+        **fields,
+    )
+
+
+def _union(options: Iterable[Any]) -> Any:
+    """`A | B | ...` of annotations built at runtime; a single option stays as is."""
+    return reduce(operator.or_, options)
+
+
+def _annotation(schema: dict[str, Any], defs: dict[str, Any], owner: str) -> Any:
+    if "$ref" in schema:
+        ref = schema["$ref"].rsplit("/", 1)[-1]
+        base: Any = compile_model(f"{owner}_{ref}", defs[ref], defs=defs)
+    elif "anyOf" in schema or "oneOf" in schema:
+        variants = schema.get("anyOf") or schema["oneOf"]
+        base = _union(_annotation(option, defs, owner) for option in variants)
+    elif "enum" in schema:
+        base = Literal[tuple(schema["enum"])]
+    elif "const" in schema:
+        base = Literal[schema["const"]]
+    elif isinstance(schema.get("type"), list):
+        kinds = schema["type"]
+        return _union(_annotation({**schema, "type": kind}, defs, owner) for kind in kinds)
+    elif schema.get("type") == "array":
+        # Built at runtime, so subscript through Any: the item type is not a static type.
+        base = cast(Any, list)[_annotation(schema.get("items", {}), defs, owner)]
+    elif schema.get("type") == "object":
+        if "properties" in schema:
+            base = compile_model(f"{owner}_{schema.get('title', 'object')}", schema, defs=defs)
+        else:
+            base = dict[str, Any]
+    elif schema.get("type") in _JSON_TYPES:
+        base = _JSON_TYPES[schema["type"]]
+        if base is None:
+            return None
+    else:
+        base = Any
+    constraints = {kw: schema[key] for key, kw in _CONSTRAINTS.items() if key in schema}
+    return Annotated[base, Field(**constraints)] if constraints else base
+
+
+def _any_of_validator(groups: Any) -> Any:
+    groups = [tuple(group) for group in groups]
+    choices = [group[0] if len(group) == 1 else f"({', '.join(group)})" for group in groups]
+    message = f"Provide either {' or '.join(choices)}."
+
+    def check(self: BaseModel) -> BaseModel:
+        if not satisfies_any_of(self.__dict__, groups):
+            raise ValueError(message)
+        return self
+
+    return model_validator(mode="after")(check)
+
+
+def _etag_version(etag: str | None) -> str | None:
+    if not etag:
+        return None
+    return etag.removeprefix("W/").strip('"') or None
+
+
+def _read_snapshot(path: Path, base_url: str) -> ToolCatalog | None:
+    try:
+        document = json.loads(path.read_text(encoding="utf-8"))
+        if document.get("base_url") != base_url:
+            # Written for another tool server: its tools may not exist here.
+            logger.info(
+                "tool_catalog_snapshot_ignored",
+                extra={"extra": {"path": str(path), "base_url": document.get("base_url")}},
+            )
+            return None
+        return ToolCatalog.from_documents(
+            document["tools"], source="snapshot", version=document["version"]
+        )
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        logger.info("tool_catalog_snapshot_error", extra={"extra": {"error": str(exc)}})
+        return None
+
+
+def _write_snapshot(path: Path, catalog: ToolCatalog, base_url: str) -> None:
+    try:
+        os.makedirs(path.parent, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps(
+                {"version": catalog.version, "base_url": base_url, "tools": catalog.documents},
+                ensure_ascii=False,
+            ),
+            encoding="utf-8",
+        )
+        tmp.replace(path)
+    except OSError as exc:
+        logger.info("tool_catalog_snapshot_error", extra={"extra": {"error": str(exc)}})
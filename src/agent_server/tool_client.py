@@ -0,0 +1,38 @@
+"""Pooled HTTP clients for the tool server (`ToolBroker` calls, catalog discovery)."""
+
+from __future__ import annotations
+
+import asyncio
+import weakref
+
+import httpx
+
+UNIX_SCHEME = "unix://"
+
+# Pooled HTTP clients per event loop (an httpx client must not cross loops).
+_loop_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[tuple[str, float], httpx.AsyncClient]
+] = weakref.WeakKeyDictionary()
+
+
+def get_tool_client(base_url: str, timeout_s: float) -> httpx.AsyncClient:
+    """Keep-alive client for the tool server; `unix:///path.sock` uses a Unix socket."""
+    clients = _loop_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get((base_url, timeout_s))
+    if client is None or client.is_closed:
+        if base_url.startswith(UNIX_SCHEME):
+            client = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(uds=base_url[len(UNIX_SCHEME) :]),
+                base_url="http://tool-server",
+                timeout=timeout_s,
+                trust_env=False,
+            )
+        else:
+            client = httpx.AsyncClient(base_url=base_url, timeout=timeout_s, trust_env=False)
+        clients[(base_url, timeout_s)] = client
+    return client
+
+
+async def close_tool_clients() -> None:
+    for client in _loop_clients.pop(asyncio.get_running_loop(), {}).values():
+        await client.aclose()
@@ -5,13 +5,22 @@ from __future__ import annotations
 import json
 import os
 import time
+from collections.abc import Callable
+from contextvars import ContextVar
 from dataclasses import asdict
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
+from common.profiling import RequestProfiler
+
 from .state import TraceRecord
 
+# Optional live listener for trace steps (the task API streams these as progress).
+progress_listener_var: ContextVar[Callable[[str, dict[str, Any]], None] | None] = ContextVar(
+    "progress_listener", default=None
+)
+
 
 def now_utc_iso() -> str:
     return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
@@ -34,16 +43,27 @@ def record_llm_call(
     tool_calls: list[dict[str, Any]],
     messages_summary: list[dict[str, Any]] | None = None,
     finish_reason: str | None = None,
+    kind: str | None = None,
+    latency_ms: int | None = None,
+    cache: str | None = None,
 ) -> None:
     trace.llm.append(
         {
+            "kind": kind,
             "model": model,
             "temperature": temperature,
             "messages_summary": messages_summary or [],
             "tool_calls": tool_calls,
             "finish_reason": finish_reason,
+            "latency_ms": latency_ms,
+            "cache": cache,
         }
     )
+    _notify("llm_call", {"kind": kind, "latency_ms": latency_ms, "tool_calls": tool_calls})
+
+
+def record_route(trace: TraceRecord, decision: dict[str, Any], *, taken: bool) -> None:
+    trace.router = {"decision": decision, "fast_path": taken}
 
 
 def record_tool_call(
@@ -55,19 +75,59 @@ def record_tool_call(
     latency_ms: int | None,
     result: dict[str, Any] | None,
     error: dict[str, Any] | None,
+    speculative: bool = False,
+    memoized: bool = False,
+) -> None:
+    entry: dict[str, Any] = {
+        "tool_name": tool_name,
+        "args": args,
+        "status": "ok" if ok else "error",
+        "latency_ms": latency_ms,
+        "result": result,
+        "error": error,
+    }
+    if speculative:
+        entry["speculative"] = True
+    if memoized:
+        # Reused from an identical call earlier in the same batch.
+        entry["memoized"] = True
+    trace.tools.append(entry)
+    _notify("tool_call", {"tool_name": tool_name, "ok": ok, "latency_ms": latency_ms})
+
+
+def record_repair(
+    trace: TraceRecord,
+    *,
+    tool_name: str,
+    original: dict[str, Any],
+    repair: Any,
+    ok: bool | None,
 ) -> None:
-    trace.tools.append(
+    trace.repairs.append(
         {
             "tool_name": tool_name,
-            "args": args,
-            "status": "ok" if ok else "error",
-            "latency_ms": latency_ms,
-            "result": result,
-            "error": error,
+            "original_args": original,
+            "repaired_args": repair.arguments,
+            "reason": repair.reason,
+            "fixes": repair.fixes,
+            "ok": ok,
         }
     )
 
 
+def record_speculation(trace: TraceRecord, summary: dict[str, Any]) -> None:
+    trace.speculation = summary
+
+
+def record_admission(trace: TraceRecord, admission: dict[str, Any] | None) -> None:
+    if admission:
+        trace.request["admission"] = admission
+
+
+def record_coalesced(trace: TraceRecord, *, leader_trace_id: str, source: str) -> None:
+    trace.coalesced = {"leader_trace_id": leader_trace_id, "source": source}
+
+
 def record_final(trace: TraceRecord, answer_text: str, render_meta: dict[str, Any] | None = None) -> None:
     trace.final = {
         "answer_text": answer_text,
@@ -75,6 +135,10 @@ def record_final(trace: TraceRecord, answer_text: str, render_meta: dict[str, An
     }
 
 
+def record_profile(trace: TraceRecord, summary: dict[str, Any]) -> None:
+    trace.profile = {"requested": True, **summary}
+
+
 def finalize_trace(trace: TraceRecord, started_at_ts: float) -> None:
     trace.finished_at = now_utc_iso()
     trace.latency_ms = int((time.time() - started_at_ts) * 1000)
@@ -82,8 +146,25 @@ def finalize_trace(trace: TraceRecord, started_at_ts: float) -> None:
 
 def write_trace(trace: TraceRecord, trace_dir: str) -> Path:
     os.makedirs(trace_dir, exist_ok=True)
-    ts = trace.started_at.replace(":", "-")
-    filename = f"{ts}_{trace.trace_id}.json"
-    path = Path(trace_dir) / filename
+    path = Path(trace_dir) / f"{_trace_stem(trace)}.json"
     path.write_text(json.dumps(asdict(trace), ensure_ascii=False, indent=2), encoding="utf-8")
     return path
+
+
+def write_profile(profiler: RequestProfiler, trace: TraceRecord, trace_dir: str) -> Path:
+    """Write the raw pstats dump next to the trace file."""
+    os.makedirs(trace_dir, exist_ok=True)
+    path = Path(trace_dir) / f"{_trace_stem(trace)}.prof"
+    profiler.dump(path)
+    return path
+
+
+def _notify(event: str, data: dict[str, Any]) -> None:
+    listener = progress_listener_var.get()
+    if listener is not None:
+        listener(event, data)
+
+
+def _trace_stem(trace: TraceRecord) -> str:
+    ts = trace.started_at.replace(":", "-")
+    return f"{ts}_{trace.trace_id}"
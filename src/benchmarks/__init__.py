@@ -0,0 +1,4 @@
+"""Performance benchmarks (run as `python -m benchmarks.<suite>` with `PYTHONPATH=src`).
+
+Like `fakes`, nothing in the services imports from here.
+"""
@@ -0,0 +1,293 @@
+"""End-to-end `/v1/ask` benchmark with baseline regression checks.
+
+    PYTHONPATH=src python -m benchmarks.e2e --closed 1,8 --open 5,10 --duration 15
+
+Brings up the local stack (see `stack.py`) unless `--agent-url` points at a
+running agent, then runs one closed-loop scenario per concurrency and one
+open-loop scenario per arrival rate. Each scenario reports throughput,
+latency percentiles, error rate and, from the agent's traces, a per-phase
+breakdown. Results are written as JSON; with `--baseline`, the run exits
+non-zero when a tracked metric is worse than the baseline by more than
+`--threshold` (relative; error rate uses an absolute margin).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from .load import closed_loop, load_queries, open_loop, phase_breakdown, summarize
+from .stack import LocalStack, StackConfig
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "e2e.json"
+# metric path -> direction in which it gets better
+TRACKED_METRICS = {
+    "throughput_rps": "higher",
+    "latency_ms.p50": "lower",
+    "latency_ms.p99": "lower",
+    "error_rate": "lower",
+}
+ERROR_RATE_MARGIN = 0.01
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="benchmarks.e2e", description=__doc__.splitlines()[0])
+    parser.add_argument("--closed", default="1,8", help="Closed-loop concurrencies")
+    parser.add_argument("--open", default="5,10", help="Open-loop arrival rates (req/s)")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Warm-up seconds")
+    parser.add_argument("--workload", type=Path, help="JSONL of queries (default: built-in mix)")
+    parser.add_argument("--agent-url", help="Benchmark a running agent instead of a local stack")
+    parser.add_argument("--trace-dir", type=Path, help="Agent trace dir (with --agent-url)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency", default="50,250", help="Fake LLM latency p50,p99 ms")
+    parser.add_argument(
+        "--upstream-latency", default="20,120", help="Fake upstream latency p50,p99 ms"
+    )
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--agent-env",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Extra agent server setting, e.g. A2A_MCP_COALESCE_ENABLED=true (repeatable)",
+    )
+    parser.add_argument("-o", "--output", type=Path, help="Results JSON (default: bench_results/)")
+    parser.add_argument("--baseline", type=Path, help=f"Baseline JSON, e.g. {DEFAULT_BASELINE}")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression")
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Write the tracked metrics to --baseline (default: the stored baseline)",
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    config = _stack_config(args)
+    queries = load_queries(args.workload)
+
+    if args.agent_url:
+        scenarios = asyncio.run(run_scenarios(args, args.agent_url, args.trace_dir, queries))
+    else:
+        with (
+            tempfile.TemporaryDirectory(prefix="a2a-bench-") as workdir,
+            LocalStack(config, Path(workdir)) as stack,
+        ):
+            scenarios = asyncio.run(run_scenarios(args, stack.agent_url, stack.trace_dir, queries))
+
+    results = {
+        "meta": _meta(args, config),
+        "scenarios": scenarios,
+    }
+    output = args.output or Path("bench_results") / f"e2e-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    _print_table(scenarios)
+    print(f"\nresults: {output}")
+
+    if args.update_baseline:
+        baseline_path = args.baseline or DEFAULT_BASELINE
+        baseline = json.dumps(baseline_from(results), ensure_ascii=False, indent=2)
+        baseline_path.write_text(baseline + "\n", encoding="utf-8")
+        print(f"baseline updated: {baseline_path}")
+        return 0
+    if args.baseline is None:
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    regressions = compare(scenarios, baseline, args.threshold)
+    for item in regressions:
+        print(
+            f"REGRESSION {item['scenario']} {item['metric']}: "
+            f"{item['baseline']} -> {item['current']} (limit {item['limit']})"
+        )
+    if not regressions:
+        print(f"no regressions against {args.baseline} (threshold {args.threshold:.0%})")
+    return 1 if regressions else 0
+
+
+async def run_scenarios(
+    args: argparse.Namespace, agent_url: str, trace_dir: Path | None, queries: list[str]
+) -> dict[str, Any]:
+    url = f"{agent_url}/v1/ask"
+    scenarios: dict[str, Any] = {}
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits, trust_env=False) as client:
+        if args.warmup > 0:
+            await closed_loop(
+                client, url, queries, concurrency=2, duration_s=args.warmup, prefix="bench-warmup"
+            )
+        for concurrency in _numbers(args.closed, int):
+            name = f"closed_c{concurrency}"
+            started = time.perf_counter()
+            samples = await closed_loop(
+                client,
+                url,
+                queries,
+                concurrency=concurrency,
+                duration_s=args.duration,
+                prefix=f"bench-{name}",
+            )
+            scenarios[name] = _scenario(
+                {"mode": "closed", "concurrency": concurrency},
+                summarize(samples, time.perf_counter() - started),
+                trace_dir,
+                samples,
+            )
+        for rate in _numbers(args.open, float):
+            name = f"open_r{rate:g}"
+            started = time.perf_counter()
+            samples, dropped = await open_loop(
+                client,
+                url,
+                queries,
+                rate=rate,
+                duration_s=args.duration,
+                prefix=f"bench-{name}",
+                seed=args.seed,
+            )
+            scenarios[name] = _scenario(
+                {"mode": "open", "rate": rate},
+                summarize(samples, time.perf_counter() - started, dropped=dropped),
+                trace_dir,
+                samples,
+            )
+    return scenarios
+
+
+def compare(
+    scenarios: dict[str, Any], baseline: dict[str, Any], threshold: float
+) -> list[dict[str, Any]]:
+    """Tracked metrics that are worse than the baseline beyond the threshold."""
+    regressions = []
+    for name, expected in baseline.get("scenarios", {}).items():
+        current = scenarios.get(name)
+        if current is None:
+            continue
+        for metric, better in TRACKED_METRICS.items():
+            base, value = _get(expected, metric), _get(current, metric)
+            if base is None or value is None:
+                continue
+            if metric == "error_rate":
+                limit = base + ERROR_RATE_MARGIN
+                worse = value > limit
+            elif better == "higher":
+                limit = base * (1 - threshold)
+                worse = value < limit
+            else:
+                limit = base * (1 + threshold)
+                worse = value > limit
+            if worse:
+                regressions.append(
+                    {
+                        "scenario": name,
+                        "metric": metric,
+                        "baseline": base,
+                        "current": value,
+                        "limit": round(limit, 4),
+                    }
+                )
+    return regressions
+
+
+def baseline_from(results: dict[str, Any]) -> dict[str, Any]:
+    scenarios = {}
+    for name, scenario in results["scenarios"].items():
+        tracked: dict[str, Any] = {}
+        for metric in TRACKED_METRICS:
+            _set(tracked, metric, _get(scenario, metric))
+        scenarios[name] = tracked
+    return {"meta": results["meta"], "scenarios": scenarios}
+
+
+def _scenario(
+    params: dict[str, Any], summary: dict[str, Any], trace_dir: Path | None, samples: list[Any]
+) -> dict[str, Any]:
+    scenario = {**params, **summary}
+    if trace_dir is not None and trace_dir.exists():
+        scenario["phases_ms"] = phase_breakdown(trace_dir, {s.trace_id for s in samples})
+    return scenario
+
+
+def _stack_config(args: argparse.Namespace) -> StackConfig:
+    llm_p50, llm_p99 = _numbers(args.llm_latency, float)
+    up_p50, up_p99 = _numbers(args.upstream_latency, float)
+    return StackConfig(
+        seed=args.seed,
+        llm_latency_p50_ms=llm_p50,
+        llm_latency_p99_ms=llm_p99,
+        llm_error_rate=args.llm_error_rate,
+        upstream_latency_p50_ms=up_p50,
+        upstream_latency_p99_ms=up_p99,
+        upstream_error_rate=args.upstream_error_rate,
+        agent_env=dict(item.split("=", 1) for item in args.agent_env),
+    )
+
+
+def _meta(args: argparse.Namespace, config: StackConfig) -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "duration_s": args.duration,
+        "agent_url": args.agent_url,
+        "stack": None if args.agent_url else config.as_dict(),
+    }
+
+
+def _print_table(scenarios: dict[str, Any]) -> None:
+    print(f"{'scenario':<14}{'ok':>7}{'err%':>8}{'rps':>9}{'p50':>9}{'p90':>9}{'p99':>9}")
+    for name, s in scenarios.items():
+        lat = s["latency_ms"]
+        print(
+            f"{name:<14}{s['ok']:>7}{s['error_rate'] * 100:>7.1f}%{s['throughput_rps']:>9.1f}"
+            f"{_fmt(lat['p50'])}{_fmt(lat['p90'])}{_fmt(lat['p99'])}"
+        )
+
+
+def _fmt(value: float | None) -> str:
+    return f"{'-':>9}" if value is None else f"{value:>9.0f}"
+
+
+def _numbers(text: str, kind: type) -> list[Any]:
+    return [kind(part) for part in text.split(",") if part.strip()]
+
+
+def _get(data: dict[str, Any], path: str) -> Any:
+    for part in path.split("."):
+        if not isinstance(data, dict) or part not in data:
+            return None
+        data = data[part]
+    return data
+
+
+def _set(data: dict[str, Any], path: str, value: Any) -> None:
+    *parents, leaf = path.split(".")
+    for part in parents:
+        data = data.setdefault(part, {})
+    data[leaf] = value
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
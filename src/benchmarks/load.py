@@ -0,0 +1,192 @@
+"""Load generators and result statistics for `/v1/ask`.
+
+- Closed loop: `concurrency` workers each send the next request as soon as
+  the previous one returns; measures capacity at a fixed concurrency.
+- Open loop: requests arrive as a Poisson process at `rate` per second
+  regardless of completions, so queueing shows up in the latencies (no
+  coordinated omission). Arrivals beyond `max_outstanding` are counted as
+  dropped instead of piling up without bound.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+DEFAULT_QUERIES = [
+    "现在几点了？",
+    "北京今天天气怎么样？",
+    "上海天气如何？",
+    "我在上海外滩，附近有什么好吃的？",
+    "杭州西湖附近有什么景点？",
+    "What's the weather in Shenzhen?",
+    "你好，你能做什么？",
+]
+
+
+@dataclass
+class Sample:
+    trace_id: str
+    started: float
+    latency_ms: float
+    status: int
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status == 200
+
+
+def load_queries(path: Path | None) -> list[str]:
+    """Queries from a JSONL workload (same format as `cli batch`), or the built-in mix."""
+    if path is None:
+        return list(DEFAULT_QUERIES)
+    queries = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if line.strip():
+            row = json.loads(line)
+            queries.append(row if isinstance(row, str) else row["query"])
+    return queries
+
+
+async def ask(client: httpx.AsyncClient, url: str, query: str, trace_id: str) -> Sample:
+    started = time.perf_counter()
+    try:
+        resp = await client.post(url, json={"query": query}, headers={"x-trace-id": trace_id})
+        status, error = resp.status_code, None if resp.status_code == 200 else resp.text[:200]
+    except httpx.HTTPError as exc:
+        status, error = 0, f"{type(exc).__name__}: {exc}"
+    return Sample(trace_id, started, (time.perf_counter() - started) * 1000, status, error)
+
+
+async def closed_loop(
+    client: httpx.AsyncClient,
+    url: str,
+    queries: Iterable[str],
+    *,
+    concurrency: int,
+    duration_s: float,
+    prefix: str,
+) -> list[Sample]:
+    pool = itertools.cycle(queries)
+    counter = itertools.count()
+    deadline = time.perf_counter() + duration_s
+    samples: list[Sample] = []
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            samples.append(await ask(client, url, next(pool), f"{prefix}-{next(counter)}"))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples
+
+
+async def open_loop(
+    client: httpx.AsyncClient,
+    url: str,
+    queries: Iterable[str],
+    *,
+    rate: float,
+    duration_s: float,
+    prefix: str,
+    max_outstanding: int = 1000,
+    seed: int = 0,
+) -> tuple[list[Sample], int]:
+    pool = itertools.cycle(queries)
+    rng = random.Random(seed)
+    samples: list[Sample] = []
+    inflight: set[asyncio.Task[None]] = set()
+    dropped = 0
+
+    async def one(trace_id: str, query: str) -> None:
+        samples.append(await ask(client, url, query, trace_id))
+
+    start = time.perf_counter()
+    next_arrival = start
+    for index in itertools.count():
+        next_arrival += rng.expovariate(rate)
+        if next_arrival - start >= duration_s:
+            break
+        await asyncio.sleep(max(next_arrival - time.perf_counter(), 0))
+        if len(inflight) >= max_outstanding:
+            dropped += 1
+            continue
+        task = asyncio.create_task(one(f"{prefix}-{index}", next(pool)))
+        inflight.add(task)
+        task.add_done_callback(inflight.discard)
+    await asyncio.gather(*inflight)
+    return samples, dropped
+
+
+def summarize(samples: list[Sample], wall_s: float, *, dropped: int = 0) -> dict[str, Any]:
+    ok = [s for s in samples if s.ok]
+    latencies = sorted(s.latency_ms for s in ok)
+    statuses: dict[str, int] = {}
+    for sample in samples:
+        if not sample.ok:
+            statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+    attempted = len(samples) + dropped
+    return {
+        "requests": len(samples),
+        "ok": len(ok),
+        "errors": statuses,
+        "dropped": dropped,
+        "error_rate": round((attempted - len(ok)) / attempted, 4) if attempted else 0.0,
+        "throughput_rps": round(len(ok) / wall_s, 2) if wall_s > 0 else 0.0,
+        "latency_ms": latency_stats(latencies),
+    }
+
+
+def phase_breakdown(trace_dir: Path, trace_ids: set[str]) -> dict[str, Any]:
+    """Per-phase latency percentiles from the agent's traces of these requests."""
+    phases: dict[str, list[float]] = {
+        "queue_wait": [],
+        "llm_planner": [],
+        "llm_responder": [],
+        "tools": [],
+        "other": [],
+    }
+    for path in trace_dir.glob("*.json"):
+        trace = json.loads(path.read_text(encoding="utf-8"))
+        if trace.get("trace_id") not in trace_ids:
+            continue
+        planner = _llm_ms(trace, "planner")
+        responder = _llm_ms(trace, "responder")
+        # Speculative calls overlap the planner; they are not on the critical path.
+        tools = sum(t.get("latency_ms") or 0 for t in trace["tools"] if not t.get("speculative"))
+        queue_wait = (trace["request"].get("admission") or {}).get("queue_wait_ms", 0)
+        total = trace.get("latency_ms") or 0
+        phases["queue_wait"].append(queue_wait)
+        phases["llm_planner"].append(planner)
+        phases["llm_responder"].append(responder)
+        phases["tools"].append(tools)
+        phases["other"].append(max(total - planner - responder - tools, 0))
+    return {name: latency_stats(sorted(values)) for name, values in phases.items()}
+
+
+def _llm_ms(trace: dict[str, Any], kind: str) -> float:
+    return sum(call.get("latency_ms") or 0 for call in trace["llm"] if call.get("kind") == kind)
+
+
+def latency_stats(sorted_values: list[float]) -> dict[str, float | None]:
+    def pct(q: float) -> float | None:
+        if not sorted_values:
+            return None
+        return round(sorted_values[min(int(len(sorted_values) * q), len(sorted_values) - 1)], 1)
+
+    return {
+        "mean": round(sum(sorted_values) / len(sorted_values), 1) if sorted_values else None,
+        "p50": pct(0.50),
+        "p90": pct(0.90),
+        "p99": pct(0.99),
+        "max": round(sorted_values[-1], 1) if sorted_values else None,
+    }
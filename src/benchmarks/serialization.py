@@ -0,0 +1,301 @@
+"""Micro-benchmarks for the per-call serialization and validation hot path.
+
+    PYTHONPATH=src python -m benchmarks.serialization --poi-items 50
+
+Every tool call crosses the same pydantic / JSON steps; this suite times each
+of them in isolation, for every registered tool, on realistic payloads:
+
+- server: `request.json()` of the body, `input_model.model_validate`,
+  `ToolResponse` construction around the output model and its pre-encoding
+  to JSON bytes (`encode_tool_response`, which the route returns as-is)
+- broker: parsing the body, `ToolResponse.model_validate` of the envelope and,
+  in strict mode only, validation of `data` by the output model the agent's
+  tool catalog compiled from `/tools`
+- agent: the tool message for the LLM (projected and raw `json.dumps`),
+  `record_tool_call` and the `json.dumps` of the trace record
+
+Each stage reports ns/op (best of `--repeat` runs, `timeit` autorange) and,
+from `tracemalloc`, the peak bytes allocated while one op runs and the bytes
+its result holds (objects served from CPython free lists, e.g. small dicts,
+are not counted). The stages are chained — each one's input is the previous
+stage's output — so the payloads are exactly what flows between the services.
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import gc
+import json
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import fastapi
+import pydantic
+from pydantic_core import from_json
+
+from agent_server.projection import encode_tool_message
+from agent_server.settings import AgentSettings
+from agent_server.tool_catalog import local_tool_catalog, set_tool_catalog
+from agent_server.trace import build_trace, record_tool_call
+from tool_server.schemas import (
+    PoiInput,
+    PoiItem,
+    PoiOutput,
+    TimeInput,
+    TimeOutput,
+    ToolMeta,
+    ToolResponse,
+    WeatherInput,
+    WeatherOutput,
+    encode_tool_response,
+)
+from tool_server.tools import get_tool_spec, list_tool_specs
+
+TRACE_ID = "bench-5f0c8a7e-3d4b-4c1e-9a57-6d2b1e0f9c3a"
+
+_POI_NAMES = ("咖啡", "面馆", "书店", "便利店", "火锅", "博物馆", "公园", "小笼包")
+_POI_STREETS = ("南京东路", "淮海中路", "陆家嘴环路", "中山东一路", "四川北路", "衡山路")
+
+
+@dataclass
+class StageResult:
+    tool: str
+    stage: str
+    ns_per_op: float
+    peak_bytes: int
+    result_bytes: int
+    payload_bytes: int | None = None
+
+
+def sample_calls(poi_items: int = 50) -> dict[str, tuple[Any, Any]]:
+    """Realistic (input, output) models per tool, as produced by the real handlers."""
+    names, streets = _POI_NAMES, _POI_STREETS
+    items = [
+        PoiItem(
+            name=f"{names[i % len(names)]}·{streets[i % len(streets)]}{i + 1}号店",
+            address=f"上海市黄浦区{streets[(i * 5) % len(streets)]}{100 + i * 7}号",
+            lat=31.2304 + i * 0.000731,
+            lon=121.4737 + i * 0.000519,
+            distance_m=35 + i * 41,
+        )
+        for i in range(poi_items)
+    ]
+    return {
+        "time": (
+            TimeInput(timezone="Asia/Shanghai"),
+            TimeOutput(
+                timezone="Asia/Shanghai", iso="2026-10-19T14:03:27+08:00", epoch_seconds=1792389807
+            ),
+        ),
+        "weather": (
+            WeatherInput(city="北京", units="metric", lang="zh_cn"),
+            WeatherOutput(
+                source="openweather",
+                city="Beijing",
+                lat=39.9075,
+                lon=116.3972,
+                description="多云",
+                temperature_c=17.94,
+                feels_like_c=17.2,
+                humidity=48,
+                wind_speed=3.6,
+                observation_time="2026-10-19T06:00:00Z",
+            ),
+        ),
+        "poi": (
+            PoiInput(city="上海", keyword="咖啡", radius_m=3000, limit=min(poi_items, 50)),
+            PoiOutput(city="上海", keyword="咖啡", items=items),
+        ),
+    }
+
+
+def build_stages(tool: str, input_obj: Any, output_obj: Any) -> list[tuple[str, Callable[[], Any]]]:
+    """The hot-path stages for one tool call, each bound to its real input."""
+    spec = get_tool_spec(tool)
+    # The agent validates against models compiled from `/tools`, not the tool server's own.
+    catalog_tool = local_tool_catalog().get(tool)
+    if spec is None or catalog_tool is None:
+        raise KeyError(f"Unknown tool: {tool}")
+    body = json.dumps(input_obj.model_dump(exclude_none=True), ensure_ascii=False).encode()
+    payload = json.loads(body)
+
+    def build_response() -> ToolResponse:
+        return ToolResponse.model_construct(
+            ok=True,
+            data=output_obj,
+            error=None,
+            meta=ToolMeta(tool_name=tool, trace_id=TRACE_ID, latency_ms=42),
+        )
+
+    response = build_response()
+    wire = encode_tool_response(response)
+    received = from_json(wire)
+    validated = ToolResponse.model_validate(received)
+    max_tokens = AgentSettings().tool_message_max_tokens
+
+    def record() -> Any:
+        trace = build_trace(TRACE_ID, "bench")
+        record_tool_call(
+            trace,
+            tool_name=tool,
+            args=payload,
+            ok=True,
+            latency_ms=42,
+            result=validated.data,
+            error=None,
+        )
+        return trace
+
+    trace = record()
+    return [
+        ("server.request_json", lambda: json.loads(body)),
+        ("server.input_validate", lambda: spec.input_model.model_validate(payload)),
+        ("server.response_build", build_response),
+        ("server.response_encode", lambda: encode_tool_response(response)),
+        ("broker.resp_json", lambda: from_json(wire)),
+        ("broker.response_validate", lambda: ToolResponse.model_validate(received)),
+        (
+            "broker.output_validate",
+            lambda: catalog_tool.output_model.model_validate(validated.data),
+        ),
+        (
+            "agent.tool_message",
+            lambda: encode_tool_message(tool, validated.data, max_tokens),
+        ),
+        ("agent.tool_message_raw", lambda: json.dumps(validated.data, ensure_ascii=False)),
+        ("agent.trace_record", record),
+        (
+            "agent.trace_dump",
+            lambda: json.dumps(asdict(trace), ensure_ascii=False, indent=2),
+        ),
+    ]
+
+
+def measure(
+    fn: Callable[[], Any], *, repeat: int = 3, number: int | None = None
+) -> tuple[float, int, int]:
+    """(ns/op, peak bytes allocated during one op, bytes held by its result)."""
+    timer = timeit.Timer(fn)
+    if number is None:
+        number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+    ns_per_op = best / number * 1e9
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()  # warm caches so one-off allocations are not charged to the op
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = fn()
+        held, peak = tracemalloc.get_traced_memory()
+        del result
+    finally:
+        tracemalloc.stop()
+    return ns_per_op, peak - before, held - before
+
+
+def run_suite(
+    *,
+    tools: list[str] | None = None,
+    stages: list[str] | None = None,
+    poi_items: int = 50,
+    repeat: int = 3,
+    number: int | None = None,
+) -> list[StageResult]:
+    calls = sample_calls(poi_items)
+    set_tool_catalog(local_tool_catalog())  # tool messages are projected via the catalog
+    registered = [spec.name for spec in list_tool_specs()]
+    missing = [name for name in registered if name not in calls]
+    if missing:
+        raise KeyError(f"No benchmark payload for tools: {missing} (add them to sample_calls)")
+
+    results = []
+    for tool in tools or registered:
+        input_obj, output_obj = calls[tool]
+        for stage, fn in build_stages(tool, input_obj, output_obj):
+            if stages and not any(fnmatch.fnmatch(stage, pattern) for pattern in stages):
+                continue
+            ns_per_op, peak, held = measure(fn, repeat=repeat, number=number)
+            results.append(
+                StageResult(tool, stage, round(ns_per_op, 1), peak, held, _payload_size(fn))
+            )
+    return results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="benchmarks.serialization", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("--tools", help="Comma-separated tools (default: all registered)")
+    parser.add_argument(
+        "--stage",
+        action="append",
+        default=[],
+        help="Stage name or glob, e.g. 'server.*' (repeatable; default: all)",
+    )
+    parser.add_argument("--poi-items", type=int, default=50, help="Items in the POI output")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per stage (best wins)")
+    parser.add_argument("--number", type=int, help="Ops per timing run (default: autorange)")
+    parser.add_argument("-o", "--output", type=Path, help="Also write the results as JSON")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    tools = [name.strip() for name in args.tools.split(",")] if args.tools else None
+    results = run_suite(
+        tools=tools,
+        stages=args.stage or None,
+        poi_items=args.poi_items,
+        repeat=args.repeat,
+        number=args.number,
+    )
+    _print_table(results)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        document = {"meta": _meta(args), "results": [asdict(result) for result in results]}
+        args.output.write_text(json.dumps(document, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\nresults: {args.output}")
+    return 0
+
+
+def _payload_size(fn: Callable[[], Any]) -> int | None:
+    value = fn()
+    if isinstance(value, (bytes, str)):
+        return len(value.encode() if isinstance(value, str) else value)
+    return None
+
+
+def _meta(args: argparse.Namespace) -> dict[str, Any]:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "pydantic": pydantic.VERSION,
+        "fastapi": fastapi.__version__,
+        "poi_items": args.poi_items,
+        "repeat": args.repeat,
+    }
+
+
+def _print_table(results: list[StageResult]) -> None:
+    print(f"{'tool':<9}{'stage':<28}{'ns/op':>12}{'peak B':>10}{'held B':>9}{'out B':>8}")
+    for r in results:
+        size = "-" if r.payload_bytes is None else str(r.payload_bytes)
+        print(
+            f"{r.tool:<9}{r.stage:<28}{r.ns_per_op:>12,.0f}{r.peak_bytes:>10}"
+            f"{r.result_bytes:>9}{size:>8}"
+        )
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,193 @@
+"""Local benchmark stack: fake upstreams, fake LLM, tool server and agent server.
+
+Each service runs as its own process (as in production, so they do not share
+a GIL with the load generator) on a free local port, wired together through
+their base-URL settings. Logs go to `<workdir>/<service>.log`; the agent
+writes traces to `<workdir>/traces` for the per-phase breakdown.
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Self
+
+import httpx
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+
+
+@dataclass
+class StackConfig:
+    seed: int = 0
+    llm_latency_p50_ms: float = 50.0
+    llm_latency_p99_ms: float = 250.0
+    llm_error_rate: float = 0.0
+    upstream_latency_p50_ms: float = 20.0
+    upstream_latency_p99_ms: float = 120.0
+    upstream_error_rate: float = 0.0
+    # Extra A2A_MCP_* settings for the agent server (e.g. to benchmark a feature flag).
+    agent_env: dict[str, str] = field(default_factory=dict)
+
+    def as_dict(self) -> dict[str, Any]:
+        return dict(self.__dict__)
+
+
+class LocalStack:
+    def __init__(
+        self, config: StackConfig, workdir: Path, *, startup_timeout_s: float = 30.0
+    ) -> None:
+        self.config = config
+        self.workdir = workdir
+        self.trace_dir = workdir / "traces"
+        self.startup_timeout_s = startup_timeout_s
+        self._procs: list[tuple[str, subprocess.Popen[bytes]]] = []
+        self.ports = {name: _free_port() for name in ("upstreams", "llm", "tools", "agent")}
+
+    @property
+    def agent_url(self) -> str:
+        return f"http://127.0.0.1:{self.ports['agent']}"
+
+    def __enter__(self) -> Self:
+        self.workdir.mkdir(parents=True, exist_ok=True)
+        try:
+            self._start()
+        except BaseException:
+            self.stop()
+            raise
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.stop()
+
+    def stop(self) -> None:
+        for _name, proc in reversed(self._procs):
+            proc.terminate()
+        for _name, proc in self._procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        self._procs.clear()
+
+    def _start(self) -> None:
+        cfg, ports = self.config, self.ports
+        upstream_url = f"http://127.0.0.1:{ports['upstreams']}"
+        self._spawn(
+            "upstreams",
+            "fakes.upstreams",
+            {
+                "A2A_MCP_FAKE_UPSTREAM_PORT": ports["upstreams"],
+                "A2A_MCP_FAKE_UPSTREAM_SEED": cfg.seed,
+                "A2A_MCP_FAKE_UPSTREAM_LATENCY_P50_MS": cfg.upstream_latency_p50_ms,
+                "A2A_MCP_FAKE_UPSTREAM_LATENCY_P99_MS": cfg.upstream_latency_p99_ms,
+                "A2A_MCP_FAKE_UPSTREAM_ERROR_RATE": cfg.upstream_error_rate,
+            },
+            f"{upstream_url}/metrics",
+        )
+        self._spawn(
+            "llm",
+            "fakes.llm",
+            {
+                "A2A_MCP_FAKE_LLM_PORT": ports["llm"],
+                "A2A_MCP_FAKE_LLM_SEED": cfg.seed,
+                "A2A_MCP_FAKE_LLM_LATENCY_P50_MS": cfg.llm_latency_p50_ms,
+                "A2A_MCP_FAKE_LLM_LATENCY_P99_MS": cfg.llm_latency_p99_ms,
+                "A2A_MCP_FAKE_LLM_ERROR_RATE": cfg.llm_error_rate,
+            },
+            f"http://127.0.0.1:{ports['llm']}/metrics",
+        )
+        self._spawn(
+            "tools",
+            "tool_server.server",
+            {
+                "A2A_MCP_TOOL_HOST": "127.0.0.1",
+                "A2A_MCP_TOOL_PORT": ports["tools"],
+                "AMAP_API_KEY": "fake",
+                "OPENWEATHER_API_KEY": "fake",
+                "A2A_MCP_AMAP_BASE_URL": f"{upstream_url}/v3",
+                "A2A_MCP_OPENWEATHER_BASE_URL": f"{upstream_url}/data/2.5",
+                "A2A_MCP_LOG_LEVEL": "WARNING",
+            },
+            f"http://127.0.0.1:{ports['tools']}/health",
+        )
+        self._spawn(
+            "agent",
+            "agent_server.main",
+            {
+                "A2A_MCP_AGENT_HOST": "127.0.0.1",
+                "A2A_MCP_AGENT_PORT": ports["agent"],
+                "A2A_MCP_MCP_BASE_URL": f"http://127.0.0.1:{ports['tools']}",
+                "OPENAI_API_KEY": "fake",
+                "OPENAI_BASE_URL": f"http://127.0.0.1:{ports['llm']}/v1",
+                "A2A_MCP_MOCK_LLM": "false",
+                "A2A_MCP_TRACE_ENABLED": "true",
+                "A2A_MCP_TRACE_DIR": str(self.trace_dir),
+                "A2A_MCP_LOG_LEVEL": "WARNING",
+                **cfg.agent_env,
+            },
+            f"{self.agent_url}/health",
+        )
+
+    def _spawn(self, name: str, module: str, env: dict[str, Any], ready_url: str) -> None:
+        proc = start_service(name, module, env, ready_url, self.workdir, self.startup_timeout_s)
+        self._procs.append((name, proc))
+
+
+def start_service(
+    name: str,
+    module: str,
+    env: dict[str, Any],
+    ready_url: str,
+    workdir: Path,
+    startup_timeout_s: float = 30.0,
+    *,
+    uds: str | None = None,
+) -> subprocess.Popen[bytes]:
+    """Run `python -m module` with `env`; return once `ready_url` (over `uds`, if set) is up."""
+    pythonpath = [str(SRC_DIR), os.environ.get("PYTHONPATH")]
+    proc_env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, pythonpath)),
+        "A2A_MCP_RELOAD": "false",
+        **{key: str(value) for key, value in env.items()},
+    }
+    log = (workdir / f"{name}.log").open("wb")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", module], env=proc_env, stdout=log, stderr=subprocess.STDOUT
+    )
+    try:
+        _wait_ready(name, proc, ready_url, startup_timeout_s, uds)
+    except BaseException:
+        proc.kill()
+        raise
+    return proc
+
+
+def _wait_ready(
+    name: str, proc: subprocess.Popen[bytes], url: str, timeout_s: float, uds: str | None
+) -> None:
+    deadline = time.monotonic() + timeout_s
+    transport = httpx.HTTPTransport(uds=uds) if uds else None
+    with httpx.Client(transport=transport, timeout=1.0, trust_env=False) as client:
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                raise RuntimeError(f"{name} exited with code {proc.returncode} during startup")
+            try:
+                if client.get(url).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.1)
+    raise RuntimeError(f"{name} not ready after {timeout_s}s ({url})")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
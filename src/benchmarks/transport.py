@@ -0,0 +1,145 @@
+"""Tool-call latency by transport: TCP, Unix domain socket and in-process.
+
+    PYTHONPATH=src python -m benchmarks.transport --calls 2000 --concurrency 1,16
+
+Starts one tool server on a TCP port and one on a Unix socket
+(`A2A_MCP_TOOL_UDS`), then drives `ToolBroker.call_tool` against each (pooled
+keep-alive clients) and against `inproc`, at each concurrency. The `time` tool
+needs no upstream, so the numbers are the per-call transport and server
+overhead the agent pays.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import tempfile
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any
+
+from agent_server.logging import set_log_level
+from agent_server.settings import AgentSettings
+from agent_server.tool_broker import ToolBroker
+from agent_server.tool_client import close_tool_clients
+
+from .load import latency_stats
+from .stack import _free_port, start_service
+
+TOOL_ARGS = {"timezone": "Asia/Shanghai"}
+
+
+async def run_transport(
+    base_url: str, *, calls: int, concurrency: int, warmup: int = 50
+) -> dict[str, Any]:
+    settings = AgentSettings(mcp_base_url=base_url, tool_max_concurrency=max(concurrency, 1))
+    broker = ToolBroker(settings)
+    counter = itertools.count()
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker(total: int, record: bool) -> None:
+        nonlocal errors
+        while next(counter) < total:
+            started = time.perf_counter()
+            response = await broker.call_tool("time", TOOL_ARGS, "bench-transport")
+            if record:
+                latencies.append((time.perf_counter() - started) * 1e6)
+                errors += not response.ok
+
+    try:
+        await asyncio.gather(*(worker(warmup, False) for _ in range(concurrency)))
+        counter = itertools.count()
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(calls, True) for _ in range(concurrency)))
+        wall_s = time.perf_counter() - started
+    finally:
+        await close_tool_clients()
+    return {
+        "calls": len(latencies),
+        "errors": errors,
+        "calls_per_s": round(len(latencies) / wall_s, 1),
+        "latency_us": latency_stats(sorted(latencies)),
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="benchmarks.transport", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("--calls", type=int, default=2000, help="Measured calls per scenario")
+    parser.add_argument("--concurrency", default="1,16", help="Comma-separated concurrencies")
+    parser.add_argument("--transports", default="tcp,uds,inproc", help="Subset of tcp,uds,inproc")
+    parser.add_argument("-o", "--output", type=Path, help="Also write the results as JSON")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    transports = [name.strip() for name in args.transports.split(",")]
+    concurrencies = [int(part) for part in args.concurrency.split(",") if part.strip()]
+    set_log_level("WARNING")
+
+    results: dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="a2a-bench-") as tmp, ExitStack() as stack:
+        workdir = Path(tmp)
+        base_urls = _start_tool_servers(transports, workdir, stack)
+        for name in transports:
+            for concurrency in concurrencies:
+                results[f"{name}_c{concurrency}"] = asyncio.run(
+                    run_transport(base_urls[name], calls=args.calls, concurrency=concurrency)
+                )
+
+    print(f"{'scenario':<14}{'calls/s':>10}{'p50 us':>10}{'p90 us':>10}{'p99 us':>10}{'err':>6}")
+    for name, r in results.items():
+        lat = r["latency_us"]
+        print(
+            f"{name:<14}{r['calls_per_s']:>10,.0f}{lat['p50']:>10,.0f}"
+            f"{lat['p90']:>10,.0f}{lat['p99']:>10,.0f}{r['errors']:>6}"
+        )
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\nresults: {args.output}")
+    return 0
+
+
+def _start_tool_servers(transports: list[str], workdir: Path, stack: ExitStack) -> dict[str, str]:
+    base_urls = {"inproc": "inproc"}
+    env = {"A2A_MCP_LOG_LEVEL": "WARNING", "A2A_MCP_TOOL_HOST": "127.0.0.1"}
+    if "tcp" in transports:
+        port = _free_port()
+        proc = start_service(
+            "tools-tcp",
+            "tool_server.server",
+            {**env, "A2A_MCP_TOOL_PORT": port},
+            f"http://127.0.0.1:{port}/health",
+            workdir,
+        )
+        stack.callback(_stop, proc)
+        base_urls["tcp"] = f"http://127.0.0.1:{port}"
+    if "uds" in transports:
+        path = str(workdir / "tools.sock")
+        proc = start_service(
+            "tools-uds",
+            "tool_server.server",
+            {**env, "A2A_MCP_TOOL_UDS": path},
+            "http://tool-server/health",
+            workdir,
+            uds=path,
+        )
+        stack.callback(_stop, proc)
+        base_urls["uds"] = f"unix://{path}"
+    return base_urls
+
+
+def _stop(proc: Any) -> None:
+    proc.terminate()
+    proc.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
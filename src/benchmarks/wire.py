@@ -0,0 +1,130 @@
+"""Tool response wire formats: payload size and encode/decode CPU versus JSON.
+
+    PYTHONPATH=src python -m benchmarks.wire --poi-items 50
+
+For every registered tool's output (payloads from `benchmarks.serialization`)
+wrapped in its response envelope, compares the formats the tool server can
+send the broker: JSON (`encode_tool_response` / `from_json`), MessagePack
+(needs the optional `msgpack` package) and each of them gzip-compressed as
+`GZipMiddleware` would (level 9). Encode is the tool server side, decode the
+broker side; both report ns/op.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from pydantic_core import from_json
+
+from common.wire import msgpack_available, pack, unpack
+from tool_server.schemas import ToolMeta, ToolResponse, encode_tool_response
+from tool_server.tools import list_tool_specs
+
+from .serialization import TRACE_ID, measure, sample_calls
+
+GZIP_LEVEL = 9  # Starlette's GZipMiddleware default
+
+
+@dataclass
+class FormatResult:
+    tool: str
+    format: str
+    size_bytes: int
+    size_ratio: float
+    encode_ns: float
+    decode_ns: float
+
+
+def formats(
+    response: ToolResponse,
+) -> dict[str, tuple[Callable[[], bytes], Callable[[bytes], Any]]]:
+    """format -> (encode the response, decode the bytes) as server and broker do."""
+    codecs: dict[str, tuple[Callable[[], bytes], Callable[[bytes], Any]]] = {
+        "json": (lambda: encode_tool_response(response), from_json),
+    }
+    if msgpack_available():
+        codecs["msgpack"] = (lambda: pack(response.model_dump(mode="json")), unpack)
+    for name, (encode, decode) in list(codecs.items()):
+        codecs[f"{name}+gzip"] = _gzipped(encode, decode)
+    return codecs
+
+
+def run_suite(
+    *, poi_items: int = 50, repeat: int = 3, number: int | None = None
+) -> list[FormatResult]:
+    calls = sample_calls(poi_items)
+    results = []
+    for spec in list_tool_specs():
+        _, output_obj = calls[spec.name]
+        response = ToolResponse.model_construct(
+            ok=True,
+            data=output_obj,
+            error=None,
+            meta=ToolMeta(tool_name=spec.name, trace_id=TRACE_ID, latency_ms=42),
+        )
+        json_size = None
+        for name, (encode, decode) in formats(response).items():
+            body = encode()
+            json_size = json_size or len(body)
+            encode_ns, _, _ = measure(encode, repeat=repeat, number=number)
+            # partial binds this iteration's codec and body (a lambda would see the last ones).
+            decode_ns, _, _ = measure(partial(decode, body), repeat=repeat, number=number)
+            results.append(
+                FormatResult(
+                    tool=spec.name,
+                    format=name,
+                    size_bytes=len(body),
+                    size_ratio=round(len(body) / json_size, 3),
+                    encode_ns=round(encode_ns, 1),
+                    decode_ns=round(decode_ns, 1),
+                )
+            )
+    return results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="benchmarks.wire", description=__doc__.splitlines()[0])
+    parser.add_argument("--poi-items", type=int, default=50, help="Items in the POI output")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per codec (best wins)")
+    parser.add_argument("--number", type=int, help="Ops per timing run (default: autorange)")
+    parser.add_argument("-o", "--output", type=Path, help="Also write the results as JSON")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if not msgpack_available():
+        print("msgpack is not installed; comparing JSON only")
+    results = run_suite(poi_items=args.poi_items, repeat=args.repeat, number=args.number)
+    print(f"{'tool':<9}{'format':<14}{'bytes':>8}{'vs json':>9}{'encode ns':>12}{'decode ns':>12}")
+    for r in results:
+        print(
+            f"{r.tool:<9}{r.format:<14}{r.size_bytes:>8}{r.size_ratio:>9.2f}"
+            f"{r.encode_ns:>12,.0f}{r.decode_ns:>12,.0f}"
+        )
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        document = {"poi_items": args.poi_items, "results": [asdict(r) for r in results]}
+        args.output.write_text(json.dumps(document, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\nresults: {args.output}")
+    return 0
+
+
+def _gzipped(
+    encode: Callable[[], bytes], decode: Callable[[bytes], Any]
+) -> tuple[Callable[[], bytes], Callable[[bytes], Any]]:
+    return (
+        lambda: gzip.compress(encode(), compresslevel=GZIP_LEVEL),
+        lambda body: decode(gzip.decompress(body)),
+    )
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
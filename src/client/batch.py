@@ -0,0 +1,248 @@
+"""Batch runner: stream a JSONL workload through `POST /v1/ask:batch`.
+
+Each input line is a JSON object with a `query` (plus optional `id`,
+`conversation_id`, `tenant`, `priority`); a plain string line is taken as the
+query. Lines without an `id` are identified by their line number. Rows the
+server would reject (bad JSON, no `query`, non-string fields) are not sent:
+each is written as its own failed result, so they cannot fail a whole chunk.
+
+Results are appended to the output JSONL as they arrive and flushed per line,
+so the output file is the checkpoint: with `--resume` (the default) ids that
+already have an `ok` result are skipped and failed ones are retried.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from .settings import get_settings
+
+
+def build_parser() -> argparse.ArgumentParser:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(
+        prog="cli batch", description="Run a JSONL file of queries through the agent server"
+    )
+    parser.add_argument("input", help="Input JSONL file")
+    parser.add_argument("-o", "--output", help="Output JSONL file (default: <input>.results.jsonl)")
+    parser.add_argument(
+        "--agent-url", default=settings.agent_base_url, help="Agent server base URL"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=settings.timeout_s,
+        help="Seconds to wait for the next result",
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=100, help="Items per /v1/ask:batch request"
+    )
+    parser.add_argument("--chunks-in-flight", type=int, default=2, help="Concurrent batch requests")
+    parser.add_argument(
+        "--concurrency", type=int, default=None, help="Per-batch concurrency (server caps it)"
+    )
+    parser.add_argument(
+        "--no-resume", dest="resume", action="store_false", help="Start over instead of resuming"
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    output = Path(args.output or f"{Path(args.input).with_suffix('')}.results.jsonl")
+    summary = asyncio.run(run(args, Path(args.input), output))
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 0 if summary["failed"] == 0 else 1
+
+
+async def run(
+    args: argparse.Namespace,
+    input_path: Path,
+    output_path: Path,
+    client: httpx.AsyncClient | None = None,
+) -> dict[str, Any]:
+    done = load_done_ids(output_path) if args.resume else set()
+    rows = (item for item in read_items(input_path) if item["id"] not in done)
+    latencies: list[int] = []
+    counts = {"ok": 0, "failed": 0}
+    started = time.perf_counter()
+
+    owns_client = client is None
+    if client is None:
+        # Avoid inheriting system proxy settings that can break localhost calls.
+        client = httpx.AsyncClient(timeout=args.timeout, trust_env=False)
+    slots = asyncio.Semaphore(max(args.chunks_in_flight, 1))
+
+    with output_path.open("a" if args.resume else "w", encoding="utf-8") as out:
+
+        def write(result: dict[str, Any]) -> None:
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            counts["ok" if result["ok"] else "failed"] += 1
+            if result["ok"]:
+                latencies.append(result.get("latency_ms") or 0)
+
+        def valid(items: Iterator[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+            for item in items:
+                if "error" in item:
+                    write({"id": item["id"], "ok": False, "error": item["error"]})
+                else:
+                    yield item
+
+        async def send(chunk: list[dict[str, Any]]) -> None:
+            try:
+                await _send_chunk(client, args, chunk, write)
+            finally:
+                slots.release()
+
+        senders: list[asyncio.Task[None]] = []
+        try:
+            for chunk in _chunks(valid(rows), max(args.chunk_size, 1)):
+                await slots.acquire()
+                senders.append(asyncio.create_task(send(chunk)))
+            await asyncio.gather(*senders)
+        finally:
+            for task in senders:
+                task.cancel()
+            if owns_client:
+                await client.aclose()
+
+    return _summary(counts, len(done), latencies, time.perf_counter() - started)
+
+
+def read_items(path: Path) -> Iterator[dict[str, Any]]:
+    """Batch items in file order; a row that would be rejected has an `error` instead."""
+    with path.open(encoding="utf-8") as handle:
+        for lineno, line in enumerate(handle, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield {"id": str(lineno), "error": f"invalid JSON: {exc}"}
+                continue
+            if isinstance(row, str):
+                row = {"query": row}
+            if not isinstance(row, dict):
+                yield {"id": str(lineno), "error": "row must be a JSON object or string"}
+                continue
+            error = _row_error(row)
+            if error is not None:
+                yield {"id": str(row.get("id", lineno)), "error": error}
+                continue
+            item = {
+                key: row[key]
+                for key in ("query", "conversation_id", "tenant", "priority")
+                if row.get(key) is not None
+            }
+            item["id"] = str(row.get("id", lineno))
+            yield item
+
+
+def _row_error(row: dict[str, Any]) -> str | None:
+    # Mirrors the server's AskRequest so a bad row never costs a chunk a 422.
+    query = row.get("query")
+    if query is None:
+        return "missing query"
+    if not isinstance(query, str) or not query:
+        return "query must be a non-empty string"
+    for key in ("conversation_id", "tenant", "priority"):
+        if row.get(key) is not None and not isinstance(row[key], str):
+            return f"{key} must be a string"
+    return None
+
+
+def load_done_ids(path: Path) -> set[str]:
+    """Ids with an ok result in an earlier (possibly interrupted) run."""
+    done: set[str] = set()
+    if not path.exists():
+        return done
+    with path.open(encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue  # a torn last line from an interrupted run
+            if result.get("ok"):
+                done.add(str(result["id"]))
+    return done
+
+
+async def _send_chunk(
+    client: httpx.AsyncClient,
+    args: argparse.Namespace,
+    chunk: list[dict[str, Any]],
+    write: Any,
+) -> None:
+    body: dict[str, Any] = {"items": chunk}
+    if args.concurrency:
+        body["concurrency"] = args.concurrency
+    pending = {item["id"] for item in chunk}
+    error = None
+    try:
+        async with client.stream("POST", f"{args.agent_url}/v1/ask:batch", json=body) as resp:
+            if resp.status_code >= 400:
+                error = f"HTTP {resp.status_code}: {(await resp.aread()).decode(errors='replace')}"
+            else:
+                async for line in resp.aiter_lines():
+                    if not line:
+                        continue
+                    result = json.loads(line)
+                    pending.discard(result["id"])
+                    write(result)
+    except httpx.HTTPError as exc:
+        error = f"{type(exc).__name__}: {exc}"
+    # Anything the server did not answer is recorded as failed, so a resume retries it.
+    for item_id in sorted(pending):
+        write({"id": item_id, "ok": False, "error": error or "no result"})
+
+
+def _chunks(items: Iterator[dict[str, Any]], size: int) -> Iterator[list[dict[str, Any]]]:
+    chunk: list[dict[str, Any]] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _summary(
+    counts: dict[str, int], skipped: int, latencies: list[int], wall_s: float
+) -> dict[str, Any]:
+    latencies.sort()
+    completed = counts["ok"] + counts["failed"]
+    return {
+        "completed": completed,
+        "ok": counts["ok"],
+        "failed": counts["failed"],
+        "skipped": skipped,
+        "wall_s": round(wall_s, 3),
+        "throughput_qps": round(completed / wall_s, 2) if wall_s > 0 else None,
+        "latency_ms": {
+            "p50": _percentile(latencies, 0.50),
+            "p90": _percentile(latencies, 0.90),
+            "p99": _percentile(latencies, 0.99),
+            "max": latencies[-1] if latencies else None,
+        },
+    }
+
+
+def _percentile(values: list[int], q: float) -> int | None:
+    if not values:
+        return None
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
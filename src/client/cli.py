@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import argparse
 import json
+import sys
 
 import httpx
 
@@ -17,15 +18,30 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--agent-url", default=settings.agent_base_url, help="Agent server base URL")
     parser.add_argument("--timeout", type=float, default=settings.timeout_s, help="Request timeout seconds")
     parser.add_argument("--verbose", action="store_true", help="Print tool calls and trace id")
+    parser.add_argument(
+        "--task",
+        action="store_true",
+        help="Submit as a background task and follow its progress events",
+    )
     return parser
 
 
 def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["batch"]:
+        # `cli batch <input.jsonl>`: run a JSONL workload (see client/batch.py).
+        from .batch import main as batch_main
+
+        return batch_main(argv[1:])
+
     parser = build_parser()
     args = parser.parse_args(argv)
 
-    url = f"{args.agent_url}/v1/ask"
     payload = {"query": args.query}
+    if args.task:
+        return _run_task(args, payload)
+
+    url = f"{args.agent_url}/v1/ask"
 
     # Avoid inheriting system proxy settings that can break localhost calls.
     try:
@@ -33,7 +49,7 @@ def main(argv: list[str] | None = None) -> int:
             resp = client.post(url, json=payload)
     except httpx.ReadTimeout:
         print("Request timed out. The server may still be processing the request.")
-        print("Try again with a longer timeout, e.g. --timeout 120")
+        print("Try again with a longer timeout, e.g. --timeout 120, or use --task")
         return 1
     if resp.status_code >= 400:
         print(f"Request failed: {resp.status_code}")
@@ -41,6 +57,46 @@ def main(argv: list[str] | None = None) -> int:
         return 1
 
     data = resp.json()
+    _print_answer(args, data)
+    return 0
+
+
+def _run_task(args: argparse.Namespace, payload: dict) -> int:
+    with httpx.Client(timeout=args.timeout, trust_env=False) as client:
+        resp = client.post(f"{args.agent_url}/v1/tasks", json=payload)
+        if resp.status_code >= 400:
+            print(f"Task submission failed: {resp.status_code}")
+            print(resp.text)
+            return 1
+        task_id = resp.json()["task_id"]
+        if args.verbose:
+            print(f"task_id: {task_id}")
+
+        final: dict = {}
+        url = f"{args.agent_url}/v1/tasks/{task_id}/events"
+        # --timeout applies to the gap between events, not to the whole task.
+        try:
+            with client.stream("GET", url) as stream:
+                for line in stream.iter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    event = json.loads(line[len("data: "):])
+                    if args.verbose and event["event"] not in {"completed", "failed", "canceled"}:
+                        print(f"[{event['event']}] {json.dumps(event['data'], ensure_ascii=False)}")
+                    final = event
+        except httpx.ReadTimeout:
+            print(f"No progress for {args.timeout}s; the task is still running.")
+            print(f"Check it later: GET {args.agent_url}/v1/tasks/{task_id}")
+            return 1
+
+    if final.get("event") != "completed":
+        print(f"Task {final.get('event', 'lost')}: {final.get('data', {}).get('error', '')}")
+        return 1
+    _print_answer(args, final["data"]["result"])
+    return 0
+
+
+def _print_answer(args: argparse.Namespace, data: dict) -> None:
     print(data.get("answer", ""))
 
     if args.verbose:
@@ -50,8 +106,6 @@ def main(argv: list[str] | None = None) -> int:
         print("\n--- tool_calls ---")
         print(json.dumps(data.get("tool_calls", []), ensure_ascii=False, indent=2))
 
-    return 0
-
 
 if __name__ == "__main__":
     raise SystemExit(main())
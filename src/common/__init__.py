@@ -0,0 +1,5 @@
+"""Infrastructure shared by the agent server and the tool server.
+
+Only generic plumbing lives here (logging, diagnostics). Service code may import
+from `common`, but `common` never imports from a service package.
+"""
@@ -0,0 +1,42 @@
+"""Access checks for admin-only features of both services.
+
+The `/admin/*` endpoints change process-wide state (log levels) and the
+`x-profile` header turns on cProfile for the whole process, so both are off
+unless an admin token is configured (`A2A_MCP_ADMIN_TOKEN`); callers then
+send it as `Authorization: Bearer <token>`.
+"""
+
+from __future__ import annotations
+
+import hmac
+
+
+class AdminAccessDenied(Exception):
+    def __init__(self, status_code: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def has_admin_token(expected: str | None, authorization: str | None) -> bool:
+    """True if `authorization` carries the configured token; never when none is set."""
+    if not expected:
+        return False
+    scheme, _, token = (authorization or "").partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(
+        token.strip().encode(), expected.encode()
+    )
+
+
+def admin_authorization(token: str | None) -> dict[str, str]:
+    """Headers that make a service-to-service call an admin call."""
+    return {"authorization": f"Bearer {token}"} if token else {}
+
+
+def check_admin_token(expected: str | None, authorization: str | None) -> None:
+    """Raise AdminAccessDenied unless `authorization` carries the configured token."""
+    if not expected:
+        # Disabled: answer like a route that does not exist.
+        raise AdminAccessDenied(404, "Not Found")
+    if not has_admin_token(expected, authorization):
+        raise AdminAccessDenied(401, "invalid admin token")
@@ -0,0 +1,45 @@
+"""Cancel request work when the HTTP client goes away.
+
+Starlette keeps running an endpoint after its client disconnects. For
+long-running handlers, `cancel_on_disconnect` runs the work as a task, polls
+`request.is_disconnected()` and cancels the task once the client is gone, so
+in-flight LLM, tool and upstream calls stop instead of burning capacity.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from collections.abc import Awaitable
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+# nginx convention for "client closed request".
+CLIENT_CLOSED_STATUS = 499
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+# A TypeVar rather than `def f[T]`: the module must stay importable on Python 3.11.
+async def cancel_on_disconnect(  # noqa: UP047
+    request: Any, work: Awaitable[T], poll_interval_s: float = 0.25
+) -> T:
+    """Await `work`; raise ClientDisconnected (after cancelling it) if the client leaves."""
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval_s)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                # Let the work unwind (e.g. write its cancelled trace) before returning.
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+                raise ClientDisconnected()
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
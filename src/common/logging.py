@@ -0,0 +1,278 @@
+"""Non-blocking structured logging shared by both services.
+
+Log calls on the request path only enqueue the record. A background thread
+formats records as JSON lines and writes them to stdout in batches, so a slow
+log consumer can no longer stall the event loop. The buffer is bounded: when it
+is full, records are dropped and counted instead of blocking the caller.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from typing import Any, TextIO
+
+DEFAULT_LEVEL = logging.INFO
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_FLUSH_INTERVAL_S = 0.2
+
+_STOP = object()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload: dict[str, Any] = {
+            "level": record.levelname,
+            "name": record.name,
+            "message": record.getMessage(),
+        }
+        if hasattr(record, "extra") and isinstance(record.extra, dict):
+            payload.update(record.extra)
+        sample_rate = getattr(record, "sample_rate", None)
+        if sample_rate is not None:
+            # Lets consumers re-weight counts of sampled events.
+            payload["sample_rate"] = sample_rate
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class BatchingQueueHandler(logging.Handler):
+    """Queue records and write them from a background thread in batches."""
+
+    def __init__(
+        self,
+        *,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval_s: float = DEFAULT_FLUSH_INTERVAL_S,
+        sample_rates: dict[str, float] | None = None,
+        stream: TextIO | None = None,
+    ) -> None:
+        super().__init__()
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.sample_rates: dict[str, float] = dict(sample_rates or {})
+        # None means "whatever sys.stdout is at write time" (plays well with capture).
+        self.stream = stream
+        self.dropped = 0
+        self.sampled_out = 0
+        self.written = 0
+        self.write_errors = 0
+        self._reported_dropped = 0
+        self._queue: queue.SimpleQueue[Any] = queue.SimpleQueue()
+        self._counter_lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+        self._worker_pid: int | None = None
+        self.setFormatter(JsonFormatter())
+
+    def emit(self, record: logging.LogRecord) -> None:
+        rate = self.sample_rates.get(str(record.msg))
+        if rate is not None and rate < 1.0:
+            if random.random() >= rate:
+                with self._counter_lock:
+                    self.sampled_out += 1
+                return
+            record.sample_rate = rate
+
+        if self._queue.qsize() >= self.queue_size:
+            with self._counter_lock:
+                self.dropped += 1
+            return
+
+        self._ensure_worker()
+        self._queue.put(record)
+
+    def flush(self, timeout: float = 2.0) -> None:
+        """Block until everything queued so far has been written."""
+        if not self._worker_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self) -> None:
+        if self._worker_alive() and self._worker is not None:
+            self._queue.put(_STOP)
+            self._worker.join(timeout=2.0)
+        self._worker = None
+        super().close()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "queue_size": self.queue_size,
+            "batch_size": self.batch_size,
+            "flush_interval_s": self.flush_interval_s,
+            "written": self.written,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+            "write_errors": self.write_errors,
+            "sample_rates": dict(self.sample_rates),
+        }
+
+    def _worker_alive(self) -> bool:
+        return (
+            self._worker is not None and self._worker.is_alive() and self._worker_pid == os.getpid()
+        )
+
+    def _ensure_worker(self) -> None:
+        if self._worker_alive():
+            return
+        with self._counter_lock:
+            if self._worker_alive():
+                return
+            # A forked child (e.g. uvicorn reload) inherits a dead thread handle.
+            self._worker_pid = os.getpid()
+            self._worker = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            items: list[Any] = []
+            try:
+                items.append(self._queue.get(timeout=self.flush_interval_s))
+            except queue.Empty:
+                pass
+            while items and len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = [item for item in items if isinstance(item, logging.LogRecord)]
+            self._write(records)
+            for item in items:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if any(item is _STOP for item in items):
+                return
+
+    def _write(self, records: list[logging.LogRecord]) -> None:
+        lines: list[str] = []
+        for record in records:
+            try:
+                lines.append(self.format(record))
+            except Exception:  # noqa: BLE001
+                self.write_errors += 1
+
+        dropped = self.dropped
+        if dropped > self._reported_dropped:
+            lines.append(
+                json.dumps(
+                    {
+                        "level": "WARNING",
+                        "name": "logging",
+                        "message": "log_records_dropped",
+                        "dropped": dropped - self._reported_dropped,
+                        "dropped_total": dropped,
+                    }
+                )
+            )
+            self._reported_dropped = dropped
+
+        if not lines:
+            return
+        stream = self.stream or sys.stdout
+        try:
+            stream.write("\n".join(lines) + "\n")
+            stream.flush()
+            self.written += len(records)
+        except Exception:  # noqa: BLE001
+            self.write_errors += 1
+
+
+_HANDLER = BatchingQueueHandler()
+_MANAGED_LOGGERS: set[str] = set()
+_level = DEFAULT_LEVEL
+atexit.register(_HANDLER.close)
+
+
+def get_logger(name: str) -> logging.Logger:
+    logger = logging.getLogger(name)
+    if logger.handlers:
+        return logger
+
+    logger.setLevel(_level)
+    logger.addHandler(_HANDLER)
+    logger.propagate = False
+    _MANAGED_LOGGERS.add(name)
+    return logger
+
+
+def set_log_level(level: str | int, name: str | None = None) -> int:
+    """Change the level of one managed logger, or of all of them when `name` is None."""
+    global _level
+    resolved = _resolve_level(level)
+    if name is not None:
+        if name not in _MANAGED_LOGGERS:
+            raise ValueError(f"Unknown logger: {name}")
+        logging.getLogger(name).setLevel(resolved)
+        return resolved
+
+    _level = resolved
+    for logger_name in _MANAGED_LOGGERS:
+        logging.getLogger(logger_name).setLevel(resolved)
+    return resolved
+
+
+def configure_logging(
+    *,
+    level: str | int | None = None,
+    queue_size: int | None = None,
+    batch_size: int | None = None,
+    flush_interval_s: float | None = None,
+    sample_rates: dict[str, float] | None = None,
+) -> None:
+    if level is not None:
+        set_log_level(level)
+    if queue_size is not None:
+        _HANDLER.queue_size = max(1, queue_size)
+    if batch_size is not None:
+        _HANDLER.batch_size = max(1, batch_size)
+    if flush_interval_s is not None:
+        _HANDLER.flush_interval_s = max(0.01, flush_interval_s)
+    if sample_rates is not None:
+        _HANDLER.sample_rates = dict(sample_rates)
+
+
+def configure_from_settings(settings: Any) -> None:
+    """Apply the `log_*` fields shared by the service settings classes."""
+    configure_logging(
+        level=settings.log_level,
+        queue_size=settings.log_queue_size,
+        batch_size=settings.log_batch_size,
+        flush_interval_s=settings.log_flush_interval_ms / 1000,
+        sample_rates=settings.log_sample_rates,
+    )
+
+
+def flush_logs(timeout: float = 2.0) -> None:
+    _HANDLER.flush(timeout)
+
+
+def logging_stats() -> dict[str, Any]:
+    stats = _HANDLER.stats()
+    stats["level"] = logging.getLevelName(_level)
+    stats["loggers"] = {
+        name: logging.getLevelName(logging.getLogger(name).level)
+        for name in sorted(_MANAGED_LOGGERS)
+    }
+    return stats
+
+
+def _resolve_level(level: str | int) -> int:
+    if isinstance(level, int):
+        return level
+    resolved = logging.getLevelNamesMapping().get(level.strip().upper())
+    if resolved is None:
+        raise ValueError(f"Unknown log level: {level}")
+    return resolved
@@ -0,0 +1,183 @@
+"""Event-loop lag monitor and blocking-code watchdog.
+
+A heartbeat task sleeps for `interval_s` and records how late it wakes up; the
+lateness is the event-loop lag, kept in a bounded window for percentiles. A
+watchdog thread checks that the heartbeat keeps advancing. When the loop stays
+blocked for longer than `stall_threshold_s`, the watchdog captures the stack
+of the loop thread (i.e. the blocking code) and logs it together with the trace
+id of the task that was running.
+
+Cost is one timer per interval and one thread wake-up per half threshold, so it
+is meant to stay on in production. In tests it doubles as an assertion helper:
+
+    async with LoopLagMonitor(stall_threshold_s=0.05) as monitor:
+        await code_under_test()
+    assert not monitor.stalls
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Self
+
+# Set by request handlers so stalls can be attributed to a trace.
+trace_id_var: ContextVar[str | None] = ContextVar("trace_id", default=None)
+# Task -> trace id, readable from the watchdog thread (a task's context is not,
+# before Python 3.12).
+_task_trace_ids: weakref.WeakKeyDictionary[asyncio.Task[Any], str] = weakref.WeakKeyDictionary()
+
+
+def bind_trace_id(trace_id: str) -> None:
+    trace_id_var.set(trace_id)
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        _task_trace_ids[task] = trace_id
+
+
+class LoopLagMonitor:
+    def __init__(
+        self,
+        *,
+        interval_s: float = 0.1,
+        stall_threshold_s: float = 0.2,
+        window: int = 2048,
+        stack_limit: int = 30,
+        max_stalls: int = 50,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        self.interval_s = interval_s
+        self.stall_threshold_s = stall_threshold_s
+        self.stack_limit = stack_limit
+        self.stalls: deque[dict[str, Any]] = deque(maxlen=max_stalls)
+        self.stall_count = 0
+        self._lags: deque[float] = deque(maxlen=window)
+        self._logger = logger
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self._expected_beat = 0.0
+        self._reported_beat = -1.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start monitoring the running loop; must be called from that loop."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stopped.clear()
+        self._expected_beat = time.perf_counter() + self.interval_s
+        self._task = self._loop.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+    async def __aenter__(self) -> Self:
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        # Give the heartbeat one more tick so a stall at the very end is measured.
+        await asyncio.sleep(0)
+        await self.stop()
+
+    def stats(self) -> dict[str, Any]:
+        lags = sorted(self._lags)
+        return {
+            "enabled": self.running,
+            "interval_ms": int(self.interval_s * 1000),
+            "stall_threshold_ms": int(self.stall_threshold_s * 1000),
+            "samples": len(lags),
+            "p50_ms": _percentile_ms(lags, 0.50),
+            "p90_ms": _percentile_ms(lags, 0.90),
+            "p99_ms": _percentile_ms(lags, 0.99),
+            "max_ms": round(lags[-1] * 1000, 2) if lags else None,
+            "stalls": self.stall_count,
+            "recent_stalls": [
+                {key: stall[key] for key in ("blocked_ms", "trace_id", "detected_at")}
+                for stall in self.stalls
+            ],
+        }
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_s)
+            now = time.perf_counter()
+            lag = max(0.0, now - self._expected_beat)
+            self._lags.append(lag)
+            self._expected_beat = now + self.interval_s
+
+    def _watch(self) -> None:
+        check_every = max(0.005, min(self.interval_s, self.stall_threshold_s) / 2)
+        while not self._stopped.wait(check_every):
+            expected = self._expected_beat
+            overdue = time.perf_counter() - expected
+            if overdue < self.stall_threshold_s or expected == self._reported_beat:
+                continue
+            # Report each stall once, while the loop thread is still inside it.
+            self._reported_beat = expected
+            self._report_stall(overdue)
+
+    def _report_stall(self, overdue_s: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id or -1)
+        stack = traceback.format_stack(frame, limit=self.stack_limit) if frame else []
+        stall = {
+            "blocked_ms": int(overdue_s * 1000),
+            "trace_id": self._running_trace_id(),
+            "detected_at": time.time(),
+            "stack": [line.rstrip() for line in stack],
+        }
+        self.stalls.append(stall)
+        self.stall_count += 1
+        if self._logger is not None:
+            self._logger.warning("event_loop_blocked", extra={"extra": stall})
+
+    def _running_trace_id(self) -> str | None:
+        if self._loop is None:
+            return None
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            return None
+        if task is None:
+            return None
+        trace_id = _task_trace_ids.get(task)
+        if trace_id is None and hasattr(task, "get_context"):
+            # Child tasks inherit the context var but are not registered.
+            trace_id = task.get_context().get(trace_id_var)
+        return trace_id
+
+
+def _percentile_ms(sorted_values: list[float], q: float) -> float | None:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(q * len(sorted_values)))
+    return round(sorted_values[index] * 1000, 2)
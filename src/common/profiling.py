@@ -0,0 +1,147 @@
+"""Opt-in per-request profiling.
+
+A request is profiled when it is picked by a sampling rate, or when an admin
+caller (see `common.admin`) sends `x-profile: 1`; the header is ignored from
+anyone else, so it cannot keep the profiler running for the whole process. Overhead is capped in three ways: at most one profile runs
+per process at a time (others are skipped), profiling switches itself off after
+`max_duration_s`, and only the top `top_n` frames are kept in the summary.
+
+Note that the profiler observes the event loop thread, so work from other
+requests interleaved on the same loop shows up in the profile as well.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import os
+import pstats
+import random
+import threading
+import time
+from typing import Any
+
+PROFILE_HEADER = "x-profile"
+_TRUTHY = {"1", "true", "yes", "on"}
+_MAX_FRAME_LABEL = 160
+
+# cProfile cannot nest, and concurrent profiles would double the overhead.
+_ACTIVE = threading.Lock()
+
+
+def should_profile(header_value: str | None, sample_rate: float, *, admin: bool = False) -> bool:
+    if admin and header_value is not None and header_value.strip().lower() in _TRUTHY:
+        return True
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+class RequestProfiler:
+    def __init__(self, *, top_n: int = 20, max_duration_s: float = 10.0) -> None:
+        self.top_n = top_n
+        self.max_duration_s = max_duration_s
+        self.captured = False
+        self.truncated = False
+        self.skipped: str | None = None
+        self._profile: cProfile.Profile | None = None
+        self._enabled = False
+        self._holds_lock = False
+        self._started_at = 0.0
+        self._duration_ms = 0
+        self._cutoff: asyncio.TimerHandle | None = None
+
+    def start(self) -> bool:
+        if not _ACTIVE.acquire(blocking=False):
+            self.skipped = "busy"
+            return False
+        self._holds_lock = True
+        self._profile = cProfile.Profile()
+        try:
+            self._profile.enable()
+        except ValueError:
+            # Another profiler or tracer (e.g. a debugger) owns the hook.
+            self._release()
+            self._profile = None
+            self.skipped = "profiler_unavailable"
+            return False
+
+        self._enabled = True
+        self._started_at = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None:
+            self._cutoff = loop.call_later(self.max_duration_s, self._hit_time_cap)
+        return True
+
+    def stop(self) -> dict[str, Any]:
+        if self._cutoff is not None:
+            self._cutoff.cancel()
+            self._cutoff = None
+        if self._enabled:
+            self._disable()
+        self._release()
+        return self.summary()
+
+    def summary(self) -> dict[str, Any]:
+        if self._profile is None:
+            return {"enabled": False, "skipped": self.skipped}
+
+        entries: list[dict[str, Any]] = []
+        stats = pstats.Stats(self._profile)
+        for (filename, lineno, funcname), (
+            _cc,
+            ncalls,
+            tottime,
+            cumtime,
+            _callers,
+        ) in stats.stats.items():  # type: ignore[attr-defined]
+            entries.append(
+                {
+                    "frame": _frame_label(filename, lineno, funcname),
+                    "calls": ncalls,
+                    "self_ms": round(tottime * 1000, 3),
+                    "cumulative_ms": round(cumtime * 1000, 3),
+                }
+            )
+        by_cumulative = sorted(entries, key=lambda e: e["cumulative_ms"], reverse=True)
+        by_self = sorted(entries, key=lambda e: e["self_ms"], reverse=True)
+        return {
+            "enabled": True,
+            "duration_ms": self._duration_ms,
+            "truncated": self.truncated,
+            "frames_total": len(entries),
+            "top_cumulative": by_cumulative[: self.top_n],
+            "top_self": by_self[: self.top_n],
+        }
+
+    def dump(self, path: str | os.PathLike[str]) -> None:
+        """Write raw pstats data for offline analysis (snakeviz, pstats)."""
+        if self._profile is not None:
+            self._profile.dump_stats(str(path))
+
+    def _hit_time_cap(self) -> None:
+        self._cutoff = None
+        if self._enabled:
+            self.truncated = True
+            self._disable()
+
+    def _disable(self) -> None:
+        assert self._profile is not None
+        self._profile.disable()
+        self._enabled = False
+        self.captured = True
+        self._duration_ms = int((time.perf_counter() - self._started_at) * 1000)
+
+    def _release(self) -> None:
+        if self._holds_lock:
+            self._holds_lock = False
+            _ACTIVE.release()
+
+
+def _frame_label(filename: str, lineno: int, funcname: str) -> str:
+    if filename == "~":
+        label = funcname
+    else:
+        label = f"{funcname} ({os.path.basename(filename)}:{lineno})"
+    return label[:_MAX_FRAME_LABEL]
@@ -0,0 +1,111 @@
+"""Wire contract between the agent and the tool server.
+
+The response envelope every tool call returns, the LLM projection hints a tool
+publishes (`LlmView`) and the shape of the `GET /tools` documents. The tool
+server builds these from its tool specs; the agent only ever sees them through
+`/tools` and tool responses, so neither side imports the other's code.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from pydantic import BaseModel
+
+
+class ToolError(BaseModel):
+    """Normalized error payload returned by tools."""
+
+    code: str
+    message: str
+    details: dict[str, Any] | None = None
+
+
+class ToolMeta(BaseModel):
+    """Metadata attached to tool responses for observability."""
+
+    tool_name: str
+    trace_id: str
+    latency_ms: int | None = None
+    source: str | None = None
+
+
+class ToolResponse(BaseModel):
+    """Unified response wrapper for all tools."""
+
+    ok: bool
+    data: Any | None = None
+    error: ToolError | None = None
+    meta: ToolMeta
+
+
+def encode_tool_response(response: ToolResponse) -> bytes:
+    """JSON bytes of a response in one pass; `data` may still be the output model."""
+    return response.__pydantic_serializer__.to_json(response)
+
+
+def tool_data(response: ToolResponse) -> Any:
+    """`response.data` as plain data; a typed output model is dumped once, on first use."""
+    if isinstance(response.data, BaseModel):
+        response.data = response.data.model_dump()
+    return response.data
+
+
+@dataclass(frozen=True)
+class LlmView:
+    """Compact projection of a tool output used when feeding it back to the LLM."""
+
+    fields: tuple[str, ...] | None = None
+    list_field: str | None = None
+    item_fields: tuple[str, ...] | None = None
+    top_k: int | None = None
+    coord_decimals: int | None = None
+
+    @classmethod
+    def from_document(cls, document: Mapping[str, Any]) -> LlmView:
+        def names(key: str) -> tuple[str, ...] | None:
+            value = document.get(key)
+            return tuple(value) if value is not None else None
+
+        return cls(
+            fields=names("fields"),
+            list_field=document.get("list_field"),
+            item_fields=names("item_fields"),
+            top_k=document.get("top_k"),
+            coord_decimals=document.get("coord_decimals"),
+        )
+
+
+def satisfies_any_of(values: Mapping[str, Any], groups: Sequence[Sequence[str]]) -> bool:
+    """True if some group has every field set (strings must be non-blank)."""
+    if not groups:
+        return True
+    return any(all(_is_set(values.get(name)) for name in group) for group in groups)
+
+
+def openai_tool(document: Mapping[str, Any]) -> dict[str, Any]:
+    """OpenAI function-tool definition for one `/tools` document."""
+    return {
+        "type": "function",
+        "function": {
+            "name": document["name"],
+            "description": document["description"],
+            "parameters": document["input_schema"],
+        },
+    }
+
+
+def schema_version(documents: list[dict[str, Any]]) -> str:
+    """Short hash of the canonical `/tools` documents (also their ETag)."""
+    canonical = json.dumps(documents, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def _is_set(value: Any) -> bool:
+    if isinstance(value, str):
+        return bool(value.strip())
+    return value is not None
@@ -0,0 +1,70 @@
+"""Wire formats for tool calls between the agent's ToolBroker and the tool server.
+
+JSON is the default and what external callers get. The broker can ask for
+MessagePack instead (`Accept: application/msgpack`), which only saves bytes:
+`benchmarks.wire` measures 6,293 vs 7,510 bytes for 50 POIs (0.84x) and 314
+vs 372 for a weather report, while both encode and decode are slower than
+JSON. `msgpack` is an optional dependency: without it the server never offers
+MessagePack and the broker keeps asking for JSON.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MSGPACK_MEDIA_TYPES = frozenset(
+    {MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack"}
+)
+
+
+def msgpack_available() -> bool:
+    return msgpack is not None
+
+
+def accept_header(wire_format: str) -> str:
+    """Accept header for the broker's preferred format (JSON stays acceptable)."""
+    if wire_format == "msgpack" and msgpack is not None:
+        return f"{MSGPACK_MEDIA_TYPE}, {JSON_MEDIA_TYPE};q=0.5"
+    return JSON_MEDIA_TYPE
+
+
+def negotiate(accept: str | None) -> str:
+    """Response media type: MessagePack only if the caller lists it and it is installed."""
+    if msgpack is None or not accept:
+        return JSON_MEDIA_TYPE
+    for part in accept.split(","):
+        media, *params = (item.strip() for item in part.split(";"))
+        if media.lower() in _MSGPACK_MEDIA_TYPES and _quality(params) > 0:
+            return MSGPACK_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+def is_msgpack(content_type: str | None) -> bool:
+    media = (content_type or "").split(";", 1)[0].strip().lower()
+    return media in _MSGPACK_MEDIA_TYPES
+
+
+def pack(payload: Any) -> bytes:
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+def unpack(body: bytes) -> Any:
+    return msgpack.unpackb(body, raw=False)
+
+
+def _quality(params: list[str]) -> float:
+    for param in params:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
@@ -0,0 +1,5 @@
+"""Local stand-ins for the external services, for offline load and fault testing.
+
+Nothing here is imported by the services themselves; point them at a fake
+through their base-URL settings instead.
+"""
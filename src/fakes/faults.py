@@ -0,0 +1,64 @@
+"""Latency and failure injection shared by the fake services."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+
+# z-score of the 99th percentile of a standard normal distribution.
+_Z99 = 2.326
+
+
+class FaultInjector:
+    """Seeded latency / error / timeout decisions for each fake request.
+
+    Latency is log-normal, fitted to the given p50 and p99 (a constant when
+    p99 <= p50). `next()` sleeps for the sampled latency and returns
+    "error", "timeout" or None.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency_p50_ms: float = 0.0,
+        latency_p99_ms: float = 0.0,
+        error_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        hang_s: float = 600.0,
+        seed: int | None = 0,
+    ) -> None:
+        self.latency_p50_ms = latency_p50_ms
+        self.latency_p99_ms = latency_p99_ms
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.hang_s = hang_s
+        self._random = random.Random(seed)
+        self.errors = 0
+        self.timeouts = 0
+
+    def sample_latency_ms(self) -> float:
+        if self.latency_p50_ms <= 0:
+            return 0.0
+        if self.latency_p99_ms <= self.latency_p50_ms:
+            return self.latency_p50_ms
+        sigma = math.log(self.latency_p99_ms / self.latency_p50_ms) / _Z99
+        return self._random.lognormvariate(math.log(self.latency_p50_ms), sigma)
+
+    async def next(self) -> str | None:
+        roll = self._random.random()
+        latency_ms = self.sample_latency_ms()
+        if roll < self.timeout_rate:
+            self.timeouts += 1
+            # Hold the request open; the caller's timeout is what gets tested.
+            await asyncio.sleep(self.hang_s)
+            return "timeout"
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        if roll < self.timeout_rate + self.error_rate:
+            self.errors += 1
+            return "error"
+        return None
+
+    def stats(self) -> dict[str, int]:
+        return {"errors": self.errors, "timeouts": self.timeouts}
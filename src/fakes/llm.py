@@ -0,0 +1,273 @@
+"""Fake OpenAI-compatible chat-completions server.
+
+Lets the real agent loop (planner tool calls, argument parsing, retries, the
+responder pass) run offline and deterministically:
+
+    PYTHONPATH=src python -m fakes.llm
+    A2A_MCP_OPENAI_BASE_URL=http://127.0.0.1:7010/v1 OPENAI_API_KEY=fake ...
+
+Replies come from a script (fixed responses served in order) or from rules
+matched against the user query of the current turn:
+- planner requests (with `tools`) get the matching rule's `tool_calls`, or
+  its `content` once the turn already holds tool results;
+- a forced `tool_choice` always gets a call to that tool;
+- requests without tools (the responder) get an answer built from the tool
+  results of the turn.
+`stream: true` is answered with SSE chunks. Latency, errors and timeouts are
+injected by `FaultInjector`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import re
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from .faults import FaultInjector
+from .settings import FakeLlmSettings, get_llm_settings
+
+DEFAULT_RULES: list[dict[str, Any]] = [
+    {"match": r"时间|几点|time", "tool_calls": [{"name": "time", "arguments": {}}]},
+    {
+        "match": r"天气|weather",
+        "tool_calls": [{"name": "weather", "arguments": {"city": "{city}"}}],
+    },
+    {
+        "match": r"附近|景点|餐厅|好吃|poi",
+        "tool_calls": [{"name": "poi", "arguments": {"city": "{city}", "keyword": "景点"}}],
+    },
+]
+DEFAULT_ANSWER = "我可以帮你查时间、天气或附近 POI。请告诉我具体需求。"
+DEFAULT_CITY = "北京"
+
+_CITY_RE = re.compile(r"北京|上海|广州|深圳|杭州|成都|西安|重庆|南京|武汉|天津|苏州")
+_CITY_EN_RE = re.compile(r"\bin ([A-Z][a-zA-Z']+)")
+_STREAM_PIECE_CHARS = 8
+
+
+class FakeLlm:
+    def __init__(self, settings: FakeLlmSettings) -> None:
+        self.settings = settings
+        self.rules = _load_json(settings.rules_path) if settings.rules_path else DEFAULT_RULES
+        self._patterns = [re.compile(rule["match"], re.IGNORECASE) for rule in self.rules]
+        self.script = _load_json(settings.script_path) if settings.script_path else None
+        self.faults = FaultInjector(
+            latency_p50_ms=settings.latency_p50_ms,
+            latency_p99_ms=settings.latency_p99_ms,
+            error_rate=settings.error_rate,
+            timeout_rate=settings.timeout_rate,
+            hang_s=settings.hang_s,
+            seed=settings.seed,
+        )
+        self._steps = itertools.count()
+        self._ids = itertools.count(1)
+        self.requests = 0
+        self.tool_call_replies = 0
+
+    def reply(self, body: dict[str, Any]) -> dict[str, Any]:
+        """{"content": str | None, "tool_calls": [{"name", "arguments"}]} for a request."""
+        if self.script:
+            return self.script[next(self._steps) % len(self.script)]
+
+        turn = _current_turn(body.get("messages") or [])
+        query = next((str(m.get("content") or "") for m in turn if m.get("role") == "user"), "")
+        tool_results = [m for m in turn if m.get("role") == "tool"]
+        rule = self._match(query)
+
+        forced = body.get("tool_choice")
+        if isinstance(forced, dict):
+            name = forced.get("function", {}).get("name", "")
+            calls = [call for call in (rule or {}).get("tool_calls", []) if call["name"] == name]
+            return {
+                "content": None,
+                "tool_calls": _render(calls or [{"name": name, "arguments": {}}], query),
+            }
+        if body.get("tools") and not tool_results and rule and rule.get("tool_calls"):
+            return {"content": None, "tool_calls": _render(rule["tool_calls"], query)}
+        if tool_results:
+            return {"content": _answer_from_tools(tool_results), "tool_calls": []}
+        return {"content": (rule or {}).get("content", DEFAULT_ANSWER), "tool_calls": []}
+
+    def completion(self, body: dict[str, Any], reply: dict[str, Any]) -> dict[str, Any]:
+        tool_calls = self._tool_calls(reply)
+        if tool_calls:
+            self.tool_call_replies += 1
+        message: dict[str, Any] = {"role": "assistant", "content": reply.get("content")}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        return {
+            "id": f"chatcmpl-fake-{next(self._ids)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model") or self.settings.model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": message,
+                    "finish_reason": "tool_calls" if tool_calls else "stop",
+                }
+            ],
+            "usage": _usage(body, reply),
+        }
+
+    async def stream(self, body: dict[str, Any], reply: dict[str, Any]) -> AsyncIterator[str]:
+        completion = self.completion(body, reply)
+        message = completion["choices"][0]["message"]
+        base = {key: completion[key] for key in ("id", "created", "model")}
+        base["object"] = "chat.completion.chunk"
+
+        def chunk(delta: dict[str, Any], finish_reason: str | None = None) -> str:
+            choice = {"index": 0, "delta": delta, "finish_reason": finish_reason}
+            return f"data: {json.dumps({**base, 'choices': [choice]}, ensure_ascii=False)}\n\n"
+
+        delay_s = self.settings.stream_chunk_delay_ms / 1000
+        yield chunk({"role": "assistant", "content": ""})
+        content = message.get("content") or ""
+        for start in range(0, len(content), _STREAM_PIECE_CHARS):
+            if delay_s:
+                await asyncio.sleep(delay_s)
+            yield chunk({"content": content[start : start + _STREAM_PIECE_CHARS]})
+        for index, call in enumerate(message.get("tool_calls", [])):
+            if delay_s:
+                await asyncio.sleep(delay_s)
+            yield chunk({"tool_calls": [{"index": index, **call}]})
+        yield chunk({}, completion["choices"][0]["finish_reason"])
+        if (body.get("stream_options") or {}).get("include_usage"):
+            usage = {**base, "choices": [], "usage": completion["usage"]}
+            yield f"data: {json.dumps(usage)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "tool_call_replies": self.tool_call_replies,
+            **self.faults.stats(),
+        }
+
+    def _match(self, query: str) -> dict[str, Any] | None:
+        for rule, pattern in zip(self.rules, self._patterns):
+            if pattern.search(query):
+                return rule
+        return None
+
+    def _tool_calls(self, reply: dict[str, Any]) -> list[dict[str, Any]]:
+        return [
+            {
+                "id": f"call_fake_{next(self._ids)}",
+                "type": "function",
+                "function": {
+                    "name": call["name"],
+                    "arguments": json.dumps(call.get("arguments") or {}, ensure_ascii=False),
+                },
+            }
+            for call in reply.get("tool_calls") or []
+        ]
+
+
+def create_app(settings: FakeLlmSettings | None = None) -> FastAPI:
+    fake = FakeLlm(settings or get_llm_settings())
+    app = FastAPI(title="Fake OpenAI-compatible LLM")
+    app.state.fake = fake
+
+    @app.get("/v1/models")
+    def models() -> dict[str, Any]:
+        return {"object": "list", "data": [{"id": fake.settings.model, "object": "model"}]}
+
+    @app.get("/metrics")
+    def metrics() -> dict[str, Any]:
+        return fake.stats()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        fake.requests += 1
+        fault = await fake.faults.next()
+        if fault is not None:
+            return _error_response(fault, fake.settings.error_status)
+        reply = fake.reply(body)
+        if body.get("stream"):
+            return StreamingResponse(fake.stream(body, reply), media_type="text/event-stream")
+        return fake.completion(body, reply)
+
+    return app
+
+
+def _current_turn(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # Earlier turns of a conversation end with an assistant answer without tool calls.
+    for index in range(len(messages) - 1, -1, -1):
+        message = messages[index]
+        if message.get("role") == "assistant" and not message.get("tool_calls"):
+            return messages[index + 1 :]
+    return messages
+
+
+def _render(calls: list[dict[str, Any]], query: str) -> list[dict[str, Any]]:
+    city = _city(query)
+    rendered = []
+    for call in calls:
+        arguments = {
+            key: (
+                value.replace("{city}", city).replace("{query}", query)
+                if isinstance(value, str)
+                else value
+            )
+            for key, value in (call.get("arguments") or {}).items()
+        }
+        rendered.append({"name": call["name"], "arguments": arguments})
+    return rendered
+
+
+def _city(query: str) -> str:
+    match = _CITY_RE.search(query)
+    if match:
+        return match.group(0)
+    match = _CITY_EN_RE.search(query)
+    return match.group(1) if match else DEFAULT_CITY
+
+
+def _answer_from_tools(tool_results: list[dict[str, Any]]) -> str:
+    parts = [f"{m.get('name', 'tool')}: {str(m.get('content', ''))[:200]}" for m in tool_results]
+    return "根据工具结果：" + "；".join(parts)
+
+
+def _usage(body: dict[str, Any], reply: dict[str, Any]) -> dict[str, int]:
+    # ~4 characters per token, good enough for load accounting.
+    prompt = len(json.dumps(body.get("messages") or [], ensure_ascii=False)) // 4
+    completion = len(json.dumps(reply, ensure_ascii=False)) // 4
+    return {
+        "prompt_tokens": prompt,
+        "completion_tokens": completion,
+        "total_tokens": prompt + completion,
+    }
+
+
+def _error_response(fault: str, status_code: int) -> JSONResponse:
+    if fault == "timeout":
+        status_code = 504
+    error_type = "rate_limit_error" if status_code == 429 else "server_error"
+    headers = {"Retry-After": "1"} if status_code == 429 else None
+    body = {"error": {"message": f"injected {fault}", "type": error_type, "code": fault}}
+    return JSONResponse(body, status_code=status_code, headers=headers)
+
+
+def _load_json(path: str) -> Any:
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def main() -> None:
+    import uvicorn
+
+    settings = get_llm_settings()
+    uvicorn.run(create_app(settings), host=settings.host, port=settings.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Fake service configuration."""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from pathlib import Path
+
+from pydantic import AliasChoices, Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+ENV_FILE = Path(__file__).resolve().parents[2] / ".env"
+
+
+class FakeLlmSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file=str(ENV_FILE),
+        extra="ignore",
+        populate_by_name=True,
+    )
+
+    host: str = Field(default="127.0.0.1", validation_alias=AliasChoices("A2A_MCP_FAKE_LLM_HOST"))
+    port: int = Field(default=7010, validation_alias=AliasChoices("A2A_MCP_FAKE_LLM_PORT"))
+    model: str = Field(default="fake-gpt", validation_alias=AliasChoices("A2A_MCP_FAKE_LLM_MODEL"))
+
+    # JSON list of {"match": regex, "tool_calls": [...]} / {"match": regex, "content": ...};
+    # replaces the built-in rules.
+    rules_path: str | None = Field(
+        default=None,
+        validation_alias=AliasChoices("A2A_MCP_FAKE_LLM_RULES_PATH"),
+    )
+    # JSON list of responses served in order (cycling); takes precedence over rules.
+    script_path: str | None = Field(
+        default=None,
+        validation_alias=AliasChoices("A2A_MCP_FAKE_LLM_SCRIPT_PATH"),
+    )
+
+    latency_p50_ms: float = Field(
+        default=0.0,
+        validation_alias=AliasChoices("A2A_MCP_FAKE_LLM_LATENCY_P50_MS"),
+    )
+    latency_p99_ms: float = Field(
+        default=0.0,
+        validation_alias=AliasChoices("A2A_MCP_FAKE_LLM_LATENCY_P99_MS"),
+    )
+    error_rate: float = Field(
+        default=0.0, validation_alias=AliasChoices("A2A_MCP_FAKE_LLM_ERROR_RATE")
+    )
+    error_status: int = Field(
+        default=500,
+        validation_alias=AliasChoices("A2A_MCP_FAKE_LLM_ERROR_STATUS"),
+    )
+    timeout_rate: float = Field(
+        default=0.0,
+        validation_alias=AliasChoices("A2A_MCP_FAKE_LLM_TIMEOUT_RATE"),
+    )
+    hang_s: float = Field(default=600.0, validation_alias=AliasChoices("A2A_MCP_FAKE_LLM_HANG_S"))
+    seed: int | None = Field(default=0, validation_alias=AliasChoices("A2A_MCP_FAKE_LLM_SEED"))
+    # Delay between streamed chunks.
+    stream_chunk_delay_ms: float = Field(
+        default=0.0,
+        validation_alias=AliasChoices("A2A_MCP_FAKE_LLM_STREAM_CHUNK_DELAY_MS"),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_llm_settings() -> FakeLlmSettings:
+    return FakeLlmSettings()
+
+
+class FakeUpstreamSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file=str(ENV_FILE),
+        extra="ignore",
+        populate_by_name=True,
+    )
+
+    host: str = Field(
+        default="127.0.0.1",
+        validation_alias=AliasChoices("A2A_MCP_FAKE_UPSTREAM_HOST"),
+    )
+    port: int = Field(default=7011, validation_alias=AliasChoices("A2A_MCP_FAKE_UPSTREAM_PORT"))
+    seed: int = Field(default=0, validation_alias=AliasChoices("A2A_MCP_FAKE_UPSTREAM_SEED"))
+
+    latency_p50_ms: float = Field(
+        default=0.0,
+        validation_alias=AliasChoices("A2A_MCP_FAKE_UPSTREAM_LATENCY_P50_MS"),
+    )
+    latency_p99_ms: float = Field(
+        default=0.0,
+        validation_alias=AliasChoices("A2A_MCP_FAKE_UPSTREAM_LATENCY_P99_MS"),
+    )
+    error_rate: float = Field(
+        default=0.0,
+        validation_alias=AliasChoices("A2A_MCP_FAKE_UPSTREAM_ERROR_RATE"),
+    )
+    timeout_rate: float = Field(
+        default=0.0,
+        validation_alias=AliasChoices("A2A_MCP_FAKE_UPSTREAM_TIMEOUT_RATE"),
+    )
+    hang_s: float = Field(
+        default=600.0, validation_alias=AliasChoices("A2A_MCP_FAKE_UPSTREAM_HANG_S")
+    )
+
+    # Requests per second per service; 0 = unlimited.
+    amap_qps: float = Field(default=0.0, validation_alias=AliasChoices("A2A_MCP_FAKE_AMAP_QPS"))
+    openweather_qps: float = Field(
+        default=0.0,
+        validation_alias=AliasChoices("A2A_MCP_FAKE_OPENWEATHER_QPS"),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_upstream_settings() -> FakeUpstreamSettings:
+    return FakeUpstreamSettings()
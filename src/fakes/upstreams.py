@@ -0,0 +1,338 @@
+"""Local stand-ins for the AMap and OpenWeather APIs.
+
+One server answers both upstreams with realistic payloads generated from a
+seeded dataset, so tool-server caching, coalescing and rate limiting can be
+measured reproducibly without keys or network:
+
+    PYTHONPATH=src python -m fakes.upstreams
+    A2A_MCP_AMAP_BASE_URL=http://127.0.0.1:7011/v3
+    A2A_MCP_OPENWEATHER_BASE_URL=http://127.0.0.1:7011/data/2.5
+
+Served: `GET /v3/geocode/geo`, `GET /v3/place/around`,
+`GET /data/2.5/weather`. Errors use the real shapes: AMap answers HTTP 200
+with `status: "0"` plus `info` / `infocode` (missing key, QPS quota, unknown
+error); OpenWeather answers 401 / 404 / 429 / 500 with `cod` and `message`.
+Latency, injected errors and timeouts come from `FaultInjector`; each upstream
+has its own QPS quota.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import time
+from collections import Counter, deque
+from typing import Any
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from .faults import FaultInjector
+from .settings import FakeUpstreamSettings, get_upstream_settings
+
+# name -> (English name, lon, lat, province, citycode, adcode)
+CITIES: dict[str, tuple[str, float, float, str, str, str]] = {
+    "北京": ("Beijing", 116.407387, 39.904179, "北京市", "010", "110000"),
+    "上海": ("Shanghai", 121.473667, 31.230525, "上海市", "021", "310000"),
+    "广州": ("Guangzhou", 113.264499, 23.130061, "广东省", "020", "440100"),
+    "深圳": ("Shenzhen", 114.057939, 22.543527, "广东省", "0755", "440300"),
+    "杭州": ("Hangzhou", 120.155070, 30.274084, "浙江省", "0571", "330100"),
+    "成都": ("Chengdu", 104.066301, 30.572961, "四川省", "028", "510100"),
+    "西安": ("Xi'an", 108.939840, 34.341270, "陕西省", "029", "610100"),
+    "重庆": ("Chongqing", 106.551556, 29.563009, "重庆市", "023", "500000"),
+    "南京": ("Nanjing", 118.796624, 32.059344, "江苏省", "025", "320100"),
+    "武汉": ("Wuhan", 114.305469, 30.593175, "湖北省", "027", "420100"),
+    "天津": ("Tianjin", 117.201509, 39.085318, "天津市", "022", "120000"),
+    "苏州": ("Suzhou", 120.585294, 31.299758, "江苏省", "0512", "320500"),
+}
+_BY_ENGLISH = {entry[0].lower(): name for name, entry in CITIES.items()}
+
+# OpenWeather condition id, main, zh_cn description.
+_CONDITIONS = [
+    (800, "Clear", "晴"),
+    (801, "Clouds", "少云"),
+    (803, "Clouds", "多云"),
+    (804, "Clouds", "阴，多云"),
+    (500, "Rain", "小雨"),
+    (501, "Rain", "中雨"),
+    (701, "Mist", "薄雾"),
+]
+_POI_SUFFIXES = ["店", "馆", "中心", "广场", "公园", "餐厅", "博物馆", "小吃街"]
+_STREETS = ["人民路", "中山路", "解放路", "建设路", "和平路", "长江路", "新华街", "文化路"]
+
+_AMAP_OK = {"status": "1", "info": "OK", "infocode": "10000"}
+_AMAP_INVALID_KEY = {"status": "0", "info": "INVALID_USER_KEY", "infocode": "10001"}
+_AMAP_QPS_EXCEEDED = {"status": "0", "info": "CUQPS_HAS_EXCEEDED_THE_LIMIT", "infocode": "10021"}
+_AMAP_UNKNOWN_ERROR = {"status": "0", "info": "UNKNOWN_ERROR", "infocode": "20003"}
+_OW_INVALID_KEY = (
+    "Invalid API key. Please see https://openweathermap.org/faq#error401 for more info."
+)
+_OW_BLOCKED = (
+    "Your account is temporary blocked due to exceeding of requests limitation of your "
+    "subscription type. Please choose the proper subscription https://openweathermap.org/price"
+)
+
+
+class QpsQuota:
+    """Sliding one-second window of accepted requests."""
+
+    def __init__(self, qps: float) -> None:
+        self.qps = qps
+        self._accepted: deque[float] = deque()
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        if self.qps <= 0:
+            return True
+        now = time.monotonic()
+        while self._accepted and self._accepted[0] <= now - 1.0:
+            self._accepted.popleft()
+        if len(self._accepted) >= self.qps:
+            self.rejected += 1
+            return False
+        self._accepted.append(now)
+        return True
+
+
+class FakeUpstreams:
+    def __init__(self, settings: FakeUpstreamSettings) -> None:
+        self.settings = settings
+        self.amap_faults = self._faults(settings, settings.seed)
+        self.openweather_faults = self._faults(settings, settings.seed + 1)
+        self.amap_quota = QpsQuota(settings.amap_qps)
+        self.openweather_quota = QpsQuota(settings.openweather_qps)
+        self.requests: Counter[str] = Counter()
+
+    async def amap_gate(self, endpoint: str, key: str | None) -> JSONResponse | None:
+        """Error response for this AMap request, or None to serve it."""
+        self.requests[f"amap.{endpoint}"] += 1
+        if not key:
+            return JSONResponse(_AMAP_INVALID_KEY)
+        if not self.amap_quota.allow():
+            return JSONResponse(_AMAP_QPS_EXCEEDED)
+        fault = await self.amap_faults.next()
+        if fault == "timeout":
+            return JSONResponse({"detail": "gateway timeout"}, status_code=504)
+        if fault == "error":
+            return JSONResponse(_AMAP_UNKNOWN_ERROR)
+        return None
+
+    async def openweather_gate(self, appid: str | None) -> JSONResponse | None:
+        self.requests["openweather.weather"] += 1
+        if not appid:
+            return _ow_error(401, _OW_INVALID_KEY)
+        if not self.openweather_quota.allow():
+            return _ow_error(429, _OW_BLOCKED)
+        fault = await self.openweather_faults.next()
+        if fault == "timeout":
+            return JSONResponse({"detail": "gateway timeout"}, status_code=504)
+        if fault == "error":
+            return _ow_error(500, "Internal error")
+        return None
+
+    def geocode(self, address: str, city: str | None) -> dict[str, Any]:
+        name = _lookup_city(address) or _lookup_city(city or "")
+        if name is None:
+            return {**_AMAP_OK, "count": "0", "geocodes": []}
+        _english, lon, lat, province, citycode, adcode = CITIES[name]
+        # Municipalities (北京市, 上海市, ...) are their own province.
+        formatted_address = province if province == f"{name}市" else f"{province}{name}市"
+        return {
+            **_AMAP_OK,
+            "count": "1",
+            "geocodes": [
+                {
+                    "formatted_address": formatted_address,
+                    "country": "中国",
+                    "province": province,
+                    "citycode": citycode,
+                    "city": f"{name}市",
+                    "district": [],
+                    "adcode": adcode,
+                    "location": f"{lon:.6f},{lat:.6f}",
+                    "level": "市",
+                }
+            ],
+        }
+
+    def place_around(
+        self, location: str, radius: int, offset: int, keywords: str | None, types: str | None
+    ) -> dict[str, Any]:
+        try:
+            lon, lat = (float(part) for part in location.split(","))
+        except ValueError:
+            return {"status": "0", "info": "INVALID_PARAMS", "infocode": "20000"}
+        rng = random.Random(f"{self.settings.seed}:{location}:{keywords}:{types}")
+        label = keywords or "地点"
+        pois: list[dict[str, Any]] = []
+        for index in range(rng.randint(max(offset, 1), max(offset, 1) * 3)):
+            distance = rng.uniform(20, max(radius, 50))
+            bearing = rng.uniform(0, 2 * math.pi)
+            poi_lat = lat + distance * math.cos(bearing) / 111_000
+            poi_lon = lon + distance * math.sin(bearing) / (111_000 * math.cos(math.radians(lat)))
+            pois.append(
+                {
+                    "id": f"B0FFFAKE{rng.randrange(10**6):06d}",
+                    "name": f"{label}{rng.choice(_POI_SUFFIXES)}({index + 1}号)",
+                    "type": types or "生活服务",
+                    "typecode": types or "070000",
+                    "address": f"{rng.choice(_STREETS)}{rng.randint(1, 999)}号",
+                    "location": f"{poi_lon:.6f},{poi_lat:.6f}",
+                    "tel": [],
+                    "distance": str(int(distance)),
+                }
+            )
+        pois.sort(key=lambda poi: int(poi["distance"]))
+        # AMap pages results: `count` is the total, `pois` holds one page.
+        return {**_AMAP_OK, "count": str(len(pois)), "pois": pois[:offset]}
+
+    def weather(
+        self, q: str | None, lat: float | None, lon: float | None, units: str, lang: str | None
+    ) -> dict[str, Any] | None:
+        if q:
+            name = _lookup_city(q.split(",")[0])
+            if name is None:
+                return None
+            english, lon, lat = CITIES[name][:3]
+        else:
+            name = _nearest_city(lat or 0.0, lon or 0.0)
+            english = CITIES[name][0]
+            lat, lon = lat or 0.0, lon or 0.0
+        # Stable for a city within the hour, like cached observations upstream.
+        observed = int(time.time()) // 3600 * 3600
+        rng = random.Random(f"{self.settings.seed}:{name}:{observed}")
+        condition_id, main, description_zh = rng.choice(_CONDITIONS)
+        temp_c = round(rng.uniform(-5, 35), 2)
+        temp = _convert_temp(temp_c, units)
+        return {
+            "coord": {"lon": round(lon, 4), "lat": round(lat, 4)},
+            "weather": [
+                {
+                    "id": condition_id,
+                    "main": main,
+                    "description": description_zh if lang == "zh_cn" else main.lower(),
+                    "icon": "01d",
+                }
+            ],
+            "base": "stations",
+            "main": {
+                "temp": temp,
+                "feels_like": _convert_temp(temp_c + rng.uniform(-3, 1), units),
+                "temp_min": _convert_temp(temp_c - rng.uniform(0, 3), units),
+                "temp_max": _convert_temp(temp_c + rng.uniform(0, 3), units),
+                "pressure": rng.randint(990, 1030),
+                "humidity": rng.randint(20, 95),
+            },
+            "visibility": 10000,
+            "wind": {"speed": round(rng.uniform(0, 8), 2), "deg": rng.randint(0, 359)},
+            "clouds": {"all": rng.randint(0, 100)},
+            "dt": observed,
+            "sys": {"country": "CN", "sunrise": observed - 6 * 3600, "sunset": observed + 6 * 3600},
+            "timezone": 28800,
+            "id": 1_800_000 + int(CITIES[name][5][:4]),
+            "name": english,
+            "cod": 200,
+        }
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "requests": dict(self.requests),
+            "amap": {"quota_rejected": self.amap_quota.rejected, **self.amap_faults.stats()},
+            "openweather": {
+                "quota_rejected": self.openweather_quota.rejected,
+                **self.openweather_faults.stats(),
+            },
+        }
+
+    @staticmethod
+    def _faults(settings: FakeUpstreamSettings, seed: int) -> FaultInjector:
+        return FaultInjector(
+            latency_p50_ms=settings.latency_p50_ms,
+            latency_p99_ms=settings.latency_p99_ms,
+            error_rate=settings.error_rate,
+            timeout_rate=settings.timeout_rate,
+            hang_s=settings.hang_s,
+            seed=seed,
+        )
+
+
+def create_app(settings: FakeUpstreamSettings | None = None) -> FastAPI:
+    fake = FakeUpstreams(settings or get_upstream_settings())
+    app = FastAPI(title="Fake AMap / OpenWeather upstreams")
+    app.state.fake = fake
+
+    @app.get("/metrics")
+    def metrics() -> dict[str, Any]:
+        return fake.stats()
+
+    @app.get("/v3/geocode/geo")
+    async def geocode(key: str | None = None, address: str = "", city: str | None = None):
+        error = await fake.amap_gate("geocode", key)
+        return error or fake.geocode(address, city)
+
+    @app.get("/v3/place/around")
+    async def place_around(
+        location: str = "",
+        key: str | None = None,
+        radius: int = 1000,
+        offset: int = 20,
+        keywords: str | None = None,
+        types: str | None = None,
+    ):
+        error = await fake.amap_gate("place_around", key)
+        return error or fake.place_around(location, radius, offset, keywords, types)
+
+    @app.get("/data/2.5/weather")
+    async def weather(
+        appid: str | None = None,
+        q: str | None = None,
+        lat: float | None = None,
+        lon: float | None = None,
+        units: str = "standard",
+        lang: str | None = None,
+    ):
+        error = await fake.openweather_gate(appid)
+        if error is not None:
+            return error
+        payload = fake.weather(q, lat, lon, units, lang)
+        if payload is None:
+            return _ow_error(404, "city not found")
+        return payload
+
+    return app
+
+
+def _lookup_city(text: str) -> str | None:
+    text = text.strip()
+    for name in CITIES:
+        if name in text:
+            return name
+    return _BY_ENGLISH.get(text.lower())
+
+
+def _nearest_city(lat: float, lon: float) -> str:
+    return min(CITIES, key=lambda name: (CITIES[name][2] - lat) ** 2 + (CITIES[name][1] - lon) ** 2)
+
+
+def _convert_temp(celsius: float, units: str) -> float:
+    if units == "metric":
+        return round(celsius, 2)
+    if units == "imperial":
+        return round(celsius * 9 / 5 + 32, 2)
+    return round(celsius + 273.15, 2)
+
+
+def _ow_error(status_code: int, message: str) -> JSONResponse:
+    # OpenWeather sends `cod` as a string on errors.
+    return JSONResponse({"cod": str(status_code), "message": message}, status_code=status_code)
+
+
+def main() -> None:
+    import uvicorn
+
+    settings = get_upstream_settings()
+    uvicorn.run(create_app(settings), host=settings.host, port=settings.port)
+
+
+if __name__ == "__main__":
+    main()
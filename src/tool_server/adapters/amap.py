@@ -1,15 +1,80 @@
 """AMap (Gaode) adapter.
 
 Encapsulates upstream API details and error normalization.
+Geocode results are cached for a TTL: the same few cities are resolved over
+and over (weather and POI both start with a geocode), and they do not move.
 """
 
 from __future__ import annotations
 
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
 import httpx
 
 from . import AdapterError
 
 AMAP_BASE_URL = "https://restapi.amap.com/v3"
+GEOCODE_CACHE_MAX_ENTRIES = 4096
+
+
+class GeocodeCache:
+    """TTL + LRU cache of geocode responses; concurrent misses share one request."""
+
+    def __init__(self, max_entries: int = GEOCODE_CACHE_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str | None], tuple[float, dict]] = OrderedDict()
+        self._inflight: dict[tuple[str, str | None], asyncio.Task[dict]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(
+        self,
+        key: tuple[str, str | None],
+        ttl_s: float,
+        fetch: Callable[[], Awaitable[dict]],
+    ) -> dict:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._settle(key, ttl_s, done))
+        else:
+            self.hits += 1
+        return await asyncio.shield(task)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._inflight.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _settle(self, key: tuple[str, str | None], ttl_s: float, task: asyncio.Task[dict]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Errors (including NOT_FOUND) are not cached.
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._entries[key] = (time.monotonic() + ttl_s, task.result())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+geocode_cache = GeocodeCache()
 
 
 def _raise_for_status(data: dict) -> None:
@@ -17,7 +82,7 @@ def _raise_for_status(data: dict) -> None:
         raise AdapterError("UPSTREAM_ERROR", data.get("info", "AMap error"), {"infocode": data.get("infocode")})
 
 
-def search_poi_around(
+async def search_poi_around(
     *,
     api_key: str | None,
     keyword: str | None,
@@ -26,6 +91,7 @@ def search_poi_around(
     radius_m: int,
     limit: int,
     timeout_s: float,
+    base_url: str = AMAP_BASE_URL,
 ) -> dict:
     if not api_key:
         raise AdapterError("MISSING_API_KEY", "AMAP_API_KEY is not set")
@@ -42,24 +108,37 @@ def search_poi_around(
     if types:
         params["types"] = types
 
-    url = f"{AMAP_BASE_URL}/place/around"
-    with httpx.Client(timeout=timeout_s) as client:
-        resp = client.get(url, params=params)
+    url = f"{base_url.rstrip('/')}/place/around"
+    async with httpx.AsyncClient(timeout=timeout_s) as client:
+        resp = await client.get(url, params=params)
     data = resp.json()
     _raise_for_status(data)
     return data
 
 
-def geocode_address(
+async def geocode_address(
     *,
     api_key: str | None,
     address: str,
     city: str | None,
     timeout_s: float,
+    cache_ttl_s: float = 0.0,
+    base_url: str = AMAP_BASE_URL,
 ) -> dict:
     if not api_key:
         raise AdapterError("MISSING_API_KEY", "AMAP_API_KEY is not set")
+    if cache_ttl_s <= 0:
+        return await _fetch_geocode(api_key, address, city, timeout_s, base_url)
+    return await geocode_cache.get(
+        (address.strip(), city),
+        cache_ttl_s,
+        lambda: _fetch_geocode(api_key, address, city, timeout_s, base_url),
+    )
+
 
+async def _fetch_geocode(
+    api_key: str, address: str, city: str | None, timeout_s: float, base_url: str
+) -> dict:
     params: dict[str, str] = {
         "key": api_key,
         "address": address,
@@ -68,9 +147,9 @@ def geocode_address(
     if city:
         params["city"] = city
 
-    url = f"{AMAP_BASE_URL}/geocode/geo"
-    with httpx.Client(timeout=timeout_s) as client:
-        resp = client.get(url, params=params)
+    url = f"{base_url.rstrip('/')}/geocode/geo"
+    async with httpx.AsyncClient(timeout=timeout_s) as client:
+        resp = await client.get(url, params=params)
     data = resp.json()
     _raise_for_status(data)
     if not data.get("geocodes"):
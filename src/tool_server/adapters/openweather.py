@@ -18,7 +18,7 @@ def _raise_for_status(data: dict) -> None:
         raise AdapterError("UPSTREAM_ERROR", data.get("message", "OpenWeather error"), {"code": cod})
 
 
-def fetch_current_weather(
+async def fetch_current_weather(
     *,
     api_key: str | None,
     city: str | None,
@@ -27,6 +27,7 @@ def fetch_current_weather(
     units: str,
     lang: str | None,
     timeout_s: float,
+    base_url: str = OPENWEATHER_BASE_URL,
 ) -> dict:
     if not api_key:
         raise AdapterError("MISSING_API_KEY", "OPENWEATHER_API_KEY is not set")
@@ -41,9 +42,9 @@ def fetch_current_weather(
         params["lat"] = lat or 0.0
         params["lon"] = lon or 0.0
 
-    url = f"{OPENWEATHER_BASE_URL}/weather"
-    with httpx.Client(timeout=timeout_s) as client:
-        resp = client.get(url, params=params)
+    url = f"{base_url.rstrip('/')}/weather"
+    async with httpx.AsyncClient(timeout=timeout_s) as client:
+        resp = await client.get(url, params=params)
     data = resp.json()
     _raise_for_status(data)
     return data
@@ -0,0 +1,122 @@
+"""Async tool dispatcher shared by the HTTP server and the agent's embedded mode.
+
+One `ToolDispatcher` per process resolves the tool registry and settings
+once, validates arguments, runs the handler and maps failures to the same
+`ToolError` codes whether the call came over HTTP (`server.py`) or from the
+agent's ToolBroker in the same process (`A2A_MCP_MCP_BASE_URL=inproc`).
+Successful responses carry the handler's typed output model as `data`; it is
+only turned into plain data when something needs it (JSON encoding on the
+server, `tool_data` in the agent).
+"""
+
+from __future__ import annotations
+
+import time
+from functools import lru_cache
+from typing import Any
+
+from pydantic import ValidationError
+
+from .adapters import AdapterError
+from .logging import get_logger
+from .schemas import ToolError, ToolMeta, ToolResponse, ToolSpec
+from .settings import ToolServerSettings, get_settings
+from .tools import TOOL_HANDLERS, TOOL_SPECS, ToolHandler, run_tool_handler
+
+logger = get_logger("tool_server")
+
+
+class UnknownToolError(LookupError):
+    pass
+
+
+class ToolDispatcher:
+    def __init__(self, settings: ToolServerSettings) -> None:
+        self.settings = settings
+        self._tools: dict[str, tuple[ToolSpec, ToolHandler]] = {
+            name: (spec, TOOL_HANDLERS[name]) for name, spec in TOOL_SPECS.items()
+        }
+
+    def has_tool(self, tool_name: str) -> bool:
+        return tool_name in self._tools
+
+    async def dispatch(
+        self,
+        tool_name: str,
+        args: Any,
+        trace_id: str,
+        *,
+        started: float | None = None,
+    ) -> ToolResponse:
+        """Run one call; raises UnknownToolError, every other failure becomes a ToolError."""
+        start = time.time() if started is None else started
+        try:
+            spec, handler = self._tools[tool_name]
+        except KeyError:
+            raise UnknownToolError(tool_name) from None
+        try:
+            input_obj = spec.input_model.model_validate(args)
+            result = await run_tool_handler(handler, input_obj, self.settings, trace_id)
+        except ValidationError as exc:
+            error = ToolError(code="INVALID_ARGUMENT", message=str(exc))
+            return self.error(tool_name, trace_id, error, start, event="tool_validation_error")
+        except AdapterError as exc:
+            error = ToolError(code=exc.code, message=exc.message, details=exc.details)
+            return self.error(tool_name, trace_id, error, start, event="tool_adapter_error")
+        except Exception as exc:  # noqa: BLE001
+            error = ToolError(code="TOOL_ERROR", message=str(exc))
+            return self.error(tool_name, trace_id, error, start)
+
+        latency_ms = int((time.time() - start) * 1000)
+        logger.info(
+            "tool_call",
+            extra={
+                "extra": {
+                    "trace_id": trace_id,
+                    "tool": tool_name,
+                    "latency_ms": latency_ms,
+                    "ok": True,
+                }
+            },
+        )
+        # The handler already built a validated output model; pass it through as-is.
+        return ToolResponse.model_construct(
+            ok=True,
+            data=result,
+            error=None,
+            meta=ToolMeta(tool_name=tool_name, trace_id=trace_id, latency_ms=latency_ms),
+        )
+
+    def error(
+        self,
+        tool_name: str,
+        trace_id: str,
+        error: ToolError,
+        started: float,
+        *,
+        event: str = "tool_error",
+    ) -> ToolResponse:
+        latency_ms = int((time.time() - started) * 1000)
+        logger.info(
+            event,
+            extra={
+                "extra": {
+                    "trace_id": trace_id,
+                    "tool": tool_name,
+                    "latency_ms": latency_ms,
+                    "ok": False,
+                    "error_code": error.code,
+                }
+            },
+        )
+        return ToolResponse(
+            ok=False,
+            data=None,
+            error=error,
+            meta=ToolMeta(tool_name=tool_name, trace_id=trace_id, latency_ms=latency_ms),
+        )
+
+
+@lru_cache(maxsize=1)
+def get_dispatcher() -> ToolDispatcher:
+    return ToolDispatcher(get_settings())
@@ -0,0 +1,110 @@
+"""Tool schema registry: every derived schema form, built once per process.
+
+    PYTHONPATH=src python -m tool_server.registry -o build/tool_schemas.json
+    PYTHONPATH=src python -m tool_server.registry --check build/tool_schemas.json
+
+`get_schema_registry()` turns the registered `ToolSpec`s into the `/tools`
+documents (input and output JSON Schema, the cross-field `required_any_of`
+rule and the tool's `llm_view`), the OpenAI tool definitions, the pre-encoded
+`/tools` body and a schema version — a short hash of the canonical documents.
+The version is the `/tools` ETag, the tool-schema component of the LLM
+completion cache key and the compatibility key between an agent and the tool
+server it talks to. The command line writes the same content as a build
+artifact, or fails when a committed artifact no longer matches the code.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from common.tool_contract import openai_tool, schema_version
+
+from .schemas import ToolSpec
+from .tools import list_tool_specs
+
+
+@dataclass(frozen=True)
+class SchemaRegistry:
+    version: str
+    tools: list[dict[str, Any]]
+    openai_tools: list[dict[str, Any]]
+    tools_body: bytes
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+    @classmethod
+    def from_specs(cls, specs: list[ToolSpec]) -> SchemaRegistry:
+        tools = [_document(spec) for spec in specs]
+        openai_tools = [openai_tool(tool) for tool in tools]
+        return cls(
+            version=schema_version(tools),
+            tools=tools,
+            openai_tools=openai_tools,
+            tools_body=json.dumps(tools, ensure_ascii=False, separators=(",", ":")).encode(),
+        )
+
+    def artifact(self) -> dict[str, Any]:
+        return {"version": self.version, "tools": self.tools, "openai_tools": self.openai_tools}
+
+
+@lru_cache(maxsize=1)
+def get_schema_registry() -> SchemaRegistry:
+    """Shared registry; its lists are read-only (copy before changing them)."""
+    return SchemaRegistry.from_specs(list_tool_specs())
+
+
+def _document(spec: ToolSpec) -> dict[str, Any]:
+    return {
+        "name": spec.name,
+        "description": spec.description,
+        "input_schema": spec.input_model.model_json_schema(),
+        "output_schema": spec.output_model.model_json_schema(),
+        "required_any_of": [list(group) for group in spec.required_any_of],
+        "llm_view": asdict(spec.llm_view) if spec.llm_view else None,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="tool_server.registry", description=__doc__.splitlines()[0]
+    )
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("-o", "--output", type=Path, help="Write the schema artifact here")
+    group.add_argument("--check", type=Path, help="Exit 1 if this artifact does not match the code")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    registry = get_schema_registry()
+    if args.check:
+        try:
+            recorded = json.loads(args.check.read_text(encoding="utf-8")).get("version")
+        except (OSError, ValueError) as exc:
+            print(f"cannot read {args.check}: {exc}")
+            return 1
+        if recorded != registry.version:
+            print(f"stale: {args.check} has {recorded}, code has {registry.version}")
+            return 1
+        print(f"ok: {registry.version}")
+        return 0
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(
+            json.dumps(registry.artifact(), ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"{registry.version} -> {args.output}")
+        return 0
+    print(registry.version)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,37 +1,30 @@
-"""Shared tool schemas (single source of truth).
+"""Tool schemas (single source of truth for the tool server).
 
-Agent and tool server should both import these models to avoid drift.
+The agent does not import this module: it discovers the tools from `GET /tools`
+(built from these models by `registry.py`). The response envelope and
+`LlmView` live in `common.tool_contract` and are re-exported here.
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Literal
+from typing import Literal
 
 from pydantic import BaseModel, Field, model_validator
 
+from common.tool_contract import (  # noqa: F401  (re-exported)
+    LlmView,
+    ToolError,
+    ToolMeta,
+    ToolResponse,
+    encode_tool_response,
+    satisfies_any_of,
+    tool_data,
+)
 
-class ToolError(BaseModel):
-    """Normalized error payload returned by tools."""
-    code: str
-    message: str
-    details: dict[str, Any] | None = None
-
-
-class ToolMeta(BaseModel):
-    """Metadata attached to tool responses for observability."""
-    tool_name: str
-    trace_id: str
-    latency_ms: int | None = None
-    source: str | None = None
-
-
-class ToolResponse(BaseModel):
-    """Unified response wrapper for all tools."""
-    ok: bool
-    data: Any | None = None
-    error: ToolError | None = None
-    meta: ToolMeta
+# Location rule shared by the weather and POI inputs; published in `/tools` as
+# `required_any_of` so the agent can check it without importing these models.
+LOCATION_ANY_OF: tuple[tuple[str, ...], ...] = (("city",), ("lat", "lon"))
 
 
 class TimeInput(BaseModel):
@@ -56,9 +49,7 @@ class WeatherInput(BaseModel):
 
     @model_validator(mode="after")
     def _validate_location(self) -> "WeatherInput":
-        has_city = bool(self.city and self.city.strip())
-        has_coords = self.lat is not None and self.lon is not None
-        if not (has_city or has_coords):
+        if not satisfies_any_of(self.__dict__, LOCATION_ANY_OF):
             raise ValueError("Provide either city or (lat, lon).")
         return self
 
@@ -90,9 +81,7 @@ class PoiInput(BaseModel):
 
     @model_validator(mode="after")
     def _validate_location(self) -> "PoiInput":
-        has_city = bool(self.city and self.city.strip())
-        has_coords = self.lat is not None and self.lon is not None
-        if not (has_city or has_coords):
+        if not satisfies_any_of(self.__dict__, LOCATION_ANY_OF):
             raise ValueError("Provide either city or (lat, lon).")
         return self
 
@@ -120,3 +109,6 @@ class ToolSpec:
     description: str
     input_model: type[BaseModel]
     output_model: type[BaseModel]
+    llm_view: LlmView | None = None
+    # Groups of input fields of which at least one must be fully set (not in JSON Schema).
+    required_any_of: tuple[tuple[str, ...], ...] = ()
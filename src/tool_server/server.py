@@ -5,172 +5,214 @@ This server exposes a small set of tools with structured I/O.
 
 from __future__ import annotations
 
+import os
+import stat
 import time
 import uuid
 from typing import Any
 
-from fastapi import FastAPI, HTTPException, Request
-from pydantic import ValidationError
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
 
-from .logging import get_logger
-from .adapters import AdapterError
-from .schemas import ToolError, ToolMeta, ToolResponse
+from common.admin import AdminAccessDenied, check_admin_token, has_admin_token
+from common.disconnect import CLIENT_CLOSED_STATUS, ClientDisconnected, cancel_on_disconnect
+from common.loop_monitor import LoopLagMonitor, bind_trace_id
+from common.profiling import PROFILE_HEADER, RequestProfiler, should_profile
+from common.wire import JSON_MEDIA_TYPE, negotiate, pack
+
+from .adapters.amap import geocode_cache
+from .dispatcher import get_dispatcher
+from .logging import configure_from_settings, get_logger, logging_stats, set_log_level
+from .registry import get_schema_registry
+from .schemas import ToolError, ToolResponse, encode_tool_response
 from .settings import get_settings
-from .tools import get_tool_handler, get_tool_spec, list_tool_specs
 
 logger = get_logger("tool_server")
+loop_monitor: LoopLagMonitor | None = None
 
 app = FastAPI(
     title=get_settings().service_title,
     version=get_settings().service_version,
 )
+if get_settings().gzip_min_bytes > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=get_settings().gzip_min_bytes)
 
 
 @app.on_event("startup")
 def log_startup_config() -> None:
     settings = get_settings()
+    configure_from_settings(settings)
     logger.info(
         "tool_server_config",
         extra={
             "extra": {
                 "host": settings.host,
                 "port": settings.port,
+                "uds": settings.uds,
                 "openweather_key_set": bool(settings.openweather_api_key),
                 "amap_key_set": bool(settings.amap_api_key),
                 "request_timeout_s": settings.request_timeout_s,
                 "default_timezone": settings.default_timezone,
                 "default_lang": settings.default_lang,
+                "profile_sample_rate": settings.profile_sample_rate,
+                "log_level": settings.log_level,
+                "log_sample_rates": settings.log_sample_rates,
+                # Building the registry here keeps schema generation off the first request.
+                "tool_schema_version": get_schema_registry().version,
             }
         },
     )
 
 
+@app.on_event("startup")
+async def start_loop_monitor() -> None:
+    global loop_monitor
+    settings = get_settings()
+    if not settings.loop_monitor_enabled:
+        return
+    loop_monitor = LoopLagMonitor(
+        interval_s=settings.loop_monitor_interval_ms / 1000,
+        stall_threshold_s=settings.loop_stall_threshold_ms / 1000,
+        logger=logger,
+    )
+    loop_monitor.start()
+
+
+@app.on_event("shutdown")
+async def stop_loop_monitor() -> None:
+    if loop_monitor is not None:
+        await loop_monitor.stop()
+
+
 @app.get("/health")
 def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+def metrics() -> dict[str, Any]:
+    return {
+        "logging": logging_stats(),
+        "event_loop": loop_monitor.stats() if loop_monitor else {"enabled": False},
+        "geocode_cache": geocode_cache.stats(),
+        "tool_schemas": {"version": get_schema_registry().version},
+    }
+
+
+@app.put("/admin/log-level")
+def update_log_level(
+    request: Request,
+    level: str,
+    logger_name: str | None = Query(default=None, alias="logger"),
+) -> dict[str, Any]:
+    try:
+        check_admin_token(get_settings().admin_token, request.headers.get("authorization"))
+    except AdminAccessDenied as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail) from exc
+    try:
+        set_log_level(level, logger_name)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return logging_stats()
+
+
 @app.get("/tools")
-def list_tools() -> list[dict[str, Any]]:
-    return [
-        {
-            "name": spec.name,
-            "description": spec.description,
-            "input_schema": spec.input_model.model_json_schema(),
-            "output_schema": spec.output_model.model_json_schema(),
-        }
-        for spec in list_tool_specs()
-    ]
-
-
-@app.post("/tools/{tool_name}")
-async def call_tool(tool_name: str, request: Request) -> ToolResponse:
+def list_tools(request: Request) -> Response:
+    # Schemas only change with a deploy: serve the bytes built at startup, 304 when unchanged.
+    registry = get_schema_registry()
+    headers = {"ETag": registry.etag, "Cache-Control": "no-cache"}
+    if _etags(request.headers.get("if-none-match")) & {registry.etag, "*"}:
+        return Response(status_code=304, headers=headers)
+    return Response(content=registry.tools_body, media_type=JSON_MEDIA_TYPE, headers=headers)
+
+
+@app.post("/tools/{tool_name}", response_model=ToolResponse)
+async def call_tool(tool_name: str, request: Request) -> Response:
     # Every tool call gets a trace_id for end-to-end debugging.
     trace_id = request.headers.get("x-trace-id") or str(uuid.uuid4())
-    start = time.time()
+    bind_trace_id(trace_id)
     settings = get_settings()
 
-    spec = get_tool_spec(tool_name)
-    handler = get_tool_handler(tool_name)
-    if not spec or not handler:
-        raise HTTPException(status_code=404, detail=f"Unknown tool: {tool_name}")
-
-    try:
-        payload = await request.json()
-        input_obj = spec.input_model.model_validate(payload)
-        result = handler(input_obj, settings, trace_id)
-        latency_ms = int((time.time() - start) * 1000)
-        response = ToolResponse(
-            ok=True,
-            data=result.model_dump(),
-            error=None,
-            meta=ToolMeta(tool_name=tool_name, trace_id=trace_id, latency_ms=latency_ms),
+    profiler: RequestProfiler | None = None
+    if should_profile(
+        request.headers.get(PROFILE_HEADER),
+        settings.profile_sample_rate,
+        admin=has_admin_token(settings.admin_token, request.headers.get("authorization")),
+    ):
+        profiler = RequestProfiler(
+            top_n=settings.profile_top_n,
+            max_duration_s=settings.profile_max_duration_s,
         )
-        logger.info(
-            "tool_call",
-            extra={
-                "extra": {
-                    "trace_id": trace_id,
-                    "tool": tool_name,
-                    "latency_ms": latency_ms,
-                    "ok": True,
-                }
-            },
+        profiler.start()
+    # Read the body up front: the disconnect poll must not consume it.
+    await request.body()
+    try:
+        response = await cancel_on_disconnect(
+            request,
+            _call_tool(tool_name, request, trace_id),
+            settings.disconnect_poll_interval_ms / 1000,
         )
-        return response
-    except ValidationError as exc:
-        latency_ms = int((time.time() - start) * 1000)
-        error = ToolError(code="INVALID_ARGUMENT", message=str(exc))
+    except ClientDisconnected:
         logger.info(
-            "tool_validation_error",
-            extra={
-                "extra": {
-                    "trace_id": trace_id,
-                    "tool": tool_name,
-                    "latency_ms": latency_ms,
-                    "ok": False,
-                    "error_code": error.code,
-                }
-            },
-        )
-        return ToolResponse(
-            ok=False,
-            data=None,
-            error=error,
-            meta=ToolMeta(tool_name=tool_name, trace_id=trace_id, latency_ms=latency_ms),
+            "tool_call_cancelled",
+            extra={"extra": {"trace_id": trace_id, "tool": tool_name}},
         )
-    except AdapterError as exc:
-        latency_ms = int((time.time() - start) * 1000)
-        error = ToolError(code=exc.code, message=exc.message, details=exc.details)
+        raise HTTPException(
+            status_code=CLIENT_CLOSED_STATUS, detail="client disconnected"
+        ) from None
+    finally:
+        profile = profiler.stop() if profiler is not None else None
+    if profile is not None:
+        # Logs only: frames name files and functions, which callers must not see.
         logger.info(
-            "tool_adapter_error",
-            extra={
-                "extra": {
-                    "trace_id": trace_id,
-                    "tool": tool_name,
-                    "latency_ms": latency_ms,
-                    "ok": False,
-                    "error_code": error.code,
-                }
-            },
+            "tool_profile",
+            extra={"extra": {"trace_id": trace_id, "tool": tool_name, "profile": profile}},
         )
-        return ToolResponse(
-            ok=False,
-            data=None,
-            error=error,
-            meta=ToolMeta(tool_name=tool_name, trace_id=trace_id, latency_ms=latency_ms),
-        )
-    except Exception as exc:  # noqa: BLE001
-        latency_ms = int((time.time() - start) * 1000)
+    return _render(response, negotiate(request.headers.get("accept")))
+
+
+def _render(response: ToolResponse, media_type: str) -> Response:
+    # Pre-encoded: FastAPI would otherwise validate and serialize the envelope again.
+    if media_type == JSON_MEDIA_TYPE:
+        return Response(content=encode_tool_response(response), media_type=media_type)
+    return Response(content=pack(response.model_dump(mode="json")), media_type=media_type)
+
+
+def _etags(header: str | None) -> set[str]:
+    if not header:
+        return set()
+    return {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+
+async def _call_tool(tool_name: str, request: Request, trace_id: str) -> ToolResponse:
+    dispatcher = get_dispatcher()
+    if not dispatcher.has_tool(tool_name):
+        raise HTTPException(status_code=404, detail=f"Unknown tool: {tool_name}")
+    started = time.time()
+    try:
+        payload = await request.json()
+    except ValueError as exc:
         error = ToolError(code="TOOL_ERROR", message=str(exc))
-        logger.info(
-            "tool_error",
-            extra={
-                "extra": {
-                    "trace_id": trace_id,
-                    "tool": tool_name,
-                    "latency_ms": latency_ms,
-                    "ok": False,
-                    "error_code": error.code,
-                }
-            },
-        )
-        return ToolResponse(
-            ok=False,
-            data=None,
-            error=error,
-            meta=ToolMeta(tool_name=tool_name, trace_id=trace_id, latency_ms=latency_ms),
-        )
+        return dispatcher.error(tool_name, trace_id, error, started)
+    return await dispatcher.dispatch(tool_name, payload, trace_id, started=started)
 
 
 def main() -> None:
     import uvicorn
 
     settings = get_settings()
+    # A socket left by a process that did not shut down cleanly makes bind fail.
+    if (
+        settings.uds
+        and os.path.exists(settings.uds)
+        and stat.S_ISSOCK(os.stat(settings.uds).st_mode)
+    ):
+        os.unlink(settings.uds)
     uvicorn.run(
         "tool_server.server:app",
         host=settings.host,
         port=settings.port,
+        uds=settings.uds,
         reload=settings.reload,
     )
 
@@ -8,14 +8,24 @@ from pathlib import Path
 from pydantic import AliasChoices, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from .adapters.amap import AMAP_BASE_URL
+from .adapters.openweather import OPENWEATHER_BASE_URL
+
 ENV_FILE = Path(__file__).resolve().parents[2] / ".env"
 
 
 class ToolServerSettings(BaseSettings):
-    model_config = SettingsConfigDict(env_file=str(ENV_FILE), extra="ignore")
+    model_config = SettingsConfigDict(
+        env_file=str(ENV_FILE),
+        extra="ignore",
+        # Allow tests and embedders to pass field names as well as env aliases.
+        populate_by_name=True,
+    )
 
     host: str = Field(default="0.0.0.0", validation_alias=AliasChoices("A2A_MCP_TOOL_HOST"))
     port: int = Field(default=7001, validation_alias=AliasChoices("A2A_MCP_TOOL_PORT"))
+    # Listen on this Unix domain socket instead of host:port (same-host agent/sidecar).
+    uds: str | None = Field(default=None, validation_alias=AliasChoices("A2A_MCP_TOOL_UDS"))
     reload: bool = Field(default=False, validation_alias=AliasChoices("A2A_MCP_RELOAD"))
     service_title: str = Field(
         default="A2A MCP Tool Server",
@@ -34,6 +44,15 @@ class ToolServerSettings(BaseSettings):
         default=None,
         validation_alias=AliasChoices("AMAP_API_KEY", "A2A_MCP_AMAP_API_KEY"),
     )
+    # Point these at `fakes.upstreams` for offline benchmarks.
+    openweather_base_url: str = Field(
+        default=OPENWEATHER_BASE_URL,
+        validation_alias=AliasChoices("A2A_MCP_OPENWEATHER_BASE_URL"),
+    )
+    amap_base_url: str = Field(
+        default=AMAP_BASE_URL,
+        validation_alias=AliasChoices("A2A_MCP_AMAP_BASE_URL"),
+    )
 
     request_timeout_s: float = Field(
         default=8.0,
@@ -48,6 +67,76 @@ class ToolServerSettings(BaseSettings):
         validation_alias=AliasChoices("A2A_MCP_TOOL_DEFAULT_LANG"),
     )
 
+    profile_sample_rate: float = Field(
+        default=0.0,
+        validation_alias=AliasChoices(
+            "A2A_MCP_TOOL_PROFILE_SAMPLE_RATE",
+            "A2A_MCP_PROFILE_SAMPLE_RATE",
+        ),
+    )
+    profile_top_n: int = Field(default=20, validation_alias=AliasChoices("A2A_MCP_PROFILE_TOP_N"))
+    profile_max_duration_s: float = Field(
+        default=10.0,
+        validation_alias=AliasChoices("A2A_MCP_PROFILE_MAX_DURATION_S"),
+    )
+
+    loop_monitor_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("A2A_MCP_LOOP_MONITOR_ENABLED"),
+    )
+    loop_monitor_interval_ms: int = Field(
+        default=100,
+        validation_alias=AliasChoices("A2A_MCP_LOOP_MONITOR_INTERVAL_MS"),
+    )
+    loop_stall_threshold_ms: int = Field(
+        default=200,
+        validation_alias=AliasChoices("A2A_MCP_LOOP_STALL_THRESHOLD_MS"),
+    )
+
+    # Geocode results are stable; 0 disables the cache.
+    geocode_cache_ttl_s: float = Field(
+        default=86400.0,
+        validation_alias=AliasChoices("A2A_MCP_GEOCODE_CACHE_TTL_S"),
+    )
+
+    # How often a running request checks whether its client has disconnected.
+    disconnect_poll_interval_ms: int = Field(
+        default=250,
+        validation_alias=AliasChoices("A2A_MCP_DISCONNECT_POLL_INTERVAL_MS"),
+    )
+    # gzip responses of at least this many bytes for callers that accept it; 0 disables.
+    gzip_min_bytes: int = Field(
+        default=0,
+        validation_alias=AliasChoices("A2A_MCP_TOOL_GZIP_MIN_BYTES"),
+    )
+
+    # Bearer token for the /admin/* endpoints; unset keeps them disabled (404).
+    admin_token: str | None = Field(
+        default=None,
+        validation_alias=AliasChoices("A2A_MCP_TOOL_ADMIN_TOKEN", "A2A_MCP_ADMIN_TOKEN"),
+    )
+
+    log_level: str = Field(
+        default="INFO",
+        validation_alias=AliasChoices("A2A_MCP_TOOL_LOG_LEVEL", "A2A_MCP_LOG_LEVEL"),
+    )
+    log_queue_size: int = Field(
+        default=10000,
+        validation_alias=AliasChoices("A2A_MCP_LOG_QUEUE_SIZE"),
+    )
+    log_batch_size: int = Field(
+        default=256,
+        validation_alias=AliasChoices("A2A_MCP_LOG_BATCH_SIZE"),
+    )
+    log_flush_interval_ms: int = Field(
+        default=200,
+        validation_alias=AliasChoices("A2A_MCP_LOG_FLUSH_INTERVAL_MS"),
+    )
+    log_sample_rates: dict[str, float] = Field(
+        default_factory=dict,
+        validation_alias=AliasChoices("A2A_MCP_TOOL_LOG_SAMPLE_RATES", "A2A_MCP_LOG_SAMPLE_RATES"),
+    )
+
 
 @lru_cache(maxsize=1)
 def get_settings() -> ToolServerSettings:
@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
+import inspect
 from typing import Callable
 
 from ..schemas import (
+    LOCATION_ANY_OF,
+    LlmView,
     PoiInput,
     PoiOutput,
     TimeInput,
@@ -29,6 +32,7 @@ TOOL_SPECS: dict[str, ToolSpec] = {
         ),
         input_model=TimeInput,
         output_model=TimeOutput,
+        llm_view=LlmView(fields=("timezone", "iso")),
     ),
     "weather": ToolSpec(
         name="weather",
@@ -39,6 +43,20 @@ TOOL_SPECS: dict[str, ToolSpec] = {
         ),
         input_model=WeatherInput,
         output_model=WeatherOutput,
+        required_any_of=LOCATION_ANY_OF,
+        llm_view=LlmView(
+            fields=(
+                "city",
+                "lat",
+                "lon",
+                "description",
+                "temperature_c",
+                "feels_like_c",
+                "humidity",
+                "wind_speed",
+            ),
+            coord_decimals=2,
+        ),
     ),
     "poi": ToolSpec(
         name="poi",
@@ -49,6 +67,14 @@ TOOL_SPECS: dict[str, ToolSpec] = {
         ),
         input_model=PoiInput,
         output_model=PoiOutput,
+        required_any_of=LOCATION_ANY_OF,
+        llm_view=LlmView(
+            fields=("city", "keyword", "items"),
+            list_field="items",
+            item_fields=("name", "address", "lat", "lon", "distance_m"),
+            top_k=8,
+            coord_decimals=3,
+        ),
     ),
 }
 
@@ -67,5 +93,15 @@ def get_tool_handler(name: str) -> ToolHandler | None:
     return TOOL_HANDLERS.get(name)
 
 
+async def run_tool_handler(
+    handler: ToolHandler, payload: object, settings: object, trace_id: str
+) -> object:
+    # Upstream-bound tools are coroutines (so they can be cancelled); the rest are plain calls.
+    result = handler(payload, settings, trace_id)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
 def list_tool_specs() -> list[ToolSpec]:
     return list(TOOL_SPECS.values())
@@ -16,16 +16,18 @@ def _parse_location(poi: dict) -> tuple[float, float]:
     return float(lat_str), float(lon_str)
 
 
-def search_poi(payload: PoiInput, settings: ToolServerSettings, _trace_id: str) -> PoiOutput:
+async def search_poi(payload: PoiInput, settings: ToolServerSettings, _trace_id: str) -> PoiOutput:
     # AMap "around" API needs a coordinate.
     if payload.lat is not None and payload.lon is not None:
         location = f"{payload.lon},{payload.lat}"
     elif payload.city:
-        geocode = geocode_address(
+        geocode = await geocode_address(
             api_key=settings.amap_api_key,
             address=payload.city,
             city=payload.city,
             timeout_s=settings.request_timeout_s,
+            cache_ttl_s=settings.geocode_cache_ttl_s,
+            base_url=settings.amap_base_url,
         )
         location = geocode.get("geocodes", [{}])[0].get("location", "")
         if not location:
@@ -33,7 +35,7 @@ def search_poi(payload: PoiInput, settings: ToolServerSettings, _trace_id: str)
     else:
         raise ValueError("Missing location or city for POI search")
 
-    data = search_poi_around(
+    data = await search_poi_around(
         api_key=settings.amap_api_key,
         keyword=payload.keyword,
         types=payload.types,
@@ -41,6 +43,7 @@ def search_poi(payload: PoiInput, settings: ToolServerSettings, _trace_id: str)
         radius_m=payload.radius_m,
         limit=payload.limit,
         timeout_s=settings.request_timeout_s,
+        base_url=settings.amap_base_url,
     )
 
     items: list[PoiItem] = []
@@ -8,7 +8,9 @@ from ..schemas import WeatherInput, WeatherOutput
 from ..settings import ToolServerSettings
 
 
-def get_weather(payload: WeatherInput, settings: ToolServerSettings, _trace_id: str) -> WeatherOutput:
+async def get_weather(
+    payload: WeatherInput, settings: ToolServerSettings, _trace_id: str
+) -> WeatherOutput:
     # Delegate upstream call to adapter; keep tool thin.
     city = payload.city
     lat = payload.lat
@@ -20,11 +22,13 @@ def get_weather(payload: WeatherInput, settings: ToolServerSettings, _trace_id:
         if mapped:
             city = mapped
         elif settings.amap_api_key:
-            geocode = geocode_address(
+            geocode = await geocode_address(
                 api_key=settings.amap_api_key,
                 address=city,
                 city=city,
                 timeout_s=settings.request_timeout_s,
+                cache_ttl_s=settings.geocode_cache_ttl_s,
+                base_url=settings.amap_base_url,
             )
             location = geocode.get("geocodes", [{}])[0].get("location", "")
             if location and "," in location:
@@ -32,7 +36,7 @@ def get_weather(payload: WeatherInput, settings: ToolServerSettings, _trace_id:
                 lon = float(lon_str)
                 lat = float(lat_str)
 
-    data = fetch_current_weather(
+    data = await fetch_current_weather(
         api_key=settings.openweather_api_key,
         city=city,
         lat=lat,
@@ -40,6 +44,7 @@ def get_weather(payload: WeatherInput, settings: ToolServerSettings, _trace_id:
         units=payload.units,
         lang=payload.lang or settings.default_lang,
         timeout_s=settings.request_timeout_s,
+        base_url=settings.openweather_base_url,
     )
 
     weather_desc = None
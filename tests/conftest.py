@@ -0,0 +1,109 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from agent_server.tool_catalog import local_tool_catalog, set_tool_catalog
+from common.logging import flush_logs
+from tool_server.schemas import ToolMeta, ToolResponse
+
+WEATHER_DATA = {
+    "source": "openweather",
+    "city": "Beijing",
+    "description": "晴",
+    "temperature_c": 21.0,
+}
+
+
+class FakeCompletions:
+    """Scripted `client.chat.completions`: replies in order, then `default` for good."""
+
+    def __init__(self, responses=(), default=None):
+        self._responses = list(responses)
+        self.default = default
+        self.calls = []
+
+    @property
+    def client(self):
+        """An OpenAI-client stand-in to assign to `Agent._client`."""
+        return SimpleNamespace(chat=SimpleNamespace(completions=self))
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self._responses or self.default is None:
+            return self._responses.pop(0)
+        return self.default
+
+
+class FakeBroker:
+    """ToolBroker stand-in that records calls and answers each one with `data`.
+
+    The first calls fail with `errors` (ToolError instances), one per call.
+    """
+
+    def __init__(self, data=None, delay_s=0.0, errors=()):
+        self.data = WEATHER_DATA if data is None else data
+        self.delay_s = delay_s
+        self.errors = list(errors)
+        self.calls = []
+
+    async def call_tool(self, name, args, trace_id, trace):
+        self.calls.append((name, args))
+        if self.delay_s:
+            await asyncio.sleep(self.delay_s)
+        meta = ToolMeta(
+            tool_name=name, trace_id=trace_id, latency_ms=max(1, int(self.delay_s * 1000))
+        )
+        if self.errors:
+            return ToolResponse(ok=False, error=self.errors.pop(0), meta=meta)
+        return ToolResponse(ok=True, data=dict(self.data), error=None, meta=meta)
+
+
+def _llm_response(tool_calls=(), content="", finish_reason=None):
+    calls = [
+        SimpleNamespace(
+            id=f"call_{idx}",
+            function=SimpleNamespace(name=name, arguments=json.dumps(args, ensure_ascii=False)),
+        )
+        for idx, (name, args) in enumerate(tool_calls, start=1)
+    ]
+    message = SimpleNamespace(content=content, tool_calls=calls)
+    choice = SimpleNamespace(
+        message=message, finish_reason=finish_reason or ("tool_calls" if calls else "stop")
+    )
+    return SimpleNamespace(choices=[choice])
+
+
+@pytest.fixture
+def fake_completions():
+    return FakeCompletions
+
+
+@pytest.fixture
+def fake_broker():
+    return FakeBroker
+
+
+@pytest.fixture
+def llm_response():
+    """Chat completion builder: `llm_response([(name, args), ...], content=...)`.
+
+    Tool calls get the ids call_1, call_2, ... in order.
+    """
+    return _llm_response
+
+
+@pytest.fixture(autouse=True)
+def _flush_logs():
+    # Write a test's queued log lines while its output is still being captured.
+    yield
+    flush_logs()
+
+
+@pytest.fixture(autouse=True)
+def tool_catalog():
+    # Agents under test use the in-tree tool server's catalog instead of discovering it.
+    catalog = local_tool_catalog()
+    set_tool_catalog(catalog)
+    return catalog
@@ -0,0 +1,139 @@
+import asyncio
+import contextlib
+import random
+
+import pytest
+
+from agent_server import admission
+from agent_server.admission import AdaptiveLimiter, AdmissionRejected
+from common.disconnect import ClientDisconnected
+
+
+def test_requests_beyond_limit_queue_then_reject_when_queue_full():
+    limiter = AdaptiveLimiter(initial_limit=2, min_limit=1, max_queue=1, queue_timeout_s=1.0)
+    release = asyncio.Event()
+    waits = []
+
+    async def request():
+        async with limiter.acquire() as admission:
+            waits.append(admission.queue_wait_ms)
+            await release.wait()
+
+    async def main():
+        running = [asyncio.create_task(request()) for _ in range(3)]
+        await asyncio.sleep(0.02)
+        assert limiter.stats()["inflight"] == 2
+        assert limiter.stats()["queued"] == 1
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with limiter.acquire():
+                pass
+        release.set()
+        await asyncio.gather(*running)
+        return rejected.value
+
+    rejected = asyncio.run(main())
+
+    assert rejected.status_code == 429
+    assert rejected.retry_after_s >= 1
+    assert len(waits) == 3 and max(waits) >= 10
+    assert limiter.stats()["inflight"] == 0
+
+
+def test_queue_timeout_rejects_with_503():
+    limiter = AdaptiveLimiter(initial_limit=1, min_limit=1, queue_timeout_s=0.02)
+
+    async def main():
+        async with limiter.acquire():
+            with pytest.raises(AdmissionRejected) as rejected:
+                async with limiter.acquire():
+                    pass
+        return rejected.value
+
+    assert asyncio.run(main()).status_code == 503
+    assert limiter.stats()["queued"] == 0
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(admission.time, "perf_counter", clock)
+    return clock
+
+
+def _run(limiter, clock, latencies_s):
+    async def main():
+        for latency_s in latencies_s:
+            async with limiter.acquire():
+                clock.now += latency_s
+
+    asyncio.run(main())
+
+
+def test_limit_shrinks_when_latency_rises_above_baseline_and_recovers(clock):
+    limiter = AdaptiveLimiter(initial_limit=10, min_limit=2)
+
+    _run(limiter, clock, [1.0] * 20)
+    assert limiter.limit >= 10
+    _run(limiter, clock, [5.0] * 10)
+    assert limiter.limit < 10
+    shrunk = limiter.limit
+    _run(limiter, clock, [1.0] * 60)
+    assert limiter.limit > shrunk
+
+
+def test_steady_slow_asks_do_not_collapse_the_limit(clock):
+    # Asks of ~20 s are normal for this service, not a sign of overload.
+    limiter = AdaptiveLimiter(initial_limit=16, min_limit=2)
+    jitter = random.Random(7)
+
+    async def main():
+        async with contextlib.AsyncExitStack() as held:
+            for _ in range(8):
+                await held.enter_async_context(limiter.acquire())
+            for _ in range(200):
+                async with limiter.acquire():
+                    clock.now += jitter.uniform(15.0, 30.0)
+            return limiter.limit, limiter.stats()["latency_baseline_ms"]
+
+    limit, baseline_ms = asyncio.run(main())
+
+    assert limit >= 16
+    assert 15_000 <= baseline_ms <= 30_000
+
+
+def test_callers_going_away_do_not_count(clock):
+    limiter = AdaptiveLimiter(initial_limit=10, min_limit=2)
+
+    async def main():
+        for error in (ClientDisconnected(), asyncio.CancelledError()):
+            with contextlib.suppress(ClientDisconnected, asyncio.CancelledError):
+                async with limiter.acquire():
+                    clock.now += 500
+                    raise error
+
+    asyncio.run(main())
+
+    assert limiter.limit == 10
+    assert limiter.stats()["latency_ewma_ms"] is None
+    assert limiter.stats()["inflight"] == 0
+
+
+def test_failed_requests_shrink_the_limit(clock):
+    limiter = AdaptiveLimiter(initial_limit=10, min_limit=2)
+
+    async def main():
+        with contextlib.suppress(RuntimeError):
+            async with limiter.acquire():
+                raise RuntimeError("llm down")
+
+    asyncio.run(main())
+
+    assert limiter.limit == 9
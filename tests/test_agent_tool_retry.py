@@ -1,100 +1,104 @@
 import asyncio
-import json
-from types import SimpleNamespace
+
+import pytest
 
 from agent_server.agent import Agent
 from agent_server.settings import AgentSettings
 from agent_server.trace import build_trace
-from tool_server.schemas import ToolError, ToolMeta, ToolResponse
-
-
-class FakeCompletions:
-    def __init__(self, responses):
-        self._responses = list(responses)
-        self.calls = []
-
-    def create(self, **kwargs):
-        self.calls.append(kwargs)
-        return self._responses.pop(0)
-
-
-class FakeClient:
-    def __init__(self, responses):
-        self.chat = SimpleNamespace(completions=FakeCompletions(responses))
-
-
-class FakeBroker:
-    def __init__(self):
-        self.calls = []
-
-    async def call_tool(self, name, args, trace_id, trace):
-        self.calls.append((name, args))
-        if len(self.calls) == 1:
-            return ToolResponse(
-                ok=False,
-                data=None,
-                error=ToolError(
-                    code="INVALID_ARGUMENT",
-                    message="Provide either city or (lat, lon).",
-                ),
-                meta=ToolMeta(tool_name=name, trace_id=trace_id, latency_ms=1),
-            )
-
-        return ToolResponse(
-            ok=True,
-            data={
-                "source": "openweather",
-                "city": "Beijing",
-                "description": "晴",
-                "temperature_c": 21.0,
-            },
-            error=None,
-            meta=ToolMeta(tool_name=name, trace_id=trace_id, latency_ms=1),
-        )
-
-
-def _response(tool_calls, finish_reason="tool_calls", content=""):
-    tool_call_objects = []
-    for idx, (name, args) in enumerate(tool_calls, start=1):
-        tool_call_objects.append(
-            SimpleNamespace(
-                id=f"call_{idx}",
-                function=SimpleNamespace(name=name, arguments=json.dumps(args, ensure_ascii=False)),
-            )
-        )
-
-    message = SimpleNamespace(content=content, tool_calls=tool_call_objects)
-    choice = SimpleNamespace(message=message, finish_reason=finish_reason)
-    return SimpleNamespace(choices=[choice])
-
-
-def test_agent_retries_invalid_tool_args_with_forced_tool_choice():
-    settings = AgentSettings(max_tool_calls=3, tool_arg_retry_limit=1)
+from tool_server.schemas import ToolError
+
+
+@pytest.fixture
+def flaky_broker(fake_broker):
+    """Rejects the first call as an invalid argument, then answers normally."""
+    error = ToolError(code="INVALID_ARGUMENT", message="Provide either city or (lat, lon).")
+    return fake_broker(errors=[error])
+
+
+def test_agent_retries_invalid_tool_args_with_forced_tool_choice(
+    fake_completions, flaky_broker, llm_response
+):
+    settings = AgentSettings(
+        max_tool_calls=3,
+        tool_arg_retry_limit=1,
+        # Exercise the LLM retry path; local repair would fix this query.
+        tool_arg_repair_enabled=False,
+    )
     agent = Agent(settings)
-    fake_client = FakeClient(
+    completions = fake_completions(
         [
-            _response([("weather", {"units": "metric"})]),
-            _response([("weather", {"city": "北京", "units": "metric"})]),
-            _response([], finish_reason="stop"),
-            _response([], finish_reason="stop", content="北京天气晴，21°C。"),
+            llm_response([("weather", {"units": "metric"})]),
+            llm_response([("weather", {"city": "北京", "units": "metric"})]),
+            llm_response([]),
+            llm_response([], content="北京天气晴，21°C。"),
         ]
     )
-    fake_broker = FakeBroker()
-    agent._client = fake_client
-    agent._broker = fake_broker
+    agent._client = completions.client
+    agent._broker = flaky_broker
 
     trace = build_trace("trace-1", "北京今天天气怎么样？")
     state = asyncio.run(agent.run("北京今天天气怎么样？", "trace-1", trace))
 
-    assert fake_broker.calls == [
+    assert flaky_broker.calls == [
         ("weather", {"units": "metric"}),
         ("weather", {"city": "北京", "units": "metric"}),
     ]
-    assert fake_client.chat.completions.calls[0]["tool_choice"] == "auto"
-    assert fake_client.chat.completions.calls[1]["tool_choice"] == {
+    assert completions.calls[0]["tool_choice"] == "auto"
+    assert completions.calls[1]["tool_choice"] == {
         "type": "function",
         "function": {"name": "weather"},
     }
     assert state.tool_calls[0].ok is False
     assert state.tool_calls[1].ok is True
     assert state.final_answer == "北京天气晴，21°C。"
+
+
+def test_agent_repairs_missing_city_locally_before_llm_retry(
+    fake_completions, flaky_broker, llm_response
+):
+    settings = AgentSettings(max_tool_calls=3, tool_arg_retry_limit=1)
+    agent = Agent(settings)
+    completions = fake_completions(
+        [
+            llm_response([("weather", {"units": "metric"})]),
+            llm_response([]),
+            llm_response([], content="北京天气晴，21°C。"),
+        ]
+    )
+    agent._client = completions.client
+    agent._broker = flaky_broker
+
+    trace = build_trace("trace-2", "北京今天天气怎么样？")
+    state = asyncio.run(agent.run("北京今天天气怎么样？", "trace-2", trace))
+
+    assert flaky_broker.calls == [
+        ("weather", {"units": "metric"}),
+        ("weather", {"units": "metric", "city": "北京"}),
+    ]
+    # No forced-tool_choice retry round trip: planner, planner, responder.
+    assert len(completions.calls) == 3
+    assert completions.calls[1]["tool_choice"] == "auto"
+    assert trace.repairs[0]["repaired_args"] == {"units": "metric", "city": "北京"}
+    assert trace.repairs[0]["ok"] is True
+    assert state.final_answer == "北京天气晴，21°C。"
+
+
+def test_local_repair_is_charged_against_the_tool_call_budget(
+    fake_completions, flaky_broker, llm_response
+):
+    agent = Agent(AgentSettings(max_tool_calls=1, tool_arg_retry_limit=1))
+    completions = fake_completions(
+        [
+            llm_response([("weather", {"units": "metric"})]),
+            llm_response([], content="请告诉我城市。"),
+        ]
+    )
+    agent._client = completions.client
+    agent._broker = flaky_broker
+
+    trace = build_trace("trace-3", "北京今天天气怎么样？")
+    asyncio.run(agent.run("北京今天天气怎么样？", "trace-3", trace))
+
+    # The only budgeted call was the planner's; no repaired second call.
+    assert agent._broker.calls == [("weather", {"units": "metric"})]
+    assert trace.repairs == []
@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from agent_server import app as agent_app
+from agent_server import batch
+from agent_server.admission import AdaptiveLimiter
+from agent_server.executor import AskResponse
+from agent_server.scheduling import request_class_var
+from agent_server.settings import AgentSettings
+from agent_server.tool_broker import ToolMemo
+from client import batch as batch_client
+from tool_server.adapters.amap import GeocodeCache
+from tool_server.schemas import ToolError, ToolMeta, ToolResponse
+
+
+def _fake_handle_ask(seen, fail=()):
+    async def fake_handle_ask(payload, trace_id, **kwargs):
+        seen.append((payload.id, request_class_var.get()))
+        await asyncio.sleep(0.01)
+        if payload.id in fail:
+            raise RuntimeError("boom")
+        return AskResponse(answer=f"answer:{payload.query}", trace_id=trace_id, tool_calls=[])
+
+    return fake_handle_ask
+
+
+def test_tool_memo_shares_identical_calls_and_drops_failures():
+    memo = ToolMemo(skip_tools=["time"])
+    calls = []
+
+    async def call(ok):
+        calls.append(ok)
+        await asyncio.sleep(0.01)
+        return ToolResponse(
+            ok=ok,
+            data={"v": 1} if ok else None,
+            error=None if ok else ToolError(code="UPSTREAM_ERROR", message="x"),
+            meta=ToolMeta(tool_name="weather", trace_id="t"),
+        )
+
+    async def main():
+        args = {"city": "Beijing"}
+        shared = await asyncio.gather(
+            *(memo.call("weather", args, lambda: call(True)) for _ in range(3))
+        )
+        failed = await memo.call("poi", {"city": "x"}, lambda: call(False))
+        await asyncio.sleep(0)
+        retried = await memo.call("poi", {"city": "x"}, lambda: call(True))
+        return shared, failed, retried
+
+    shared, failed, retried = asyncio.run(main())
+
+    assert all(response.data == {"v": 1} for response in shared)
+    assert not failed.ok and retried.ok
+    assert calls == [True, False, True]
+    assert memo.stats()["hits"] == 2
+
+
+def test_batch_endpoint_streams_one_line_per_item_on_batch_lane(monkeypatch):
+    seen = []
+    monkeypatch.setattr(batch, "handle_ask", _fake_handle_ask(seen, fail={"b"}))
+
+    client = TestClient(agent_app.app)
+    resp = client.post(
+        "/v1/ask:batch",
+        json={"items": [{"id": "a", "query": "q1"}, {"id": "b", "query": "q2"}, {"query": "q3"}]},
+        headers={"x-trace-id": "batch-1"},
+    )
+
+    assert resp.status_code == 200
+    results = {line["index"]: line for line in map(json.loads, resp.text.splitlines())}
+    assert results[0]["ok"] and results[0]["answer"] == "answer:q1"
+    assert results[0]["trace_id"] == "batch-1-0"
+    assert results[1]["ok"] is False and results[1]["error"] == "boom"
+    assert results[2]["id"] is None
+    assert {lane for _, (lane, _tenant) in seen} == {"batch"}
+
+
+def test_batch_items_wait_for_admission_instead_of_failing(monkeypatch):
+    seen = []
+    monkeypatch.setattr(batch, "handle_ask", _fake_handle_ask(seen))
+    # One slot, no queue and a short timeout: interactive asks would be rejected.
+    limiter = AdaptiveLimiter(initial_limit=1, min_limit=1, max_queue=0, queue_timeout_s=0.001)
+    monkeypatch.setattr(batch, "get_admission_limiter", lambda _settings: limiter)
+    request = batch.BatchAskRequest(
+        items=[{"id": str(idx), "query": f"q{idx}"} for idx in range(4)], concurrency=4
+    )
+
+    async def main():
+        return [result async for result in batch.run_batch(request, "b1", AgentSettings())]
+
+    results = asyncio.run(main())
+
+    assert all(result["ok"] for result in results)
+    assert len(seen) == 4
+    assert limiter.stats()["rejected_queue_full"] == limiter.stats()["rejected_timeout"] == 0
+
+
+def test_batch_cli_writes_results_and_resumes_failed_items(monkeypatch, tmp_path):
+    seen = []
+    monkeypatch.setattr(batch, "handle_ask", _fake_handle_ask(seen, fail={"2"}))
+    input_path = tmp_path / "queries.jsonl"
+    input_path.write_text(
+        "\n".join(
+            json.dumps(row, ensure_ascii=False)
+            for row in ["北京天气", {"query": "几点了"}, {"id": "x", "query": "上海"}]
+        ),
+        encoding="utf-8",
+    )
+    output_path = tmp_path / "queries.results.jsonl"
+    args = argparse.Namespace(
+        agent_url="http://agent", chunk_size=2, chunks_in_flight=2, concurrency=None, resume=True
+    )
+
+    def run():
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=agent_app.app))
+        return asyncio.run(batch_client.run(args, input_path, output_path, client))
+
+    first = run()
+    assert (first["ok"], first["failed"], first["skipped"]) == (2, 1, 0)
+
+    seen.clear()
+    monkeypatch.setattr(batch, "handle_ask", _fake_handle_ask(seen))
+    second = run()
+    assert (second["ok"], second["failed"], second["skipped"]) == (1, 0, 2)
+    assert [item_id for item_id, _ in seen] == ["2"]
+    assert batch_client.load_done_ids(output_path) == {"1", "2", "x"}
+
+
+def test_batch_cli_fails_invalid_rows_locally_without_sinking_the_chunk(monkeypatch, tmp_path):
+    seen = []
+    monkeypatch.setattr(batch, "handle_ask", _fake_handle_ask(seen))
+    input_path = tmp_path / "queries.jsonl"
+    input_path.write_text(
+        '{"id": "a", "query": "北京天气"}\n{"id": "b"}\n{not json\n{"id": "c", "query": "上海", "tenant": 7}\n',
+        encoding="utf-8",
+    )
+    output_path = tmp_path / "queries.results.jsonl"
+    args = argparse.Namespace(
+        agent_url="http://agent", chunk_size=10, chunks_in_flight=1, concurrency=None, resume=True
+    )
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=agent_app.app))
+    summary = asyncio.run(batch_client.run(args, input_path, output_path, client))
+
+    assert (summary["ok"], summary["failed"]) == (1, 3)
+    assert [item_id for item_id, _ in seen] == ["a"]
+    results = {
+        row["id"]: row for row in map(json.loads, output_path.read_text("utf-8").splitlines())
+    }
+    assert results["b"]["error"] == "missing query"
+    assert results["3"]["error"].startswith("invalid JSON")
+    assert results["c"]["error"] == "tenant must be a string"
+
+
+def test_geocode_cache_shares_misses_and_skips_errors():
+    cache = GeocodeCache()
+    fetches = []
+
+    async def fetch(result):
+        fetches.append(result)
+        await asyncio.sleep(0.01)
+        if result is None:
+            raise ValueError("not found")
+        return result
+
+    async def main():
+        key = ("北京", "北京")
+        first = await asyncio.gather(
+            *(cache.get(key, 60, lambda: fetch({"n": 1})) for _ in range(3))
+        )
+        again = await cache.get(key, 60, lambda: fetch({"n": 2}))
+        try:
+            await cache.get(("nowhere", None), 60, lambda: fetch(None))
+        except ValueError:
+            pass
+        retry = await cache.get(("nowhere", None), 60, lambda: fetch({"n": 3}))
+        return first, again, retry
+
+    first, again, retry = asyncio.run(main())
+
+    assert first == [{"n": 1}] * 3 and again == {"n": 1}
+    assert retry == {"n": 3}
+    assert fetches == [{"n": 1}, None, {"n": 3}]
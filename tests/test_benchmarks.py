@@ -0,0 +1,122 @@
+import asyncio
+import json
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from benchmarks import wire
+from benchmarks.e2e import baseline_from, compare
+from benchmarks.load import Sample, closed_loop, open_loop, phase_breakdown, summarize
+from benchmarks.serialization import run_suite
+from tool_server.tools import list_tool_specs
+
+
+def _app():
+    app = FastAPI()
+
+    @app.post("/v1/ask")
+    async def ask(payload: dict):
+        await asyncio.sleep(0.005)
+        if payload["query"] == "fail":
+            return JSONResponse({"detail": "overloaded"}, status_code=503)
+        return {"answer": payload["query"]}
+
+    return app
+
+
+def test_load_generators_collect_samples():
+    async def main():
+        transport = httpx.ASGITransport(app=_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            closed = await closed_loop(
+                client, "/v1/ask", ["ok", "fail"], concurrency=2, duration_s=0.2, prefix="c"
+            )
+            opened, dropped = await open_loop(
+                client, "/v1/ask", ["ok"], rate=50, duration_s=0.2, prefix="o", seed=1
+            )
+        return closed, opened, dropped
+
+    closed, opened, dropped = asyncio.run(main())
+
+    assert closed and len({s.trace_id for s in closed}) == len(closed)
+    summary = summarize(closed, 0.2)
+    assert summary["ok"] + summary["errors"]["503"] == summary["requests"] == len(closed)
+    assert 0 < summary["error_rate"] < 1
+    assert summary["latency_ms"]["p50"] is not None
+    assert dropped == 0 and opened and all(s.ok for s in opened)
+
+
+def test_summary_counts_drops_and_phase_breakdown(tmp_path):
+    samples = [Sample("a", 0, 100, 200), Sample("b", 0, 300, 200), Sample("c", 0, 5, 0, "timeout")]
+    summary = summarize(samples, 2.0, dropped=1)
+    assert summary["error_rate"] == 0.5
+    assert summary["throughput_rps"] == 1.0
+    assert summary["latency_ms"]["p50"] == 300 and summary["latency_ms"]["mean"] == 200
+
+    trace = {
+        "trace_id": "a",
+        "latency_ms": 100,
+        "request": {"admission": {"queue_wait_ms": 3}},
+        "llm": [{"kind": "planner", "latency_ms": 40}, {"kind": "responder", "latency_ms": 30}],
+        "tools": [{"latency_ms": 20}, {"latency_ms": 50, "speculative": True}],
+    }
+    (tmp_path / "a.json").write_text(json.dumps(trace), encoding="utf-8")
+    (tmp_path / "other.json").write_text(json.dumps({**trace, "trace_id": "z"}), encoding="utf-8")
+    phases = phase_breakdown(tmp_path, {"a"})
+    assert phases["queue_wait"]["p50"] == 3
+    assert phases["tools"]["p50"] == 20
+    assert phases["other"]["p50"] == 10
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    def scenario(rps, p50, p99, error_rate):
+        return {
+            "throughput_rps": rps,
+            "error_rate": error_rate,
+            "latency_ms": {"p50": p50, "p90": p99, "p99": p99},
+            "phases_ms": {},
+        }
+
+    baseline = baseline_from(
+        {"meta": {"commit": "abc"}, "scenarios": {"closed_c1": scenario(10, 100, 200, 0.0)}}
+    )
+    assert baseline["scenarios"]["closed_c1"] == {
+        "throughput_rps": 10,
+        "latency_ms": {"p50": 100, "p99": 200},
+        "error_rate": 0.0,
+    }
+
+    within = {"closed_c1": scenario(8.5, 115, 230, 0.005), "open_r5": scenario(1, 1e4, 1e4, 1)}
+    assert compare(within, baseline, 0.2) == []
+
+    worse = {"closed_c1": scenario(7, 130, 200, 0.05)}
+    flagged = {(r["metric"], r["limit"]) for r in compare(worse, baseline, 0.2)}
+    assert flagged == {("throughput_rps", 8.0), ("latency_ms.p50", 120.0), ("error_rate", 0.01)}
+
+
+def test_serialization_suite_covers_every_registered_tool():
+    results = run_suite(poi_items=50, repeat=1, number=2)
+
+    assert {r.tool for r in results} == {spec.name for spec in list_tool_specs()}
+    stages = {r.stage for r in results}
+    assert {"server.input_validate", "server.response_encode", "broker.response_validate"} <= stages
+    assert all(r.ns_per_op > 0 and r.peak_bytes >= 0 for r in results)
+    wire = next(r for r in results if (r.tool, r.stage) == ("poi", "server.response_encode"))
+    assert wire.payload_bytes > 50 * 100
+
+    only = run_suite(tools=["time"], stages=["broker.*"], repeat=1, number=1)
+    assert [r.stage for r in only] == [
+        "broker.resp_json",
+        "broker.response_validate",
+        "broker.output_validate",
+    ]
+
+
+def test_wire_suite_compares_formats_against_json():
+    results = wire.run_suite(poi_items=50, repeat=1, number=1)
+
+    poi = {r.format: r for r in results if r.tool == "poi"}
+    assert poi["json"].size_ratio == 1.0
+    assert poi["json+gzip"].size_bytes < poi["json"].size_bytes
+    assert all(r.encode_ns > 0 and r.decode_ns > 0 for r in results)
@@ -0,0 +1,111 @@
+import asyncio
+
+from agent_server import executor
+from agent_server.coalesce import Coalescer, coalesce_key
+from agent_server.executor import AskRequest, AskResponse
+from agent_server.scheduling import request_class
+from agent_server.settings import AgentSettings
+
+
+def test_coalesce_key_normalizes_case_space_and_trailing_punctuation():
+    assert coalesce_key("  北京  天气怎么样？ ") == coalesce_key("北京 天气怎么样")
+    assert coalesce_key("Weather in Beijing!") == coalesce_key("weather in   beijing")
+
+
+def test_coalesce_key_separates_tenants_and_lanes():
+    key = coalesce_key("北京天气", lane="interactive", tenant="a")
+    assert key != coalesce_key("北京天气", lane="interactive", tenant="b")
+    assert key != coalesce_key("北京天气", lane="batch", tenant="a")
+
+
+def test_identical_concurrent_queries_run_once(monkeypatch):
+    runs = []
+
+    async def fake_run_ask(payload, trace_id, settings, **kwargs):
+        runs.append(trace_id)
+        await asyncio.sleep(0.05)
+        return AskResponse(
+            answer="北京：晴",
+            trace_id=trace_id,
+            tool_calls=[{"name": "weather", "ok": True}],
+        )
+
+    settings = AgentSettings(coalesce_enabled=True, trace_enabled=False)
+    coalescer = Coalescer(window_s=0)
+    monkeypatch.setattr(executor, "get_settings", lambda: settings)
+    monkeypatch.setattr(executor, "get_coalescer", lambda _settings: coalescer)
+    monkeypatch.setattr(executor, "_run_ask", fake_run_ask)
+
+    async def main():
+        return await asyncio.gather(
+            *(
+                executor.handle_ask(AskRequest(query="北京天气？"), f"trace-{idx}")
+                for idx in range(5)
+            ),
+            executor.handle_ask(AskRequest(query="北京天气", conversation_id="c1"), "trace-c"),
+        )
+
+    responses = asyncio.run(main())
+
+    assert sorted(runs) == ["trace-0", "trace-c"]
+    assert [response.trace_id for response in responses[:5]] == [f"trace-{i}" for i in range(5)]
+    assert all(response.answer == "北京：晴" for response in responses)
+    assert coalescer.stats()["followers_inflight"] == 4
+
+
+def test_window_reuses_only_shareable_results():
+    coalescer = Coalescer(window_s=5)
+    calls = []
+
+    async def leader(value):
+        calls.append(value)
+        return value
+
+    async def main():
+        first = await coalescer.run("k", "t1", lambda: leader("ok"))
+        await asyncio.sleep(0)  # let the done-callback settle the window
+        second = await coalescer.run("k", "t2", lambda: leader("again"))
+        bad = await coalescer.run("e", "t3", lambda: leader("err"), shareable=lambda v: False)
+        await asyncio.sleep(0)
+        retry = await coalescer.run("e", "t4", lambda: leader("err2"))
+        return first, second, bad, retry
+
+    first, second, bad, retry = asyncio.run(main())
+
+    assert (first.source, second.source) == ("leader", "window")
+    assert second.value == "ok" and second.leader_trace_id == "t1"
+    assert bad.source == "leader" and bad.value == "err"
+    assert retry.source == "leader" and retry.value == "err2"
+    assert calls == ["ok", "err", "err2"]
+
+
+def test_answers_of_time_sensitive_tools_and_other_tenants_are_not_reused(monkeypatch):
+    runs = []
+
+    async def fake_run_ask(payload, trace_id, settings, **kwargs):
+        runs.append(trace_id)
+        tool = "time" if "时间" in payload.query else "weather"
+        return AskResponse(answer="ok", trace_id=trace_id, tool_calls=[{"name": tool, "ok": True}])
+
+    settings = AgentSettings(coalesce_enabled=True, trace_enabled=False)
+    coalescer = Coalescer(window_s=5)
+    monkeypatch.setattr(executor, "get_settings", lambda: settings)
+    monkeypatch.setattr(executor, "get_coalescer", lambda _settings: coalescer)
+    monkeypatch.setattr(executor, "_run_ask", fake_run_ask)
+
+    async def ask(query, trace_id, tenant):
+        with request_class("interactive", tenant):
+            response = await executor.handle_ask(AskRequest(query=query), trace_id)
+        await asyncio.sleep(0)  # let the done-callback settle the window
+        return response
+
+    async def main():
+        await ask("北京时间", "t1", "a")
+        await ask("北京时间", "t2", "a")
+        await ask("北京天气", "t3", "a")
+        await ask("北京天气", "t4", "a")
+        await ask("北京天气", "t5", "b")
+
+    asyncio.run(main())
+
+    assert runs == ["t1", "t2", "t3", "t5"]
@@ -1,4 +1,18 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from agent_server import tool_broker
 from agent_server.agent import build_openai_tools
+from agent_server.settings import AgentSettings
+from agent_server.tool_broker import ToolBroker
+from common.wire import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, negotiate
+from tool_server.registry import SchemaRegistry, get_schema_registry
+from tool_server.registry import main as registry_main
+from tool_server.schemas import TimeOutput, ToolResponse
+from tool_server.server import app as tool_app
 from tool_server.tools import list_tool_specs
 
 
@@ -16,3 +30,104 @@ def test_tool_descriptions_preserve_key_argument_rules():
     assert "either `city` or both `lat` and `lon`" in descriptions["weather"]
     assert "Do not call this tool with only optional fields" in descriptions["weather"]
     assert "provide a useful `keyword`" in descriptions["poi"]
+
+
+def test_tool_server_pre_encoded_response_matches_envelope_schema():
+    client = TestClient(tool_app)
+    resp = client.post("/tools/time", json={"timezone": "UTC"}, headers={"x-trace-id": "t-1"})
+
+    assert resp.headers["content-type"] == "application/json"
+    body = ToolResponse.model_validate_json(resp.content)
+    assert body.ok and body.error is None and body.meta.trace_id == "t-1"
+    assert TimeOutput.model_validate(body.data).timezone == "UTC"
+    schema = client.get("/openapi.json").json()["paths"]["/tools/{tool_name}"]["post"]
+    assert schema["responses"]["200"]["content"]["application/json"]["schema"] == {
+        "$ref": "#/components/schemas/ToolResponse"
+    }
+
+
+def _mock_tool_server(monkeypatch, handler):
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        tool_broker.httpx,
+        "AsyncClient",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs),
+    )
+
+
+def test_strict_tool_response_mode_rejects_output_drift(monkeypatch):
+    drifted = {
+        "ok": True,
+        "data": {"timezone": "UTC", "iso": "2026-01-01T00:00:00+00:00"},
+        "meta": {"tool_name": "time", "trace_id": "t"},
+    }
+    _mock_tool_server(monkeypatch, lambda request: httpx.Response(200, json=drifted))
+
+    def call(mode):
+        settings = AgentSettings(mcp_base_url="http://tools", tool_response_mode=mode)
+        return asyncio.run(ToolBroker(settings).call_tool("time", {}, "t"))
+
+    trusted = call("trusted")
+    assert trusted.ok and trusted.data == drifted["data"]
+    strict = call("strict")
+    assert not strict.ok and strict.error.code == "TOOL_BAD_RESPONSE"
+    assert "epoch_seconds" in strict.error.message
+
+
+def test_msgpack_is_negotiated_only_when_asked_for():
+    pytest.importorskip("msgpack")
+    assert negotiate(None) == JSON_MEDIA_TYPE
+    assert negotiate("*/*") == JSON_MEDIA_TYPE
+    assert negotiate("application/x-msgpack, application/json;q=0.5") == MSGPACK_MEDIA_TYPE
+    assert negotiate("application/msgpack;q=0, application/json") == JSON_MEDIA_TYPE
+
+    client = TestClient(tool_app)
+    as_json = client.post("/tools/time", json={"timezone": "UTC"})
+    as_msgpack = client.post(
+        "/tools/time", json={"timezone": "UTC"}, headers={"accept": MSGPACK_MEDIA_TYPE}
+    )
+    assert as_json.headers["content-type"] == JSON_MEDIA_TYPE
+    assert as_msgpack.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    assert len(as_msgpack.content) < len(as_json.content)
+
+
+def test_broker_decodes_msgpack_tool_responses(monkeypatch):
+    pytest.importorskip("msgpack")
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers["accept"])
+        # Answer through the real tool server so the bytes are what it would send.
+        resp = TestClient(tool_app).post(
+            "/tools/time", content=request.content, headers=dict(request.headers)
+        )
+        return httpx.Response(resp.status_code, content=resp.content, headers=resp.headers)
+
+    _mock_tool_server(monkeypatch, handler)
+    settings = AgentSettings(mcp_base_url="http://tools", tool_wire_format="msgpack")
+    response = asyncio.run(ToolBroker(settings).call_tool("time", {"timezone": "UTC"}, "t"))
+
+    assert seen[0].startswith(MSGPACK_MEDIA_TYPE)
+    assert response.ok and response.data["timezone"] == "UTC"
+
+
+def test_tools_listing_is_cached_with_etag(tmp_path):
+    registry = get_schema_registry()
+    client = TestClient(tool_app)
+
+    resp = client.get("/tools")
+    assert resp.headers["etag"] == registry.etag
+    assert {tool["name"] for tool in resp.json()} == {spec.name for spec in list_tool_specs()}
+    assert client.get("/tools", headers={"if-none-match": registry.etag}).status_code == 304
+    assert client.get("/tools", headers={"if-none-match": '"stale"'}).status_code == 200
+
+    # The agent's hot path reuses one built list; the version is stable across rebuilds.
+    assert build_openai_tools() is build_openai_tools()
+    assert build_openai_tools() == registry.openai_tools
+    assert SchemaRegistry.from_specs(list_tool_specs()).version == registry.version
+
+    artifact = tmp_path / "tool_schemas.json"
+    assert registry_main(["-o", str(artifact)]) == 0
+    assert registry_main(["--check", str(artifact)]) == 0
+    artifact.write_text('{"version": "old"}', encoding="utf-8")
+    assert registry_main(["--check", str(artifact)]) == 1
@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+import pytest
+
+from agent_server import executor
+from agent_server.coalesce import Coalescer
+from agent_server.executor import AskRequest
+from agent_server.settings import AgentSettings
+from common.disconnect import ClientDisconnected, cancel_on_disconnect
+
+
+class FakeRequest:
+    def __init__(self, disconnect_after: int | None = None) -> None:
+        self.polls = 0
+        self.disconnect_after = disconnect_after
+
+    async def is_disconnected(self) -> bool:
+        self.polls += 1
+        return self.disconnect_after is not None and self.polls >= self.disconnect_after
+
+
+def test_cancel_on_disconnect_cancels_work_when_client_leaves():
+    cancelled = []
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        await cancel_on_disconnect(FakeRequest(disconnect_after=2), work(), poll_interval_s=0.01)
+
+    with pytest.raises(ClientDisconnected):
+        asyncio.run(main())
+    assert cancelled == [True]
+
+
+def test_cancel_on_disconnect_returns_result_while_client_stays():
+    async def work():
+        await asyncio.sleep(0.03)
+        return "done"
+
+    request = FakeRequest()
+    assert asyncio.run(cancel_on_disconnect(request, work(), poll_interval_s=0.01)) == "done"
+    assert request.polls >= 1
+
+
+def test_cancelled_ask_writes_cancelled_trace(monkeypatch, tmp_path):
+    class HangingAgent:
+        def __init__(self, _settings):
+            pass
+
+        async def run(self, query, trace_id, trace, history=None):
+            trace.llm.append({"step": "plan"})
+            await asyncio.sleep(10)
+
+    monkeypatch.setattr(executor, "Agent", HangingAgent)
+    settings = AgentSettings(trace_dir=str(tmp_path))
+
+    async def main():
+        work = executor._run_ask(AskRequest(query="北京天气"), "trace-gone", settings)
+        await cancel_on_disconnect(FakeRequest(disconnect_after=1), work, poll_interval_s=0.01)
+
+    with pytest.raises(ClientDisconnected):
+        asyncio.run(main())
+
+    (path,) = tmp_path.glob("*.json")
+    trace = json.loads(path.read_text(encoding="utf-8"))
+    assert trace["status"] == "cancelled"
+    assert trace["trace_id"] == "trace-gone"
+    assert trace["llm"] == [{"step": "plan"}]
+
+
+def test_shared_run_cancelled_only_after_last_waiter_leaves():
+    coalescer = Coalescer(window_s=0)
+    cancelled = []
+
+    async def leader():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        first = asyncio.ensure_future(coalescer.run("k", "t1", leader))
+        second = asyncio.ensure_future(coalescer.run("k", "t2", leader))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0.01)
+        assert cancelled == []
+        second.cancel()
+        await asyncio.sleep(0.01)
+        return coalescer.stats()["inflight"]
+
+    assert asyncio.run(main()) == 0
+    assert cancelled == [True]
@@ -0,0 +1,49 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from agent_server.settings import AgentSettings
+from agent_server.state import TraceRecord
+from agent_server.tool_broker import ToolBroker
+from tool_server.dispatcher import ToolDispatcher
+from tool_server.schemas import TimeOutput, tool_data
+from tool_server.server import app as tool_app
+from tool_server.settings import ToolServerSettings
+
+
+def test_embedded_mode_passes_typed_outputs_and_dumps_once():
+    broker = ToolBroker(AgentSettings(mcp_base_url="inproc"))
+    trace = TraceRecord(trace_id="t", started_at="now")
+
+    response = asyncio.run(broker.call_tool("time", {"timezone": "UTC"}, "t", trace))
+
+    # The trace needed plain data, so the typed output was dumped exactly there.
+    assert trace.tools[0]["result"]["timezone"] == "UTC"
+    assert isinstance(response.data, dict) and tool_data(response) is response.data
+
+    untraced = asyncio.run(broker.call_tool("time", {"timezone": "UTC"}, "t"))
+    assert isinstance(untraced.data, TimeOutput)
+    dumped = tool_data(untraced)
+    assert dumped["timezone"] == "UTC" and untraced.data is dumped
+
+
+def test_embedded_and_http_modes_report_the_same_errors():
+    broker = ToolBroker(AgentSettings(mcp_base_url="inproc"))
+    client = TestClient(tool_app)
+
+    embedded = asyncio.run(broker.call_tool("weather", {"units": "metric"}, "t"))
+    over_http = client.post("/tools/weather", json={"units": "metric"}).json()
+    assert embedded.error.code == over_http["error"]["code"] == "INVALID_ARGUMENT"
+
+    missing = asyncio.run(broker.call_tool("nope", {}, "t"))
+    assert missing.error.code == "NOT_FOUND"
+    assert client.post("/tools/nope", json={}).status_code == 404
+
+
+def test_dispatcher_maps_adapter_errors_with_its_own_settings():
+    dispatcher = ToolDispatcher(ToolServerSettings(openweather_api_key=None))
+
+    response = asyncio.run(dispatcher.dispatch("weather", {"city": "Beijing"}, "t"))
+
+    assert not response.ok and response.error.code == "MISSING_API_KEY"
+    assert response.meta.tool_name == "weather" and response.meta.latency_ms is not None
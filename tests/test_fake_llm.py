@@ -0,0 +1,75 @@
+import asyncio
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+from openai import AsyncOpenAI
+
+from agent_server.agent import Agent
+from agent_server.settings import AgentSettings
+from agent_server.trace import build_trace
+from fakes.llm import create_app
+from fakes.settings import FakeLlmSettings
+
+
+def _openai_client(app) -> AsyncOpenAI:
+    return AsyncOpenAI(
+        api_key="fake",
+        base_url="http://fake-llm/v1",
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=app)),
+        max_retries=0,
+    )
+
+
+def test_agent_runs_full_planner_and_responder_loop_against_fake():
+    fake_app = create_app(FakeLlmSettings())
+    agent = Agent(AgentSettings(openai_api_key="fake", mcp_base_url="inproc"))
+    agent._client = _openai_client(fake_app)
+    trace = build_trace("trace-fake", "现在几点了？")
+
+    state = asyncio.run(agent.run("现在几点了？", "trace-fake", trace))
+
+    assert [call.name for call in state.tool_calls] == ["time"]
+    assert state.tool_calls[0].ok
+    assert state.final_answer.startswith("根据工具结果：time")
+    assert [entry["kind"] for entry in trace.llm] == ["planner", "planner", "responder"]
+    assert fake_app.state.fake.stats()["requests"] == 3
+
+
+def test_streaming_reply_carries_tool_calls_and_done_marker():
+    client = TestClient(create_app(FakeLlmSettings()))
+    resp = client.post(
+        "/v1/chat/completions",
+        json={
+            "model": "m",
+            "stream": True,
+            "tools": [{"type": "function", "function": {"name": "weather"}}],
+            "messages": [{"role": "user", "content": "上海天气怎么样"}],
+        },
+    )
+
+    events = [line[len("data: ") :] for line in resp.text.splitlines() if line.startswith("data: ")]
+    assert events[-1] == "[DONE]"
+    chunks = [json.loads(event) for event in events[:-1]]
+    (call,) = [d for c in chunks for d in c["choices"][0]["delta"].get("tool_calls", [])]
+    assert call["function"]["name"] == "weather"
+    assert json.loads(call["function"]["arguments"]) == {"city": "上海"}
+    assert chunks[-1]["choices"][0]["finish_reason"] == "tool_calls"
+
+
+def test_script_and_error_injection(tmp_path):
+    script = tmp_path / "script.json"
+    script.write_text(json.dumps([{"content": "first"}, {"content": "second"}]), encoding="utf-8")
+    client = TestClient(create_app(FakeLlmSettings(script_path=str(script))))
+    body = {"model": "m", "messages": [{"role": "user", "content": "hi"}]}
+    answers = [
+        client.post("/v1/chat/completions", json=body).json()["choices"][0]["message"]["content"]
+        for _ in range(3)
+    ]
+    assert answers == ["first", "second", "first"]
+
+    failing = TestClient(create_app(FakeLlmSettings(error_rate=1.0, error_status=429)))
+    resp = failing.post("/v1/chat/completions", json=body)
+    assert resp.status_code == 429
+    assert resp.headers["retry-after"] == "1"
+    assert resp.json()["error"]["type"] == "rate_limit_error"
@@ -0,0 +1,90 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+from fastapi.testclient import TestClient
+
+from fakes.settings import FakeUpstreamSettings
+from fakes.upstreams import create_app
+from tool_server.adapters import AdapterError
+from tool_server.adapters.amap import geocode_address
+from tool_server.schemas import PoiInput, WeatherInput
+from tool_server.settings import ToolServerSettings
+from tool_server.tools.poi import search_poi
+from tool_server.tools.weather import get_weather
+
+
+@pytest.fixture
+def upstream_url():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(
+        uvicorn.Config(create_app(FakeUpstreamSettings(amap_qps=2)), log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{sock.getsockname()[1]}"
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+def test_tools_run_against_fake_upstreams(upstream_url):
+    settings = ToolServerSettings(
+        openweather_api_key="k",
+        amap_api_key="k",
+        amap_base_url=f"{upstream_url}/v3",
+        openweather_base_url=f"{upstream_url}/data/2.5",
+        geocode_cache_ttl_s=0,
+    )
+
+    async def main():
+        weather = await get_weather(WeatherInput(city="北京"), settings, "t")
+        poi = await search_poi(PoiInput(city="上海", keyword="咖啡", limit=5), settings, "t")
+        # The quota is 2 qps and POI already spent both (geocode + around).
+        with pytest.raises(AdapterError) as exc_info:
+            await geocode_address(
+                api_key="k",
+                address="杭州",
+                city=None,
+                timeout_s=2,
+                base_url=settings.amap_base_url,
+            )
+        return weather, poi, exc_info.value
+
+    weather, poi, quota_error = asyncio.run(main())
+
+    assert weather.city == "Beijing" and weather.temperature_c is not None
+    assert len(poi.items) == 5
+    assert all(item.name.startswith("咖啡") for item in poi.items)
+    assert [item.distance_m for item in poi.items] == sorted(item.distance_m for item in poi.items)
+    assert quota_error.details == {"infocode": "10021"}
+
+
+def test_fake_upstream_payloads_are_seeded_and_use_real_error_shapes():
+    def around(seed):
+        client = TestClient(create_app(FakeUpstreamSettings(seed=seed)))
+        return client.get(
+            "/v3/place/around", params={"key": "k", "location": "121.47,31.23", "keywords": "面"}
+        ).json()
+
+    assert around(1) == around(1)
+    assert around(1) != around(2)
+
+    client = TestClient(create_app(FakeUpstreamSettings(error_rate=1.0)))
+    assert client.get("/v3/geocode/geo", params={"address": "北京"}).json()["infocode"] == "10001"
+    assert client.get("/v3/geocode/geo", params={"key": "k", "address": "北京"}).json() == {
+        "status": "0",
+        "info": "UNKNOWN_ERROR",
+        "infocode": "20003",
+    }
+    resp = client.get("/data/2.5/weather", params={"appid": "k", "q": "Beijing"})
+    assert resp.status_code == 500 and resp.json()["cod"] == "500"
+
+    healthy = TestClient(create_app(FakeUpstreamSettings()))
+    missing = healthy.get("/data/2.5/weather", params={"appid": "k", "q": "Atlantis"})
+    assert missing.status_code == 404 and missing.json()["message"] == "city not found"
@@ -0,0 +1,92 @@
+import asyncio
+
+from agent_server.agent import Agent
+from agent_server.llm_cache import CompletionCache, completion_cache_key
+from agent_server.settings import AgentSettings
+from agent_server.trace import build_trace
+
+
+def _run(agent, trace_id):
+    trace = build_trace(trace_id, "北京天气")
+    state = asyncio.run(agent.run("北京天气", trace_id, trace))
+    return state, trace
+
+
+def test_repeated_query_is_served_from_cache_and_recorded_in_trace(
+    fake_completions, fake_broker, llm_response
+):
+    settings = AgentSettings(llm_cache_enabled=True, llm_cache_max_entries=16)
+    completions = fake_completions(
+        [
+            llm_response([("weather", {"city": "北京"})]),
+            llm_response([]),
+            llm_response([], content="北京晴，21°C。"),
+        ]
+    )
+    first = Agent(settings)
+    first._cache.clear()
+    first._client = completions.client
+    first._broker = fake_broker()
+    state, trace = _run(first, "trace-1")
+    assert [call["cache"] for call in trace.llm] == ["miss", "miss", "miss"]
+
+    second = Agent(settings)
+    second._client = fake_completions([]).client
+    second._broker = fake_broker()
+    cached_state, cached_trace = _run(second, "trace-2")
+
+    assert [call["cache"] for call in cached_trace.llm] == ["hit", "hit", "hit"]
+    assert cached_state.final_answer == state.final_answer == "北京晴，21°C。"
+    assert second._client.chat.completions.calls == []
+
+
+def test_time_sensitive_tool_output_bypasses_cache(fake_completions, llm_response):
+    settings = AgentSettings(llm_cache_enabled=True, llm_cache_max_entries=16)
+    agent = Agent(settings)
+    agent._cache.clear()
+    agent._client = fake_completions([llm_response([], content="10:00")]).client
+    messages = [
+        {"role": "user", "content": "现在几点"},
+        {"role": "tool", "name": "time", "tool_call_id": "call_a", "content": "{}"},
+    ]
+    _, status = asyncio.run(agent._create_completion("responder", messages))
+    assert status == "bypass"
+    assert agent._cache.stats()["entries"] == 0
+
+
+def test_cache_key_ignores_tool_call_ids_and_cache_evicts_lru():
+    def messages(call_id):
+        return [
+            {"role": "user", "content": " 北京天气 "},
+            {
+                "role": "assistant",
+                "content": "",
+                "tool_calls": [
+                    {
+                        "id": call_id,
+                        "type": "function",
+                        "function": {
+                            "name": "weather",
+                            "arguments": '{"units":"metric","city":"北京"}',
+                        },
+                    }
+                ],
+            },
+            {"role": "tool", "tool_call_id": call_id, "name": "weather", "content": "{}"},
+        ]
+
+    key_a, key_b = (
+        completion_cache_key(
+            model="m", temperature=0.2, tools_version="v", tool_choice="auto", messages=messages(i)
+        )
+        for i in ("call_x", "call_y")
+    )
+    assert key_a == key_b
+
+    cache = CompletionCache(max_entries=1)
+    cache.put("a", {"content": "A"}, ttl_s=60)
+    cache.put("b", {"content": "B"}, ttl_s=60)
+    assert cache.get("a") is None
+    assert cache.get("b") == {"content": "B"}
+    cache.put("c", {"content": "C"}, ttl_s=-1)
+    assert cache.get("c") is None
@@ -0,0 +1,91 @@
+import io
+import json
+import logging
+
+from common.logging import BatchingQueueHandler, get_logger, logging_stats, set_log_level
+
+
+def _make_logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.handlers.clear()
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+def test_batching_handler_writes_json_lines_off_thread():
+    stream = io.StringIO()
+    handler = BatchingQueueHandler(stream=stream, flush_interval_s=0.01)
+    logger = _make_logger("test_batching", handler)
+
+    logger.info("tool_call", extra={"extra": {"trace_id": "t-1", "tool": "time"}})
+    logger.info("tool_call", extra={"extra": {"trace_id": "t-2", "tool": "poi"}})
+    handler.flush()
+    handler.close()
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line["trace_id"] for line in lines] == ["t-1", "t-2"]
+    assert handler.stats()["written"] == 2
+
+
+def test_batching_handler_samples_and_drops_instead_of_blocking():
+    stream = io.StringIO()
+    handler = BatchingQueueHandler(
+        stream=stream,
+        queue_size=1,
+        sample_rates={"noisy": 0.0},
+        flush_interval_s=0.01,
+    )
+    logger = _make_logger("test_dropping", handler)
+
+    for _ in range(5):
+        logger.info("noisy")
+    assert handler.stats()["sampled_out"] == 5
+
+    # Hold the queue full without a worker so later records overflow.
+    handler._queue.put(logging.makeLogRecord({"msg": "filler"}))
+    logger.info("overflow")
+    assert handler.stats()["dropped"] == 1
+
+    handler.flush()
+    handler._ensure_worker()
+    handler.flush()
+    handler.close()
+    messages = [json.loads(line)["message"] for line in stream.getvalue().splitlines()]
+    assert "log_records_dropped" in messages
+
+
+def test_set_log_level_updates_managed_loggers():
+    logger = get_logger("test_levels")
+    try:
+        set_log_level("WARNING", "test_levels")
+        assert logger.level == logging.WARNING
+        assert logging_stats()["loggers"]["test_levels"] == "WARNING"
+    finally:
+        set_log_level("INFO", "test_levels")
+
+
+def test_admin_log_level_is_off_by_default_and_needs_the_token(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from agent_server import app as agent_app
+    from agent_server.settings import AgentSettings
+    from tool_server import server as tool_server
+    from tool_server.settings import ToolServerSettings
+
+    for module, settings_cls, app in (
+        (agent_app, AgentSettings, agent_app.app),
+        (tool_server, ToolServerSettings, tool_server.app),
+    ):
+        client = TestClient(app)
+        url = "/admin/log-level?level=INFO"
+        monkeypatch.setattr(module, "get_settings", lambda cls=settings_cls: cls(admin_token=None))
+        assert client.put(url).status_code == 404
+
+        monkeypatch.setattr(
+            module, "get_settings", lambda cls=settings_cls: cls(admin_token="s3cret")
+        )
+        assert client.put(url).status_code == 401
+        assert client.put(url, headers={"authorization": "Bearer nope"}).status_code == 401
+        assert client.put(url, headers={"authorization": "Bearer s3cret"}).status_code == 200
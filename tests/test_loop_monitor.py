@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+from common.loop_monitor import LoopLagMonitor, bind_trace_id
+
+
+def test_monitor_captures_blocking_stack_and_trace_id():
+    def blocking_call():
+        time.sleep(0.3)
+
+    async def scenario():
+        async with LoopLagMonitor(interval_s=0.02, stall_threshold_s=0.1) as monitor:
+            bind_trace_id("trace-blocked")
+            await asyncio.sleep(0.05)
+            blocking_call()
+            await asyncio.sleep(0.05)
+        return monitor
+
+    monitor = asyncio.run(scenario())
+
+    assert monitor.stall_count == 1
+    stall = monitor.stalls[0]
+    assert stall["trace_id"] == "trace-blocked"
+    assert any("blocking_call" in line for line in stall["stack"])
+    assert monitor.stats()["max_ms"] >= 100
+
+
+def test_monitor_reports_no_stalls_for_cooperative_code():
+    async def scenario():
+        async with LoopLagMonitor(interval_s=0.01, stall_threshold_s=0.1) as monitor:
+            for _ in range(5):
+                await asyncio.sleep(0.01)
+        return monitor
+
+    monitor = asyncio.run(scenario())
+
+    assert not monitor.stalls
+    stats = monitor.stats()
+    assert stats["samples"] > 0
+    assert stats["p50_ms"] is not None
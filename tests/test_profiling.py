@@ -0,0 +1,94 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from agent_server import executor
+from agent_server.executor import AskRequest
+from agent_server.settings import AgentSettings
+from agent_server.state import AgentState
+from common.profiling import RequestProfiler, should_profile
+from tool_server import server as tool_server
+from tool_server.settings import ToolServerSettings
+
+
+def _busy_work():
+    return sum(i * i for i in range(20000))
+
+
+def test_request_profiler_reports_capped_top_frames():
+    profiler = RequestProfiler(top_n=3)
+    assert profiler.start()
+    _busy_work()
+    summary = profiler.stop()
+
+    assert summary["enabled"] is True
+    assert profiler.captured
+    assert len(summary["top_cumulative"]) <= 3
+    assert len(summary["top_self"]) <= 3
+    assert summary["frames_total"] >= len(summary["top_self"])
+
+
+def test_only_one_profile_runs_at_a_time():
+    first = RequestProfiler()
+    second = RequestProfiler()
+    assert first.start()
+    try:
+        assert not second.start()
+        assert second.stop() == {"enabled": False, "skipped": "busy"}
+    finally:
+        first.stop()
+
+
+def test_busy_profiler_does_not_ask_the_tool_server_to_profile(monkeypatch):
+    seen = []
+
+    class FakeAgent:
+        def __init__(self, settings):
+            pass
+
+        async def run(self, query, trace_id, trace, history=None):
+            seen.append(trace.profile)
+            return AgentState(query=query, trace_id=trace_id, trace=trace, final_answer="ok")
+
+    monkeypatch.setattr(executor, "Agent", FakeAgent)
+    settings = AgentSettings(trace_enabled=False)
+    holder = RequestProfiler()
+    assert holder.start()
+    try:
+        asyncio.run(executor._run_ask(AskRequest(query="q"), "t-busy", settings, profile=True))
+    finally:
+        holder.stop()
+    asyncio.run(executor._run_ask(AskRequest(query="q"), "t-free", settings, profile=True))
+
+    assert seen == [{}, {"requested": True}]
+
+
+def test_should_profile_honours_header_only_for_admins_and_sampling():
+    assert should_profile("1", 0.0, admin=True)
+    assert not should_profile("1", 0.0)
+    assert not should_profile(None, 0.0, admin=True)
+    assert should_profile(None, 1.0)
+
+
+def test_tool_server_profiles_admin_callers_into_logs_only(monkeypatch):
+    logged = []
+    monkeypatch.setattr(
+        tool_server.logger, "info", lambda event, **kwargs: logged.append((event, kwargs))
+    )
+    monkeypatch.setattr(
+        tool_server,
+        "get_settings",
+        lambda: ToolServerSettings(admin_token="s3cret", profile_sample_rate=0.0),
+    )
+    client = TestClient(tool_server.app)
+
+    def call(headers):
+        resp = client.post("/tools/time", json={"timezone": "UTC"}, headers=headers)
+        assert resp.status_code == 200
+        assert "profile" not in resp.json()["meta"]
+        return [kw["extra"]["extra"]["profile"] for event, kw in logged if event == "tool_profile"]
+
+    assert call({"x-profile": "1"}) == []
+    profiles = call({"x-profile": "1", "authorization": "Bearer s3cret"})
+    assert profiles[0]["enabled"] is True
+    assert profiles[0]["top_cumulative"]
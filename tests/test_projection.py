@@ -0,0 +1,53 @@
+import json
+
+from agent_server.projection import encode_tool_message, project_tool_output
+
+
+def _poi_payload(count):
+    return {
+        "city": "Beijing",
+        "keyword": "景点",
+        "items": [
+            {
+                "name": f"景点{idx}",
+                "address": f"东城区某路{idx}号",
+                "lat": 39.9042123,
+                "lon": 116.4073951,
+                "distance_m": idx * 10,
+            }
+            for idx in range(count)
+        ],
+    }
+
+
+def test_poi_view_keeps_top_k_and_rounds_coordinates():
+    projected = project_tool_output("poi", _poi_payload(20))
+
+    assert len(projected["items"]) == 8
+    assert projected["total"] == 20
+    assert projected["items"][0]["lat"] == 39.904
+    assert projected["items"][0]["lon"] == 116.407
+
+
+def test_weather_view_drops_fields_outside_whitelist():
+    projected = project_tool_output(
+        "weather",
+        {"source": "openweather", "city": "Beijing", "temperature_c": 21.0, "humidity": None},
+    )
+
+    assert projected == {"city": "Beijing", "temperature_c": 21.0}
+
+
+def test_encoding_shrinks_list_to_fit_token_budget():
+    payload = _poi_payload(20)
+    full = json.dumps(payload, ensure_ascii=False)
+    encoded = encode_tool_message("poi", payload, max_tokens=120)
+    data = json.loads(encoded)
+
+    assert len(encoded) < len(full)
+    assert 0 < len(data["items"]) < 8
+    assert data["truncated"] == {"items": 20}
+
+
+def test_unknown_tool_passes_through_compactly():
+    assert encode_tool_message("other", {"a": 1}) == '{"a":1}'
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from agent_server.agent import Agent
+from agent_server.router import classify_intent
+from agent_server.settings import AgentSettings
+from agent_server.trace import build_trace
+from tool_server.schemas import ToolError
+
+
+def test_classify_intent_scores_simple_and_ambiguous_queries():
+    now = classify_intent("现在几点")
+    assert (now.tool_name, now.confidence) == ("time", 1.0)
+
+    weather = classify_intent("北京天气")
+    assert weather.tool_name == "weather"
+    assert weather.arguments == {"city": "北京"}
+    assert weather.confidence == 1.0
+
+    assert classify_intent("天气怎么样").confidence < 0.8
+    assert classify_intent("我周末去上海，帮我看看天气和景点").confidence < 0.8
+    assert classify_intent("你好").tool_name is None
+
+
+@pytest.fixture
+def agent(fake_completions, fake_broker, llm_response):
+    agent = Agent(AgentSettings(fast_path_enabled=True))
+    agent._client = fake_completions(default=llm_response(content="planner answer")).client
+    agent._broker = fake_broker()
+    return agent
+
+
+def test_fast_path_calls_tool_directly_and_renders_template(agent):
+    trace = build_trace("trace-fast", "北京天气")
+    state = asyncio.run(agent.run("北京天气", "trace-fast", trace))
+
+    assert agent._broker.calls == [("weather", {"city": "北京"})]
+    assert agent._client.chat.completions.calls == []
+    assert state.final_answer.startswith("Beijing天气：晴")
+    assert trace.router["fast_path"] is True
+    assert trace.router["answer"] == "template"
+
+
+def test_ambiguous_query_falls_back_to_planner(agent):
+    query = "我周末去上海，帮我看看天气和景点"
+    trace = build_trace("trace-slow", query)
+    state = asyncio.run(agent.run(query, "trace-slow", trace))
+
+    assert agent._broker.calls == []
+    assert len(agent._client.chat.completions.calls) == 2
+    assert trace.router["fast_path"] is False
+    assert state.final_answer == "planner answer"
+
+
+def test_failed_fast_path_call_is_tagged_and_counted_against_the_budget(
+    fake_completions, fake_broker, llm_response
+):
+    agent = Agent(AgentSettings(fast_path_enabled=True, max_tool_calls=1))
+    agent._client = fake_completions(
+        [llm_response([("weather", {"city": "北京"})])],
+        default=llm_response(content="planner answer"),
+    ).client
+    agent._broker = fake_broker(
+        errors=[ToolError(code="UPSTREAM_ERROR", message="weather upstream unavailable")]
+    )
+    trace = build_trace("trace-fallback", "北京天气")
+    state = asyncio.run(agent.run("北京天气", "trace-fallback", trace))
+
+    # The planner's own weather call would exceed max_tool_calls=1.
+    assert agent._broker.calls == [("weather", {"city": "北京"})]
+    assert [call.fast_path_fallback for call in state.tool_calls] == [True]
+    assert trace.router["fallback"] == "tool_error"
+    assert state.final_answer == "planner answer"
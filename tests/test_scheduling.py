@@ -0,0 +1,91 @@
+import asyncio
+
+from agent_server.scheduling import FairScheduler, classify_request, request_class
+from agent_server.settings import AgentSettings
+
+
+def test_classify_prefers_fields_and_falls_back_to_default_lane():
+    settings = AgentSettings()
+    headers = {"x-priority": "batch", "x-tenant-id": "eval"}
+
+    assert classify_request(None, None, headers, settings) == ("batch", "eval")
+    assert classify_request("interactive", "alice", headers, settings) == ("interactive", "alice")
+    assert classify_request("urgent", None, {}, settings) == ("interactive", "default")
+
+
+def test_weighted_lanes_share_capacity_by_weight():
+    scheduler = FairScheduler(capacity=1, weights={"interactive": 3, "batch": 1})
+    order = []
+
+    async def job(lane):
+        async with scheduler.slot(lane, lane):
+            order.append(lane)
+            await asyncio.sleep(0)
+
+    async def main():
+        async with scheduler.slot("batch", "seed"):
+            tasks = [asyncio.create_task(job("batch")) for _ in range(4)]
+            tasks += [asyncio.create_task(job("interactive")) for _ in range(8)]
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+
+    # Roughly 3:1 while both lanes are backlogged; batch is never starved.
+    assert order[:8].count("interactive") in (6, 7)
+    assert "batch" in order[:5]
+    assert scheduler.stats()["lanes"]["batch"]["granted"] == 5
+
+
+def test_reserved_capacity_and_tenant_cap():
+    scheduler = FairScheduler(
+        capacity=4,
+        weights={"interactive": 1, "batch": 1},
+        tenant_max_share=0.5,
+        reserved_interactive_share=0.25,
+    )
+
+    async def main():
+        await scheduler.acquire("batch", "a")
+        await scheduler.acquire("batch", "b")
+        await scheduler.acquire("batch", "c")
+        # The last slot is reserved for interactive traffic.
+        with_batch = asyncio.create_task(scheduler.acquire("batch", "d"))
+        await asyncio.sleep(0)
+        assert not with_batch.done()
+        await scheduler.acquire("interactive", "a")
+        # Tenant "a" is at its cap (2 of 4) even once capacity frees up.
+        scheduler.release("batch", "b")
+        capped = asyncio.create_task(scheduler.acquire("interactive", "a"))
+        await asyncio.sleep(0)
+        assert not capped.done()
+        capped.cancel()
+        with_batch.cancel()
+
+    asyncio.run(main())
+
+
+def test_slot_uses_request_class_from_context():
+    scheduler = FairScheduler(capacity=2, weights={"interactive": 1, "batch": 1})
+
+    async def main():
+        with request_class("batch", "eval"):
+            async with scheduler.slot():
+                return scheduler.stats()["lanes"]["batch"]["inflight"]
+
+    assert asyncio.run(main()) == 1
+
+
+def test_raising_capacity_admits_queued_requests():
+    scheduler = FairScheduler(capacity=1, weights={"interactive": 1})
+
+    async def main():
+        async with scheduler.slot("interactive", "a"):
+            waiter = asyncio.create_task(scheduler.acquire("interactive", "b"))
+            await asyncio.sleep(0)
+            assert scheduler.queued == 1
+            scheduler.set_capacity(2)
+            await asyncio.wait_for(waiter, timeout=1)
+            return scheduler.inflight
+
+    assert asyncio.run(main()) == 2
@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+from agent_server.agent import Agent
+from agent_server.session import Session, SessionStore
+from agent_server.settings import AgentSettings
+from agent_server.trace import build_trace
+
+
+def _turn(query, answer, payload_chars=0):
+    messages = [{"role": "user", "content": query}]
+    if payload_chars:
+        messages.append({"role": "tool", "name": "poi", "content": "x" * payload_chars})
+    messages.append({"role": "assistant", "content": answer})
+    return messages
+
+
+def test_follow_up_reuses_history_without_calling_tools_again(
+    fake_completions, fake_broker, llm_response
+):
+    agent = Agent(AgentSettings(max_tool_calls=3))
+    completions = fake_completions(
+        [
+            llm_response([("weather", {"city": "Beijing"})]),
+            llm_response([]),
+            llm_response([], content="北京今天晴，21°C。"),
+            # Follow-up: the planner answers from the history.
+            llm_response([]),
+            llm_response([], content="适合户外活动。"),
+        ]
+    )
+    agent._client = completions.client
+    agent._broker = fake_broker()
+    store = SessionStore()
+
+    async def ask(query, trace_id):
+        async with store.open("conv-1") as session:
+            state = await agent.run(
+                query, trace_id, build_trace(trace_id, query), history=session.history()
+            )
+            store.record_turn(
+                session, query=query, answer=state.final_answer, messages=state.messages
+            )
+        return state
+
+    asyncio.run(ask("北京天气怎么样？", "trace-1"))
+    state = asyncio.run(ask("适合出门吗？", "trace-2"))
+
+    assert state.final_answer == "适合户外活动。"
+    assert len(agent._broker.calls) == 1
+    follow_up_messages = completions.calls[3]["messages"]
+    roles = [message["role"] for message in follow_up_messages]
+    assert roles == ["system", "user", "assistant", "tool", "assistant", "user"]
+    assert follow_up_messages[-1]["content"] == "适合出门吗？"
+
+
+def test_turn_cut_off_by_the_tool_budget_leaves_a_valid_history(
+    fake_completions, fake_broker, llm_response
+):
+    agent = Agent(AgentSettings(max_tool_calls=1))
+    completions = fake_completions(
+        [
+            # Two calls in one message, but the budget only allows the first.
+            llm_response([("weather", {"city": "Beijing"}), ("time", {"timezone": "UTC"})]),
+            llm_response([], content="北京今天晴。"),
+        ],
+        default=llm_response([], content="适合户外活动。"),
+    )
+    agent._client = completions.client
+    agent._broker = fake_broker()
+    session = Session("conv-budget")
+    store = SessionStore()
+
+    for trace_id, query in (("trace-1", "北京天气和时间？"), ("trace-2", "适合出门吗？")):
+        state = asyncio.run(
+            agent.run(query, trace_id, build_trace(trace_id, query), history=session.history())
+        )
+        store.record_turn(session, query=query, answer=state.final_answer, messages=state.messages)
+
+    follow_up = completions.calls[2]["messages"]
+    asked = [
+        call["id"]
+        for m in follow_up
+        if m["role"] == "assistant"
+        for call in m.get("tool_calls", [])
+    ]
+    answered = [m["tool_call_id"] for m in follow_up if m["role"] == "tool"]
+    assert asked == answered == ["call_1"]
+    assert state.final_answer == "适合户外活动。"
+
+
+def test_compaction_stubs_old_payloads_and_folds_oldest_turns():
+    store = SessionStore(token_budget=200, tool_payload_max_tokens=50, max_turns=3)
+    session = Session("conv")
+    store.record_turn(session, query="q1", answer="a1", messages=_turn("q1", "a1", 2000))
+    assert len(session.history()[1]["content"]) == 2000  # latest turn stays intact
+
+    store.record_turn(session, query="q2", answer="a2", messages=_turn("q2", "a2"))
+    stub = json.loads(session.turns[0].messages[1]["content"])
+    assert stub["stub"] is True
+
+    for idx in range(3, 6):
+        store.record_turn(session, query=f"q{idx}", answer=f"a{idx}", messages=_turn("q", "a"))
+    assert len(session.turns) == 3
+    assert session.summary[0].startswith("Q: q1")
+    assert session.history()[0]["role"] == "system"
+
+
+def test_same_conversation_is_serialized_and_persisted(tmp_path):
+    store = SessionStore(disk_dir=str(tmp_path))
+    order = []
+
+    async def turn(name):
+        async with store.open("conv") as session:
+            order.append(f"{name}-start")
+            await asyncio.sleep(0.01)
+            store.record_turn(session, query=name, answer=name, messages=_turn(name, name))
+            order.append(f"{name}-end")
+
+    async def main():
+        await asyncio.gather(turn("a"), turn("b"))
+
+    asyncio.run(main())
+    assert order == ["a-start", "a-end", "b-start", "b-end"]
+
+    reloaded = SessionStore(disk_dir=str(tmp_path))
+
+    async def load():
+        async with reloaded.open("conv") as session:
+            return [turn.query for turn in session.turns]
+
+    assert asyncio.run(load()) == ["a", "b"]
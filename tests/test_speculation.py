@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from agent_server.agent import Agent
+from agent_server.settings import AgentSettings
+from agent_server.trace import build_trace
+
+
+@pytest.fixture
+def run_planned(fake_completions, fake_broker, llm_response):
+    """Run "北京天气" with speculation on; the planner asks for `planned_call`."""
+
+    def run(planned_call):
+        agent = Agent(AgentSettings(speculative_tools_enabled=True))
+        completions = fake_completions(
+            [llm_response([planned_call]), llm_response([]), llm_response([], content="done")]
+        )
+        agent._client = completions.client
+        agent._broker = fake_broker(data={"city": "Beijing", "items": []}, delay_s=0.05)
+        trace = build_trace("trace-spec", "北京天气")
+        state = asyncio.run(agent.run("北京天气", "trace-spec", trace))
+        return agent, state, trace
+
+    return run
+
+
+def test_matching_speculation_is_reused_with_canonical_args(run_planned):
+    agent, state, trace = run_planned(("weather", {"city": "北京", "units": "metric"}))
+
+    assert agent._broker.calls == [("weather", {"city": "北京"})]
+    assert state.tool_calls[0].ok is True
+    assert trace.tools[0]["speculative"] is True
+    assert trace.speculation["hits"] == 1
+    assert trace.speculation["wasted"] == 0
+
+
+def test_mispredicted_speculation_is_discarded_and_counted(run_planned):
+    agent, state, trace = run_planned(("poi", {"city": "北京", "keyword": "景点"}))
+
+    assert [name for name, _ in agent._broker.calls] == ["weather", "poi"]
+    assert trace.speculation["hits"] == 0
+    assert trace.speculation["wasted"] == 1
+    assert state.final_answer == "done"
@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from agent_server import tasks
+from agent_server.admission import AdaptiveLimiter
+from agent_server.app import app
+from agent_server.executor import AskRequest, AskResponse
+from agent_server.tasks import TaskManager
+from agent_server.trace import progress_listener_var
+
+
+def _fake_handle_ask(delay):
+    async def handle_ask(payload, trace_id, **kwargs):
+        listener = progress_listener_var.get()
+        listener("tool_call", {"tool_name": "weather", "ok": True})
+        await asyncio.sleep(delay)
+        return AskResponse(answer=f"answer: {payload.query}", trace_id=trace_id, tool_calls=[])
+
+    return handle_ask
+
+
+def test_task_runs_on_bounded_pool_and_streams_progress(monkeypatch):
+    monkeypatch.setattr(tasks, "handle_ask", _fake_handle_ask(0.02))
+    manager = TaskManager(workers=1)
+
+    async def main():
+        first = manager.submit(AskRequest(query="q1"), "t1")
+        second = manager.submit(AskRequest(query="q2"), "t2")
+        await asyncio.sleep(0.005)
+        assert (first.state, second.state) == ("working", "submitted")
+        events = [event async for event in manager.events(second)]
+        return first, second, events
+
+    first, second, events = asyncio.run(main())
+
+    assert first.state == second.state == "completed"
+    assert [event["event"] for event in events] == [
+        "submitted",
+        "working",
+        "tool_call",
+        "completed",
+    ]
+    assert events[-1]["data"]["result"]["answer"] == "answer: q2"
+
+
+def test_cancel_running_task(monkeypatch):
+    monkeypatch.setattr(tasks, "handle_ask", _fake_handle_ask(5))
+    manager = TaskManager(workers=1, max_pending=1)
+
+    async def main():
+        record = manager.submit(AskRequest(query="slow"), "t1")
+        await asyncio.sleep(0.005)
+        try:
+            manager.submit(AskRequest(query="more"), "t2")
+        except tasks.TaskQueueFull:
+            rejected = True
+        manager.cancel(record.task_id)
+        await asyncio.sleep(0)
+        return record, rejected
+
+    record, rejected = asyncio.run(main())
+
+    assert rejected
+    assert record.state == "canceled"
+    assert manager.stats()["workers"]["inflight"] == 0
+
+
+def test_task_waits_for_an_admission_slot_in_its_lane(monkeypatch):
+    admissions = []
+
+    async def handle_ask(payload, trace_id, *, admission=None, **kwargs):
+        admissions.append(admission)
+        return AskResponse(answer="ok", trace_id=trace_id, tool_calls=[])
+
+    monkeypatch.setattr(tasks, "handle_ask", handle_ask)
+    # A single slot and no queue: an /v1/ask caller would be rejected at once.
+    limiter = AdaptiveLimiter(initial_limit=1, min_limit=1, max_queue=0, queue_timeout_s=0.01)
+    manager = TaskManager(workers=2, admission=limiter)
+
+    async def main():
+        async with limiter.acquire():
+            record = manager.submit(AskRequest(query="q"), "t1", lane="batch", tenant="eval")
+            await asyncio.sleep(0.05)
+            assert record.state == "submitted"
+        await record.runner
+        return record
+
+    record = asyncio.run(main())
+
+    assert record.state == "completed"
+    assert admissions[0]["lane"] == "batch" and admissions[0]["tenant"] == "eval"
+    assert limiter.stats()["inflight"] == 0
+
+
+def test_task_endpoints(monkeypatch):
+    monkeypatch.setattr(tasks, "handle_ask", _fake_handle_ask(0))
+    with TestClient(app) as client:
+        submitted = client.post("/v1/tasks", json={"query": "北京天气"})
+        assert submitted.status_code == 202
+        task_id = submitted.json()["task_id"]
+
+        deadline = time.time() + 2
+        while client.get(f"/v1/tasks/{task_id}").json()["state"] != "completed":
+            assert time.time() < deadline
+            time.sleep(0.01)
+
+        body = client.get(f"/v1/tasks/{task_id}/events").text
+        assert "event: completed" in body
+        assert client.get("/v1/tasks/missing").status_code == 404
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from agent_server import tool_client
+from agent_server.repair import repair_tool_args
+from agent_server.settings import AgentSettings
+from agent_server.tool_catalog import (
+    EMPTY_CATALOG,
+    get_tool_catalog,
+    local_tool_catalog,
+    refresh_tool_catalog,
+    set_tool_catalog,
+)
+from tool_server.registry import get_schema_registry
+from tool_server.server import app as tool_app
+from tool_server.tools import list_tool_specs
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+_REAL_CLIENT = httpx.AsyncClient
+
+
+def _serve(monkeypatch, handler):
+    monkeypatch.setattr(
+        tool_client.httpx,
+        "AsyncClient",
+        lambda **kwargs: _REAL_CLIENT(transport=httpx.MockTransport(handler), **kwargs),
+    )
+
+
+def test_catalog_is_discovered_refreshed_by_etag_and_snapshotted(monkeypatch, tmp_path):
+    snapshot = tmp_path / "tool_catalog.json"
+    settings = AgentSettings(
+        mcp_base_url="http://tools",
+        tool_catalog_snapshot=str(snapshot),
+        tool_catalog_refresh_s=0,
+    )
+    server = TestClient(tool_app)
+    seen = []
+
+    def tool_server(request):
+        resp = server.get(request.url.path, headers=dict(request.headers))
+        seen.append((request.headers.get("if-none-match"), resp.status_code))
+        return httpx.Response(resp.status_code, headers=resp.headers, content=resp.content)
+
+    _serve(monkeypatch, tool_server)
+    set_tool_catalog(EMPTY_CATALOG)
+    version = get_schema_registry().version
+
+    async def refresh_twice():
+        first = await refresh_tool_catalog(settings)
+        second = await refresh_tool_catalog(settings)
+        return first, second
+
+    first, second = asyncio.run(refresh_twice())
+    assert first.source == "remote" and first.version == version
+    assert second is first
+    assert seen == [(None, 200), (f'"{version}"', 304)]
+    assert json.loads(snapshot.read_text(encoding="utf-8"))["version"] == version
+
+    # Cold start while the tool server is down: the snapshot serves, validators included.
+    def unreachable(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    _serve(monkeypatch, unreachable)
+    set_tool_catalog(EMPTY_CATALOG)
+    cold = asyncio.run(refresh_tool_catalog(settings))
+    assert cold.source == "snapshot" and cold.version == version
+    repaired = repair_tool_args("poi", {"city": "上海", "limit": 99}, "上海咖啡")
+    assert repaired.reason == "repaired" and repaired.arguments["limit"] == 50
+    assert get_tool_catalog() is cold
+
+    # A snapshot written for another tool server is not trusted.
+    elsewhere = settings.model_copy(update={"mcp_base_url": "http://other-tools"})
+    set_tool_catalog(EMPTY_CATALOG)
+    assert asyncio.run(refresh_tool_catalog(elsewhere, force=True)) is EMPTY_CATALOG
+
+
+def test_unreachable_tool_server_is_polled_once_per_retry_window(monkeypatch, tmp_path):
+    settings = AgentSettings(
+        mcp_base_url="http://tools", tool_catalog_snapshot=str(tmp_path / "none.json")
+    )
+    requests = []
+
+    def unreachable(request):
+        requests.append(request.url.path)
+        raise httpx.ConnectError("connection refused", request=request)
+
+    _serve(monkeypatch, unreachable)
+    set_tool_catalog(EMPTY_CATALOG)
+    monkeypatch.setattr("agent_server.tool_catalog._checked_at", float("-inf"))
+
+    async def burst():
+        # Concurrent asks share one refresh; later ones inside the retry window skip it.
+        await asyncio.gather(*(refresh_tool_catalog(settings) for _ in range(8)))
+        return await refresh_tool_catalog(settings)
+
+    assert asyncio.run(burst()) is EMPTY_CATALOG
+    assert requests == ["/tools"]
+
+
+def test_default_snapshot_path_does_not_depend_on_the_working_directory(monkeypatch, tmp_path):
+    monkeypatch.delenv("A2A_MCP_TOOL_CATALOG_SNAPSHOT", raising=False)
+    monkeypatch.chdir(tmp_path)
+    path = Path(AgentSettings().tool_catalog_snapshot)
+    assert path.is_absolute() and path.parent.parent == SRC_DIR.parent
+
+
+def test_compiled_validators_match_tool_server_models():
+    catalog = local_tool_catalog()
+    for spec in list_tool_specs():
+        tool = catalog.get(spec.name)
+        assert tool.input_model.model_json_schema() == spec.input_model.model_json_schema()
+        assert tool.output_model.model_json_schema() == spec.output_model.model_json_schema()
+
+    weather = catalog.get("weather").input_model
+    with pytest.raises(ValidationError, match=r"Provide either city or \(lat, lon\)"):
+        weather.model_validate({"city": " ", "lat": 39.9})
+    assert weather.model_validate({"lat": 39.9, "lon": 116.4}).units == "metric"
+    assert catalog.get("poi").llm_view.top_k == 8
+
+
+def test_agent_server_does_not_import_tool_server():
+    code = (
+        "import sys, agent_server.app; "
+        "print(sorted(m for m in sys.modules if m.startswith('tool_server')))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=SRC_DIR
+    )
+    assert out.stdout.strip() == "[]"
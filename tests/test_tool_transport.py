@@ -0,0 +1,50 @@
+import asyncio
+import threading
+import time
+
+import pytest
+import uvicorn
+
+from agent_server.settings import AgentSettings
+from agent_server.tool_broker import ToolBroker
+from agent_server.tool_client import close_tool_clients, get_tool_client
+from tool_server.server import app as tool_app
+
+
+@pytest.fixture
+def tool_socket(tmp_path):
+    path = str(tmp_path / "tools.sock")
+    server = uvicorn.Server(uvicorn.Config(tool_app, uds=path, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield path
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+def test_broker_calls_tool_server_over_unix_socket(tool_socket):
+    settings = AgentSettings(mcp_base_url=f"unix://{tool_socket}")
+
+    async def main():
+        broker = ToolBroker(settings)
+        first = await broker.call_tool("time", {"timezone": "UTC"}, "t-1")
+        second = await broker.call_tool("time", {"timezone": "UTC"}, "t-2")
+        client = get_tool_client(settings.mcp_base_url, settings.request_timeout_s)
+        pooled = client is get_tool_client(settings.mcp_base_url, settings.request_timeout_s)
+        await close_tool_clients()
+        return first, second, pooled, client.is_closed
+
+    first, second, pooled, closed = asyncio.run(main())
+
+    assert first.ok and first.data["timezone"] == "UTC"
+    assert second.meta.trace_id == "t-2"
+    assert pooled and closed
+
+
+def test_tool_clients_are_per_event_loop():
+    async def client():
+        return get_tool_client("http://127.0.0.1:1", 1.0)
+
+    assert asyncio.run(client()) is not asyncio.run(client())